@@ -1,5 +1,6 @@
 import numpy as np
-from sqlite_database.reader import get_internal_robot_track_map, get_all_environment_elements
+from sqlite_database.queries import get_element_centers
+from environment.snapshot import load_environment
 import sqlite3
 import json
 import heapq
@@ -8,34 +9,22 @@ from pathfinding.finder.a_star import AStarFinder
 import pandas as pd
 # Connect to the SQLite database
 import matplotlib.pyplot as plt
-# Fetch all environment elements from the database
-all_elements = get_all_environment_elements()
-# Initialize a dictionary to store center values
-center = {}
+# Fetch the superadobe (habitat structure) centers from the database as NumPy columns
+superadobe_ids, superadobe_centers = get_element_centers('Superadobe')
 
-# Print the details of the superadobes (habitat structures)
-for element in all_elements:
-    # Convert all_elements to a pandas DataFrame
-    all_elements_df = pd.DataFrame(all_elements)
-
-    # Filter rows where classname is 'Superadobe'
-    superadobes = all_elements_df[all_elements_df['class_name'] == 'Superadobe']
-
-    # Print the details of the superadobes
-    for _, row in superadobes.iterrows():
-        center = json.loads(row.get('center', '{}'))
-        print(f"Superadobe ID: {row.get('id')}, Center: {center}")
+# Print the details of the superadobes
+for superadobe_id, center in zip(superadobe_ids, superadobe_centers.tolist()):
+    print(f"Superadobe ID: {superadobe_id}, Center: {center}")
     
-# Fetch the internal robot tracks from the database
-# Load the final map for the internal robot with ID "IR01"
-final_map_json = get_internal_robot_track_map("InternalRobotTrack_1")
+# Load the final map of the internal robot track from the environment snapshot
+final_map_json = load_environment()['InternalRobotTracks'][0].final_map
 # Convert the final map to a NumPy array
 # Find the start and end points where the final map has a value of 1
 start_point = None
 end_point = None
 
-points = [(j, i) for i, row in enumerate(final_map_json) for j, val in enumerate(row) if val == 1]
-start_point, end_point = points[0], points[-1] if points else (None, None)
+points = [tuple(point) for point in np.argwhere(np.asarray(final_map_json) == 1)[:, ::-1].tolist()]
+start_point, end_point = (points[0], points[-1]) if points else (None, None)
 
 # Convert the final map to a NumPy array
 global_map = np.array(final_map_json)
@@ -0,0 +1,73 @@
+import numpy as np
+from scipy import ndimage
+
+from .spatial_index import TrackCellIndex
+
+"""
+Designation points of the environment structures on a robot track.
+
+The designation point of a structure is the reachable track cell closest to the
+structure's center, where the robots stop to work on it. Reachable cells are the cells
+of the track's largest 4-connected component, or of the components containing given
+cells (e.g. the robots' home cells), so a stray track fragment never becomes a target.
+"""
+
+
+def target_point_id(element_id):
+    """Return the ID of the designation target point of a structure ('Superadobe_3' -> 'superadobe_3')."""
+    return element_id.lower()
+
+
+class DesignationPointService:
+    """Maps structures (or world points) to their nearest reachable track cells."""
+
+    def __init__(self, track_map, resolution, reachable_from=None):
+        """
+        Parameters:
+        - track_map (numpy.ndarray): Track map indexed [y, x], walkable where > 0.
+        - resolution (float): Cell size of the track map in mm.
+        - reachable_from (List[tuple]): (x, y) cells whose components are reachable,
+          defaults to the largest component.
+        """
+        self.resolution = float(resolution)
+        labels, count = ndimage.label(np.asarray(track_map) > 0)  # 4-connected components
+        if count == 0:
+            reachable = np.zeros(labels.shape, dtype=bool)
+        elif reachable_from is None:
+            reachable = labels == np.argmax(np.bincount(labels.ravel())[1:]) + 1
+        else:
+            cells = np.asarray(reachable_from, dtype=np.int64).reshape(-1, 2)
+            component_ids = labels[cells[:, 1], cells[:, 0]]
+            reachable = np.isin(labels, component_ids[component_ids > 0])
+        self.index = TrackCellIndex(reachable)
+
+    def nearest_cells(self, world_points):
+        """
+        Return the nearest reachable track cell of each world point.
+
+        Parameters:
+        - world_points (array-like): (m, 2) points in mm.
+
+        Returns:
+        - tuple: ((m, 2) int array of (x, y) cells, (m,) distances in mm).
+        """
+        world_points = np.atleast_2d(np.asarray(world_points, dtype=np.float64))
+        # Cell (x, y) is centered on ((x + 0.5) * resolution, (y + 0.5) * resolution)
+        cells, distances = self.index.nearest(world_points / self.resolution - 0.5)
+        return cells, distances * self.resolution
+
+    def designate(self, structures):
+        """
+        Return the designation points of a set of structures.
+
+        Parameters:
+        - structures (List[EnvironmentElement]): Structures with a world-space `center`.
+
+        Returns:
+        - dict: element_id -> (x, y) track cell, in the order of `structures`; the target
+          point IDs of the database are `target_point_id(element_id)`.
+        """
+        if not structures:
+            return {}
+        cells, _ = self.nearest_cells([structure.center for structure in structures])
+        return {structure.element_id: tuple(cell) for structure, cell in zip(structures, cells.tolist())}
@@ -1,23 +1,102 @@
+import numpy as np
+
+from .environment_table import EnvironmentTable
+
+
+def _table_property(array_name, doc, optional=False):
+    """
+    Property reading/writing one field of the element's row in its EnvironmentTable.
+    Optional geometry fields that do not apply to the element (NaN) raise AttributeError,
+    so `getattr(element, 'radius', None)` and `hasattr` keep working as for plain attributes.
+    """
+    def getter(self):
+        value = getattr(self.table, array_name)[self.row]
+        if optional and np.isnan(value):
+            raise AttributeError(f"{self.__class__.__name__} has no {array_name}")
+        return float(value)
+
+    def setter(self, value):
+        getattr(self.table, array_name)[self.row] = np.nan if value is None else value
+        self.table.update_geometry(slice(self.row, self.row + 1))  # Keep center and bounds up to date
+
+    return property(getter, setter, doc=doc)
+
+
 class EnvironmentElement:
     """
     Base (super) class for all environment elements.
     Each environment subclass should inherit from this.
+
+    An element is a view over one row of an `EnvironmentTable`, which stores its ID, tag and
+    world-space geometry. Elements loaded from the workbook share one table; an element
+    created directly gets a one-row table of its own. Attributes the table has no column
+    for (such as the keyword arguments of the constructor) are stored in the table's
+    `extras` of the element's row, so every view of the row sees them.
     """
+    __slots__ = ('table', 'row')
+
     def __init__(self, element_id, tag, x_coord, y_coord, **kwargs):
         # Initialize the environment element with a unique ID, name, and coordinates
-        self.element_id = element_id  # Unique identifier for the element
-        self.tag= tag # Name of the environment element
-        self.x_coord = x_coord  # X-coordinate of the element's position
-        self.y_coord = y_coord  # Y-coordinate of the element's position
-        
+        self.table = EnvironmentTable([type(self)], [0], [element_id], [tag], x_coord=[x_coord], y_coord=[y_coord])
+        self.row = 0  # Row of the element in its table
+
         # Store any additional attributes passed as keyword arguments
         for key, value in kwargs.items():
             setattr(self, key, value)  # Dynamically set attributes for the object
 
+    def __setattr__(self, name, value):
+        try:
+            object.__setattr__(self, name, value)  # Slots, table properties and instance dicts
+        except AttributeError:
+            if hasattr(type(self), name):
+                raise  # Read-only property
+            self.table.extras.setdefault(self.row, {})[name] = value
+
+    def __getattr__(self, name):
+        # Only called when the normal lookup fails: look in the extra attributes of the row
+        if name not in ('table', 'row'):
+            try:
+                return self.table.extras[self.row][name]
+            except (AttributeError, KeyError):
+                pass
+        raise AttributeError(f"{self.__class__.__name__} has no attribute {name!r}")
+
+    @property
+    def element_id(self):
+        """Unique identifier for the element."""
+        return self.table.element_ids[self.row]
+
+    @element_id.setter
+    def element_id(self, value):
+        self.table.element_ids[self.row] = value
+        self.table._rows = None  # Rebuild the ID lookup on next use
+
+    @property
+    def tag(self):
+        """Name of the environment element."""
+        return self.table.tags[self.row]
+
+    @tag.setter
+    def tag(self, value):
+        self.table.tags[self.row] = value
+
+    x_coord = _table_property('x_coord', "X-coordinate of the element's position (mm).")
+    y_coord = _table_property('y_coord', "Y-coordinate of the element's position (mm).")
+    length = _table_property('length', "Length of the element along x (mm).", optional=True)
+    width = _table_property('width', "Width of the element along y (mm).", optional=True)
+    radius = _table_property('radius', "Radius of round elements (mm).", optional=True)
+
+    @property
+    def center(self):
+        """World-space (x, y) center of the element in mm."""
+        return (float(self.table.center_x[self.row]), float(self.table.center_y[self.row]))
+
+    @property
+    def bounds(self):
+        """World-space (min_x, min_y, max_x, max_y) bounds of the element in mm."""
+        table, row = self.table, self.row
+        return (float(table.min_x[row]), float(table.min_y[row]), float(table.max_x[row]), float(table.max_y[row]))
+
     def __repr__(self):
         # Provide a string representation of the object for debugging and logging
         return f"<{self.__class__.__name__} - ID: {self.element_id}, Tag: {self.tag}>"
-    
-    
-     
-    
@@ -3,6 +3,7 @@ from pathfinding.core.grid import Grid
 from pathfinding.finder.a_star import AStarFinder
 
 from .environment_base import EnvironmentElement # Import the base class `EnvironmentElement` from the `environment_base` module in the same package.
+from .track_rasterizer import rasterize_track, DEFAULT_RESOLUTION_MM, DEFAULT_LINE_WIDTH_MM
 import pygame  # Import Pygame for rendering
 from typing import List  # Import List type for type hinting
 
@@ -12,18 +13,17 @@ class Superadobe(EnvironmentElement):
     Represents a Superadobe structure (igloo-shaped) on the lunar base.
     Additional attributes may include radius, height, material, etc.
     """
+    __slots__ = ()  # Geometry is stored in the element's EnvironmentTable row
     def __init__(self, element_id, tag, x_coord, y_coord,
                  radius=0.0, height=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.radius = radius
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(int(self.x_coord), int(self.y_coord))
         r_scaled = int(self.radius * scale)
         rect = pygame.Rect(x_px - r_scaled, y_px - r_scaled, 2 * r_scaled, 2 * r_scaled)
         pygame.draw.ellipse(screen, (0, 255, 0), rect, width=3)
-        self.center = (x_px, y_px)  # Update center with transformed coordinates
 
 
 class PressurizedModule(EnvironmentElement):
@@ -31,12 +31,12 @@ class PressurizedModule(EnvironmentElement):
     Represents a pressurized module (habitat) on the lunar base.
     Additional attributes: length, width, height, material, etc.
     """
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord,
                  length=0.0, width=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.length = length
         self.width = width
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
@@ -44,7 +44,6 @@ class PressurizedModule(EnvironmentElement):
         w_px = int(self.width * scale)
         rect = pygame.Rect(x_px, y_px - w_px, l_px, w_px)
         pygame.draw.rect(screen, (0, 169, 11), rect, width=3)
-        self.center = (x_px + l_px / 2, y_px - w_px / 2)  # Update center with transformed coordinates
 
 
 class SuperadobePath(EnvironmentElement):
@@ -52,12 +51,12 @@ class SuperadobePath(EnvironmentElement):
     Represents a path between Superadobe path on the lunar base.
     Additional attributes: length, width, height, material, etc.
     """
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord,
                  length=0.0, width=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.length = length
         self.width = width
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
@@ -65,7 +64,6 @@ class SuperadobePath(EnvironmentElement):
         w_px = int(self.width * scale)
         rect = pygame.Rect(x_px, y_px - w_px, l_px, w_px)
         pygame.draw.rect(screen, (104, 255, 42), rect, width=3)
-        self.center = (x_px + l_px / 2, y_px - w_px / 2)  # Update center with transformed coordinates
 
 
 class ControlTower(EnvironmentElement):
@@ -73,11 +71,11 @@ class ControlTower(EnvironmentElement):
     Represents a control tower on the lunar base.
     Additional attributes: height, material, etc.
     """
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord, length=0.0, width=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.length = length
         self.width = width
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
@@ -85,15 +83,14 @@ class ControlTower(EnvironmentElement):
         w_px = int(self.width * scale)
         rect = pygame.Rect(x_px, y_px - w_px, l_px, w_px)
         pygame.draw.rect(screen, (25, 255, 251), rect, width=3)
-        self.center = (x_px + l_px / 2, y_px - w_px / 2)  # Update center with transformed coordinates
 
 
 class PavedRoad(EnvironmentElement):
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord, length=0.0, width=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.length = length
         self.width = width
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
@@ -101,7 +98,6 @@ class PavedRoad(EnvironmentElement):
         w_px = int(self.width * scale)
         rect = pygame.Rect(x_px, y_px - w_px, l_px, w_px)
         pygame.draw.rect(screen, (25, 255, 251), rect, width=3)
-        self.center = (x_px + l_px / 2, y_px - w_px / 2)  # Update center with transformed coordinates
 
 
 class CommunicationCenter(EnvironmentElement):
@@ -109,17 +105,16 @@ class CommunicationCenter(EnvironmentElement):
     Represents a communication center on the lunar base.
     Additional attributes: height, material, etc.
     """
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord, radius=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.radius = radius
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
         r_scaled = int(self.radius * scale)
         rect = pygame.Rect(x_px - r_scaled, y_px - r_scaled, 2 * r_scaled, 2 * r_scaled)
         pygame.draw.ellipse(screen, (0, 255, 0), rect, width=3)
-        self.center = (x_px, y_px)  # Update center with transformed coordinates
 
 
 class HumanQuitArea(EnvironmentElement):
@@ -127,11 +122,11 @@ class HumanQuitArea(EnvironmentElement):
     Represents a human quit area on the lunar base.
     Additional attributes: height, material, etc.
     """
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord, length=0.0, width=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.length = length
         self.width = width
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
@@ -139,7 +134,6 @@ class HumanQuitArea(EnvironmentElement):
         w_px = int(self.width * scale)
         rect = pygame.Rect(x_px, y_px - w_px, l_px, w_px)
         pygame.draw.rect(screen, (0, 169, 11), rect, width=3)
-        self.center = (x_px + l_px / 2, y_px - w_px / 2)  # Update center with transformed coordinates
 
 
 class LoadingDock(EnvironmentElement):
@@ -147,11 +141,11 @@ class LoadingDock(EnvironmentElement):
     Represents a loading dock on the lunar base.
     Additional attributes: height, material, etc.
     """
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord, length=0.0, width=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.length = length
         self.width = width
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
@@ -159,7 +153,6 @@ class LoadingDock(EnvironmentElement):
         w_px = int(self.width * scale)
         rect = pygame.Rect(x_px, y_px - w_px, l_px, w_px)
         pygame.draw.rect(screen, (255, 255, 0), rect, width=3)
-        self.center = (x_px + l_px / 2, y_px - w_px / 2)  # Update center with transformed coordinates
 
 
 class LunarTransportationShed(EnvironmentElement):
@@ -167,11 +160,11 @@ class LunarTransportationShed(EnvironmentElement):
     Represents a lunar transportation shed on the lunar base.
     Additional attributes: height, material, etc.
     """
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord, length=0.0, width=0.0, **kwargs):
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
         self.length = length
         self.width = width
-        self.center = None  # Center will be calculated during rendering
 
     def render(self, screen, transform_coords, scale):
         x_px, y_px = transform_coords(self.x_coord, self.y_coord)
@@ -179,10 +172,10 @@ class LunarTransportationShed(EnvironmentElement):
         w_px = int(self.width * scale)
         rect = pygame.Rect(x_px, y_px - w_px, l_px, w_px)
         pygame.draw.rect(screen, (255, 255, 0), rect, width=3)
-        self.center = (x_px + l_px / 2, y_px - w_px / 2)  # Update center with transformed coordinates
         print("render is completed for LunarTransportationShed")
 # Create a ClearanceArea class that inherits from EnvironmentElement
 class ClearanceArea(EnvironmentElement):
+    __slots__ = ()
     def __init__(self, element_id, tag, x_coord, y_coord, length=0.0, width=0.0, **kwargs):
         # Initialize the ClearanceArea object with its unique ID, tag, coordinates, and other optional attributes.
         super().__init__(element_id, tag, x_coord, y_coord, **kwargs)
@@ -217,15 +210,38 @@ class InternalRobotTrack(EnvironmentElement):
     """
     Represents the internal rover's path as a visual line and rectangle overlay.
     """
-    def __init__(self, element_id, tag, lines, rects, **kwargs):
+    def __init__(self, element_id, tag, lines, rects, resolution=DEFAULT_RESOLUTION_MM,
+                 line_width=DEFAULT_LINE_WIDTH_MM, **kwargs):
         super().__init__(element_id, tag, 0, 0, **kwargs)
         self.lines = lines  # List of ((x1, y1), (x2, y2)) tuples
         self.rects = rects  # List of (x, y, w, h) tuples
+        self.resolution = resolution  # Cell size of the map in mm
+        self.line_width = line_width  # Width of the track lines in mm
         self.path = []  # List of points for the path
-        self.map = None  # Without scaling for the map
-        self.final_map = None  # Final map after scaling
-        self.path_extracted = False  # Flag to ensure extract_path is called only once
-        self.extract_path()  # Call the method to extract the path immediately upon initialization
+        self.path_extracted = False  # Flag set once the map was rasterized through extract_path
+        self._final_map = None  # Rasterized on first use of final_map
+
+    @property
+    def final_map(self):
+        """
+        Map used by the robots, indexed [y, x] with rows growing upwards in the world.
+        Rasterized on first use (or taken from the rasterizer's cache) and kept on the track,
+        so later accesses neither hash the geometry again nor depend on the rasterizer's cache
+        still holding it; the array is read-only. A reloaded workbook builds new tracks.
+        """
+        if self._final_map is None:
+            self._final_map = rasterize_track(self.lines, self.rects, self.resolution, self.line_width)
+        return self._final_map
+
+    def __getstate__(self):
+        # Snapshots leave the map out; it is rasterized again on first use
+        state, slots = super().__getstate__()  # (instance dict, slot values) of the table-backed base
+        return dict(state, _final_map=None), slots
+
+    @property
+    def map(self):
+        """Track map (same as final_map)."""
+        return self.final_map
 
     def render(self, screen, transform_coords, scale):
     #   Render the internal rover's path on the Pygame screen.
@@ -248,61 +264,10 @@ class InternalRobotTrack(EnvironmentElement):
        
 
     def extract_path(self):
-        print("extract_path called")
-        """Extract the path from the map and store it in the path attribute."""
-        # Finalize rendering to an empty surface and store it in the map attribute
-        pygame.init()
-        # Get actual screen size (fullscreen resolution)
-        info = pygame.display.Info()
-        screen_width = info.current_w
-        screen_height = info.current_h
-
-        # Optional: Use full screen
-        screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
-
-        real_width_mm = 1571
-        real_height_mm = 874
-
-        scale_x = screen_width / real_width_mm
-        scale_y =  screen_height/ real_height_mm
-        scale = min(scale_x, scale_y)  # Preserve aspect ratio
-
-        
-        empty_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        empty_surface.fill((0, 0, 0, 0))  # Transparent background
-        transform_coords_inter = lambda x_mm, y_mm: (int(x_mm * scale), int(screen_height - y_mm * scale))
-        # Draw lines and rectangles on the empty surface
-        for (x1, y1), (x2, y2) in self.lines:
-            pt1 = transform_coords_inter(x1, y1)
-            pt2 = transform_coords_inter(x2, y2)
-            pygame.draw.line(empty_surface, (0, 0, 255), pt1, pt2, width=3)
-
-        for x, y, w, h in self.rects:
-            x_px, y_px = transform_coords_inter(x, y)
-            w_px = int(w * scale)
-            h_px = int(h * scale)
-            rect = pygame.Rect(x_px, y_px - h_px, w_px, h_px)
-            pygame.draw.rect(empty_surface, (0, 0, 255), rect, width=3)
-        
-        # Store the rendered map
-        self.map = empty_surface
-
-        # Extract the path from the map and store it in the path attribute by resizing the map into 25% of its original size
-        if self.map:
-            # Convert the map to a binary image
-            resized_map = pygame.transform.scale(self.map, (self.map.get_width() // 2, self.map.get_height() //2))
-            # Store the final map after scaling
-            resized_map_array = pygame.surfarray.array_alpha(resized_map)
-            pygame.quit()
-            # Convert the numpy array to a binary image
-            resized_map_array = np.where(resized_map_array > 0, 1, 0)
-            # rotate the map by 90 degrees
-            resized_map_array = np.rot90(resized_map_array)
-            # Store the resized map in the final_map attribute
-            self.final_map = resized_map_array
-            print("Path extracted successfully.")
-        else:
-            print("Map is empty. Cannot extract path.")
+        """Rasterize the track lines and rectangles into the occupancy map used by the robots."""
+        final_map = self.final_map
+        self.path_extracted = True
+        print(f"Path extracted successfully ({final_map.shape[1]}x{final_map.shape[0]} cells of {self.resolution} mm).")
 
 
 
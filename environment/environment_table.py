@@ -0,0 +1,161 @@
+import numpy as np
+
+"""
+Columnar storage for the lunar base environment elements.
+
+An `EnvironmentTable` keeps the class, ID, tag and world-space geometry (mm) of many
+elements in contiguous NumPy arrays: the workbook geometry (x_coord, y_coord, length,
+width, radius) plus the center and the axis-aligned bounds, which are computed when the
+table is built. Other attributes of an element (e.g. a height passed as a keyword
+argument) are kept per row in `extras`. Environment elements are `__slots__` views over one row of a table, so
+per-element memory is small and geometry queries over all elements are vectorized.
+
+Geometry that does not apply to an element (e.g. the radius of a rectangle) is NaN. Round
+elements are centered on (x_coord, y_coord); the others span [x_coord, x_coord + length] x
+[y_coord, y_coord + width], the rectangle they are drawn as.
+"""
+
+GEOMETRY_FIELDS = ('x_coord', 'y_coord', 'length', 'width', 'radius')
+DERIVED_FIELDS = ('center_x', 'center_y', 'min_x', 'min_y', 'max_x', 'max_y')
+
+
+class EnvironmentTable:
+    """Contiguous arrays of element classes, IDs, tags and geometry."""
+
+    def __init__(self, classes, class_ids, element_ids, tags, **geometry):
+        """
+        Parameters:
+        - classes (List[type]): Element classes; `class_ids` index into this list.
+        - class_ids (array-like): Class index of each element.
+        - element_ids (array-like): Unique ID of each element.
+        - tags (array-like): Tag of each element.
+        - **geometry: Arrays for the GEOMETRY_FIELDS, NaN where a field does not apply
+          (missing fields are all NaN).
+        """
+        self.classes = list(classes)
+        self.class_ids = np.asarray(class_ids, dtype=np.int16)
+        self.element_ids = np.asarray(element_ids, dtype=object)
+        self.tags = np.asarray(tags, dtype=object)
+        count = len(self.class_ids)
+        for field in GEOMETRY_FIELDS:
+            values = geometry.get(field)
+            setattr(self, field, np.full(count, np.nan) if values is None else np.array(values, dtype=np.float64))
+        for field in DERIVED_FIELDS:
+            setattr(self, field, np.empty(count))
+        self._rows = None  # element_id -> row, built on first lookup
+        self.extras = {}  # row -> {name: value} of attributes without a column (keyword arguments of the elements)
+        self.update_geometry()
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    @property
+    def rows(self):
+        """Dictionary element_id -> row, built on first use."""
+        if self._rows is None:
+            self._rows = {element_id: row for row, element_id in enumerate(self.element_ids.tolist())}
+        return self._rows
+
+    @classmethod
+    def from_columns(cls, tables, sheet_classes):
+        """
+        Build one table from the columnar sheets of `environment.loader.load_environment_columns`.
+
+        Parameters:
+        - tables (dict): Sheet name -> {field: NumPy array}, with 'element_id' and 'tag'.
+        - sheet_classes (dict): Sheet name -> element class of that sheet.
+
+        Returns:
+        - tuple: (EnvironmentTable, {sheet name: (first row, end row)}).
+        """
+        classes = list(dict.fromkeys(sheet_classes[sheet_name] for sheet_name in tables))
+        class_ids, element_ids, tags = [], [], []
+        geometry = {field: [] for field in GEOMETRY_FIELDS}
+        sheet_rows = {}
+        start = 0
+        for sheet_name, table in tables.items():
+            count = len(table['element_id'])
+            class_ids.append(np.full(count, classes.index(sheet_classes[sheet_name])))
+            element_ids.append(table['element_id'])
+            tags.append(table['tag'])
+            for field in GEOMETRY_FIELDS:
+                geometry[field].append(table[field] if field in table else np.full(count, np.nan))
+            sheet_rows[sheet_name] = (start, start + count)
+            start += count
+
+        def join(parts, dtype):
+            return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+        result = cls(classes, join(class_ids, np.int16), join(element_ids, object), join(tags, object),
+                     **{field: join(parts, np.float64) for field, parts in geometry.items()})
+        return result, sheet_rows
+
+    def update_geometry(self, rows=slice(None)):
+        """Recompute the centers and bounds of the given rows (all rows by default)."""
+        x, y = self.x_coord[rows], self.y_coord[rows]
+        radius = self.radius[rows]
+        is_round = ~np.isnan(radius)
+        radius = np.where(is_round, radius, 0.0)
+        length = np.where(is_round, 0.0, np.nan_to_num(self.length[rows]))
+        width = np.where(is_round, 0.0, np.nan_to_num(self.width[rows]))
+        self.center_x[rows] = np.where(is_round, x, x + length / 2)
+        self.center_y[rows] = np.where(is_round, y, y + width / 2)
+        self.min_x[rows] = x - radius
+        self.min_y[rows] = y - radius
+        self.max_x[rows] = x + radius + length
+        self.max_y[rows] = y + radius + width
+
+    def element(self, row):
+        """Return a view of one row, as an instance of the row's element class."""
+        element_class = self.classes[self.class_ids[row]]
+        element = element_class.__new__(element_class)
+        element.table = self
+        element.row = row
+        return element
+
+    def elements(self, rows=None):
+        """Return views of the given rows (all rows by default)."""
+        rows = range(len(self)) if rows is None else rows
+        return [self.element(row) for row in rows]
+
+    def class_rows(self, element_class):
+        """
+        Return the rows of one element class.
+
+        Parameters:
+        - element_class (type or str): Element class or its name.
+
+        Returns:
+        - numpy.ndarray: Row indices.
+        """
+        names = [known.__name__ for known in self.classes]
+        name = element_class if isinstance(element_class, str) else element_class.__name__
+        if name not in names:
+            return np.empty(0, dtype=np.intp)
+        return np.nonzero(self.class_ids == names.index(name))[0]
+
+    def class_names(self):
+        """Return the class name of every row."""
+        return np.array([known.__name__ for known in self.classes], dtype=object)[self.class_ids]
+
+    def centers(self, rows=None):
+        """Return the (n, 2) world centers of the given rows (all rows by default)."""
+        rows = slice(None) if rows is None else rows
+        return np.column_stack((self.center_x[rows], self.center_y[rows]))
+
+    def bounds(self, rows=None):
+        """Return the (n, 4) bounds (min_x, min_y, max_x, max_y) of the given rows (all rows by default)."""
+        rows = slice(None) if rows is None else rows
+        return np.column_stack((self.min_x[rows], self.min_y[rows], self.max_x[rows], self.max_y[rows]))
+
+    def rows_containing(self, x, y):
+        """Return the rows whose shape contains the world point (x, y)."""
+        inside = (self.min_x <= x) & (x <= self.max_x) & (self.min_y <= y) & (y <= self.max_y)
+        is_round = ~np.isnan(self.radius)
+        in_circle = (self.x_coord - x) ** 2 + (self.y_coord - y) ** 2 <= self.radius ** 2
+        return np.nonzero(inside & (~is_round | in_circle))[0]
+
+    def rows_overlapping(self, min_x, min_y, max_x, max_y):
+        """Return the rows whose bounds overlap the box [min_x, max_x] x [min_y, max_y]."""
+        overlap = (self.min_x <= max_x) & (min_x <= self.max_x) & (self.min_y <= max_y) & (min_y <= self.max_y)
+        return np.nonzero(overlap)[0]
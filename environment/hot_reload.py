@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+import numpy as np
+
+from .environment_table import GEOMETRY_FIELDS
+from .snapshot import load_environment, workbook_hash, SNAPSHOT_DIR
+from .track_rasterizer import geometry_hash
+
+"""
+Hot reload of the environment workbook.
+
+A `WorkbookWatcher` polls the workbook while the simulation runs. When its content
+changes, the workbook is reloaded (through the snapshot, so the next start is fast too),
+diffed against the loaded environment by element_id (built from the Tag or serial number
+of each row, so deleting a row only removes that element), and the `EnvironmentDiff` is handed to
+the registered listeners, which update only what changed: the database rows, the regions
+of the static render surface and the occupancy grid cells of the changed elements, and
+the rasters of the changed robot tracks.
+
+With `background=True` the reload, the diff and the background listeners (database
+writes, rasterization) run on a worker thread; `poll()` never waits for them and runs the
+other listeners (rendering, live robots) on the calling thread once the reload is done.
+"""
+
+
+class EnvironmentDiff:
+    """Elements and robot tracks that differ between two loads of the workbook."""
+
+    def __init__(self, old_table, new_table, added, removed, changed, tracks_changed):
+        self.old_table = old_table
+        self.new_table = new_table
+        self.added = added  # IDs of the elements only in the new table
+        self.removed = removed  # IDs of the elements only in the old table
+        self.changed = changed  # IDs of the elements whose class, tag or geometry changed
+        self.tracks_changed = tracks_changed  # IDs of the robot tracks that were added, removed or changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.tracks_changed)
+
+    def __repr__(self):
+        return (f"<EnvironmentDiff - added: {len(self.added)}, removed: {len(self.removed)}, "
+                f"changed: {len(self.changed)}, tracks changed: {len(self.tracks_changed)}>")
+
+    def dirty_boxes(self):
+        """Return the world (min_x, min_y, max_x, max_y) boxes covered by the changed elements before and after the change."""
+        old_rows = [self.old_table.rows[element_id] for element_id in self.removed + self.changed]
+        new_rows = [self.new_table.rows[element_id] for element_id in self.added + self.changed]
+        boxes = np.vstack((self.old_table.bounds(old_rows), self.new_table.bounds(new_rows)))
+        return boxes[np.all(np.isfinite(boxes), axis=1)]
+
+
+def _track_signatures(tracks):
+    """Return element_id -> geometry signature of each robot track."""
+    return {track.element_id: f"{geometry_hash(track.lines, track.rects)}:{track.resolution}:{track.line_width}"
+            for track in tracks}
+
+
+def diff_environments(old_data, new_data):
+    """
+    Compare two loads of the environment by element_id.
+
+    Parameters:
+    - old_data (dict): Environment currently loaded (as returned by `load_environment`).
+    - new_data (dict): Environment reloaded from the edited workbook.
+
+    Returns:
+    - EnvironmentDiff: The added, removed and changed elements and robot tracks.
+    """
+    old_table, new_table = old_data['EnvironmentTable'], new_data['EnvironmentTable']
+    old_rows, new_rows = old_table.rows, new_table.rows
+    added = [element_id for element_id in new_rows if element_id not in old_rows]
+    removed = [element_id for element_id in old_rows if element_id not in new_rows]
+
+    # Compare the rows present in both tables all at once
+    common = [element_id for element_id in new_rows if element_id in old_rows]
+    old_index = np.array([old_rows[element_id] for element_id in common], dtype=np.intp)
+    new_index = np.array([new_rows[element_id] for element_id in common], dtype=np.intp)
+    old_names = np.array([cls.__name__ for cls in old_table.classes], dtype=object)[old_table.class_ids[old_index]]
+    new_names = np.array([cls.__name__ for cls in new_table.classes], dtype=object)[new_table.class_ids[new_index]]
+    different = (old_names != new_names) | (old_table.tags[old_index] != new_table.tags[new_index])
+    for field in GEOMETRY_FIELDS:
+        old_values, new_values = getattr(old_table, field)[old_index], getattr(new_table, field)[new_index]
+        different |= ~((old_values == new_values) | (np.isnan(old_values) & np.isnan(new_values)))
+    changed = [element_id for element_id, flag in zip(common, different.tolist()) if flag]
+
+    old_tracks = _track_signatures(old_data.get('InternalRobotTracks', []))
+    new_tracks = _track_signatures(new_data.get('InternalRobotTracks', []))
+    tracks_changed = [track_id for track_id in dict.fromkeys(list(old_tracks) + list(new_tracks))
+                      if old_tracks.get(track_id) != new_tracks.get(track_id)]
+    return EnvironmentDiff(old_table, new_table, added, removed, changed, tracks_changed)
+
+
+class WorkbookWatcher:
+    """Polls the environment workbook and reports the changes of every edit to listeners."""
+
+    def __init__(self, environment_data, workbook_path='data/LunarBase.xlsx', poll_interval=0.5, cache_dir=SNAPSHOT_DIR,
+                 background=False):
+        """
+        Parameters:
+        - environment_data (dict): Environment currently loaded from the workbook.
+        - workbook_path (str): Path of the environment workbook.
+        - poll_interval (float): Minimum number of seconds between two checks of the file.
+        - cache_dir (str): Directory of the environment snapshots.
+        - background (bool): Reload on a worker thread instead of inside `poll()`.
+        """
+        self.environment_data = environment_data
+        self.workbook_path = workbook_path
+        self.poll_interval = poll_interval
+        self.cache_dir = cache_dir
+        self.background = background
+        self.listeners = []  # Callables taking (diff, environment_data), run by poll()/reload()
+        self.background_listeners = []  # Same, run with the reload (on the worker thread in background mode)
+        self._worker = None  # Thread of the reload in progress
+        self._result = None  # (diff, environment_data) left by the worker for the next poll()
+        self._last_poll = time.monotonic()
+        self._signature = self._stat()
+        self._content_hash = workbook_hash(workbook_path)
+
+    def _stat(self):
+        """Return the (modification time, size) of the workbook, or None while it is missing."""
+        try:
+            stat = os.stat(self.workbook_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def add_listener(self, listener, background=False):
+        """
+        Register a callable `listener(diff, environment_data)` called after each reload that changed something.
+
+        Parameters:
+        - listener (callable): The listener.
+        - background (bool): Run it with the reload, on the worker thread in background mode
+          (for slow work that does not touch the render loop's objects); the listeners of
+          a reload run in registration order, the background ones first.
+        """
+        (self.background_listeners if background else self.listeners).append(listener)
+
+    def poll(self):
+        """
+        Check the workbook and reload it if it was edited. Cheap enough to call every frame.
+
+        Returns:
+        - EnvironmentDiff: The changes of the reload, or None when nothing changed (or,
+          in background mode, while the reload is still running).
+        """
+        if self._worker is not None:
+            if self._worker.is_alive():
+                return None
+            self._worker = None
+            result, self._result = self._result, None
+            if result is None:
+                return None
+            self._notify(self.listeners, *result)
+            return result[0]
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval:
+            return None
+        self._last_poll = now
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+        if self.background:
+            self._worker = threading.Thread(target=self._reload_in_background, args=(signature,),
+                                            name='workbook-reload', daemon=True)
+            self._worker.start()
+            return None
+        return self.reload(signature)
+
+    def _reload_in_background(self, signature):
+        self._result = self._load(signature)
+
+    def reload(self, signature=None):
+        """Reload the workbook, notify the listeners and return the diff (None if the content did not change)."""
+        result = self._load(signature)
+        if result is None:
+            return None
+        self._notify(self.listeners, *result)
+        return result[0]
+
+    def _notify(self, listeners, diff, new_data):
+        for listener in listeners:
+            try:
+                listener(diff, new_data)
+            except Exception as error:
+                print(f"Workbook reload listener {getattr(listener, '__name__', listener)} failed: {error}")
+
+    def _load(self, signature=None):
+        """Reload and diff the workbook and run the background listeners; return (diff, data) or None."""
+        try:
+            content_hash = workbook_hash(self.workbook_path)
+            if content_hash == self._content_hash:
+                self._signature = signature or self._stat()
+                return None
+            new_data = load_environment(self.workbook_path, self.cache_dir)
+        except Exception as error:
+            # Typically the workbook is still being written; try again on the next poll
+            print(f"Could not reload {self.workbook_path}: {error}")
+            return None
+        self._signature = signature or self._stat()
+        self._content_hash = content_hash
+        diff = diff_environments(self.environment_data, new_data)
+        self.environment_data = new_data
+        if not diff:
+            return None
+        print(f"Workbook reloaded: {diff}")
+        self._notify(self.background_listeners, diff, new_data)
+        return diff, new_data
@@ -1,301 +1,231 @@
 
 from environment.environment_elements import Superadobe, InternalRobotTrack, PressurizedModule, SuperadobePath, ControlTower, PavedRoad, HumanQuitArea, CommunicationCenter, LoadingDock, LunarTransportationShed, ClearanceArea
+from environment.environment_table import EnvironmentTable
+from environment.track_rasterizer import DEFAULT_TRACK_ID
 import pandas as pd
 import numpy as np
 
-def load_environment_from_excel():
+"""
+Schema-driven loader for the lunar base workbook.
+
+ELEMENT_SCHEMAS maps every workbook sheet to the environment class it holds, the prefix of
+the element IDs and the workbook column of each constructor argument. The loader reads
+only the columns named in the schemas, converts every column to one NumPy array and
+builds the objects from those arrays in bulk, so adding a sheet means adding one entry
+to the table instead of another parsing loop. The elements of all sheets are views over a
+single EnvironmentTable.
+"""
+
+# Columns shared by the rectangular elements (corner, length along x, width along y)
+CORNER_COLUMNS = {'x_coord': 'Corner_x', 'y_coord': 'Corner_y', 'length': 'Length', 'width': 'Width'}
+# Columns shared by the round elements (center and radius)
+CIRCLE_COLUMNS = {'x_coord': 'Center_x', 'y_coord': 'Center_y', 'radius': 'Radius'}
+
+# Sheet name -> element class, element ID prefix and {constructor argument: column}
+ELEMENT_SCHEMAS = {
+    'Superadobes': {'class': Superadobe, 'id_prefix': 'Superadobe_', 'columns': CIRCLE_COLUMNS},
+    'PressurizedModules': {'class': PressurizedModule, 'id_prefix': 'Pressurized Module_', 'columns': CORNER_COLUMNS},
+    'SuperadobePaths': {'class': SuperadobePath, 'id_prefix': 'Superadobepath_', 'columns': CORNER_COLUMNS},
+    'ControlTowers': {'class': ControlTower, 'id_prefix': 'ControlTower_',
+                      'columns': {'x_coord': 'Center_x', 'y_coord': 'Center_y', 'length': 'Height', 'width': 'Width'}},
+    'PavedRoads': {'class': PavedRoad, 'id_prefix': 'PavedRoad_', 'columns': CORNER_COLUMNS},
+    'HumanQuitAreas': {'class': HumanQuitArea, 'id_prefix': 'HumanQuitArea_', 'columns': CORNER_COLUMNS},
+    'CommunicationCenters': {'class': CommunicationCenter, 'id_prefix': 'CommunicationCenter_', 'columns': CIRCLE_COLUMNS},
+    'LoadingDocks': {'class': LoadingDock, 'id_prefix': 'LoadingDock_', 'columns': CORNER_COLUMNS},
+    'LunarTransportationSheds': {'class': LunarTransportationShed, 'id_prefix': 'LunarTrasportationShed_', 'columns': CORNER_COLUMNS},
+    'ClearanceAreas': {'class': ClearanceArea, 'id_prefix': 'ClearanceArea_', 'columns': CORNER_COLUMNS},
+}
+
+# The robot track sheet holds segments ('Straight' rows) and rectangles ('Rect' rows, X2/Y2 = width/height)
+TRACK_SHEET = 'InternalRobotTracks'
+TRACK_COLUMNS = {'x1': 'X1', 'y1': 'Y1', 'x2': 'X2', 'y2': 'Y2', 'kind': 'Note'}
+# Optional column naming the track (or tile) of each row; rows without one belong to DEFAULT_TRACK_ID
+TRACK_ID_COLUMN = 'Track'
+TAG_COLUMN = 'Tag'
+# Serial number of each row; element IDs are built from it (or from the Tag) so they survive inserted or deleted rows
+SERIAL_COLUMN = 'S No'
+
+
+def _needed_columns():
+    """Return the names of all workbook columns used by the schemas."""
+    columns = {TAG_COLUMN, SERIAL_COLUMN}
+    for schema in ELEMENT_SCHEMAS.values():
+        columns.update(schema['columns'].values())
+    columns.update(TRACK_COLUMNS.values())
+    columns.add(TRACK_ID_COLUMN)
+    return columns
+
+
+def read_workbook(workbook_path='data/LunarBase.xlsx'):
+    """Read every sheet of the workbook, keeping only the columns used by the schemas."""
+    needed = _needed_columns()
+    return pd.read_excel(workbook_path, sheet_name=None, usecols=lambda column: column in needed)
+
+
+def _tag_numbers(frame):
+    """Return the trailing number of each Tag (SA4 -> 4), or None unless every row has a distinct one."""
+    if TAG_COLUMN not in frame:
+        return None
+    numbers = frame[TAG_COLUMN].astype(str).str.extract(r'(\d+)\s*$')[0]
+    if numbers.isna().any() or not numbers.is_unique:
+        return None
+    return [int(number) for number in numbers.tolist()]
+
+
+def _serial_numbers(frame):
+    """
+    Return the number identifying each row of a sheet, so deleting or inserting a row leaves
+    the IDs of the other elements unchanged: the number of the row's Tag when the Tags of the
+    sheet are numbered distinctly (they are typed by hand, while the serial numbers of several
+    sheets are formulas that break when a row is deleted), otherwise its serial number. Rows
+    without a valid serial number (or repeating one) are numbered after the largest one.
+    """
+    count = len(frame)
+    tag_numbers = _tag_numbers(frame)
+    if tag_numbers is not None:
+        return tag_numbers
+    if SERIAL_COLUMN not in frame:
+        return list(range(1, count + 1))
+    serials = pd.to_numeric(frame[SERIAL_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+    valid = np.isfinite(serials) & (serials == np.round(serials))
+    numbers, used = [], set()
+    next_number = int(serials[valid].max()) + 1 if valid.any() else 1
+    for serial, is_valid in zip(serials.tolist(), valid.tolist()):
+        if is_valid and int(serial) not in used:
+            number = int(serial)
+        else:
+            number = next_number
+            next_number += 1
+        used.add(number)
+        numbers.append(number)
+    return numbers
+
+
+def _sheet_columns(frame, id_prefix, columns):
+    """
+    Convert one sheet into a columnar table.
+
+    Parameters:
+    - frame (pandas.DataFrame): Sheet as read from the workbook.
+    - id_prefix (str): Prefix of the element IDs, followed by the number of the row (see _serial_numbers).
+    - columns (dict): Field name -> workbook column. Missing columns are filled with 0.0.
+
+    Returns:
+    - dict: Field name -> NumPy array, plus 'element_id' and 'tag'.
+    """
+    count = len(frame)
+    table = {
+        'element_id': np.array([f"{id_prefix}{number}" for number in _serial_numbers(frame)], dtype=object),
+        'tag': (frame[TAG_COLUMN].fillna('').to_numpy(dtype=object) if TAG_COLUMN in frame
+                else np.full(count, '', dtype=object)),
+    }
+    for field, column in columns.items():
+        if column in frame:
+            table[field] = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            table[field] = np.zeros(count)
+    return table
+
+
+def _track_columns(frame):
+    """Convert the robot track sheet into a columnar table."""
+    table = {field: (frame[column].to_numpy(dtype=np.float64) if field != 'kind'
+                     else frame[column].fillna('').to_numpy(dtype=object))
+             for field, column in TRACK_COLUMNS.items()}
+    table['tag'] = frame[TAG_COLUMN].fillna('').to_numpy(dtype=object)
+    if TRACK_ID_COLUMN in frame:
+        track_ids = frame[TRACK_ID_COLUMN].fillna('').astype(str).str.strip().to_numpy(dtype=object)
+        table['track_id'] = np.where(track_ids == '', DEFAULT_TRACK_ID, track_ids)
+    else:
+        table['track_id'] = np.full(len(frame), DEFAULT_TRACK_ID, dtype=object)
+    return table
+
+
+def load_environment_columns(workbook_path='data/LunarBase.xlsx', xls=None):
+    """
+    Load the workbook as columnar tables, without creating any environment objects.
+
+    Parameters:
+    - workbook_path (str): Path of the environment workbook.
+    - xls (dict): Sheets already read with `read_workbook`, to avoid reading the file again.
+
+    Returns:
+    - dict: Sheet name -> {field: NumPy array} for the sheets in ELEMENT_SCHEMAS and the
+      robot track sheet that exist in the workbook.
+    """
+    if xls is None:
+        xls = read_workbook(workbook_path)
+    tables = {}
+    for sheet_name, schema in ELEMENT_SCHEMAS.items():
+        if sheet_name in xls:
+            tables[sheet_name] = _sheet_columns(xls[sheet_name], schema['id_prefix'], schema['columns'])
+    if TRACK_SHEET in xls:
+        tables[TRACK_SHEET] = _track_columns(xls[TRACK_SHEET])
+    return tables
+
+
+def build_environment_table(tables):
+    """
+    Build the EnvironmentTable of the element sheets of a columnar workbook.
+
+    Parameters:
+    - tables (dict): Sheet name -> {field: NumPy array}, as returned by `load_environment_columns`.
+
+    Returns:
+    - tuple: (EnvironmentTable, {sheet name: list of element views}).
+    """
+    element_tables = {sheet_name: table for sheet_name, table in tables.items() if sheet_name in ELEMENT_SCHEMAS}
+    sheet_classes = {sheet_name: schema['class'] for sheet_name, schema in ELEMENT_SCHEMAS.items()}
+    table, sheet_rows = EnvironmentTable.from_columns(element_tables, sheet_classes)
+    elements = {sheet_name: table.elements(range(start, end)) for sheet_name, (start, end) in sheet_rows.items()}
+    return table, elements
+
+
+def build_track(table, element_id=DEFAULT_TRACK_ID, tag="InternalRobotTrack"):
+    """Create the InternalRobotTrack of a robot track table (all its rows belong to one track)."""
+    x1, y1, x2, y2 = table['x1'], table['y1'], table['x2'], table['y2']
+    straight = table['kind'] == 'Straight'
+    rect = table['kind'] == 'Rect'
+    lines = [((a, b), (c, d)) for a, b, c, d in zip(x1[straight].tolist(), y1[straight].tolist(),
+                                                    x2[straight].tolist(), y2[straight].tolist())]
+    rects = list(zip(x1[rect].tolist(), y1[rect].tolist(), x2[rect].tolist(), y2[rect].tolist()))
+    return InternalRobotTrack(element_id=element_id, tag=tag, lines=lines, rects=rects)
+
+
+def build_tracks(table):
+    """
+    Create one InternalRobotTrack per track named in a robot track table.
+
+    Parameters:
+    - table (dict): Robot track table, as returned by `load_environment_columns`.
+
+    Returns:
+    - List[InternalRobotTrack]: The tracks, in the order they first appear in the sheet.
+    """
+    tracks = []
+    for track_id in dict.fromkeys(table['track_id'].tolist()):
+        rows = table['track_id'] == track_id
+        tag = "InternalRobotTrack" if track_id == DEFAULT_TRACK_ID else track_id
+        tracks.append(build_track({field: values[rows] for field, values in table.items()}, track_id, tag))
+    return tracks
+
+
+def load_environment_from_excel(workbook_path='data/LunarBase.xlsx'):
     """
     Reads the Excel file, parses each sheet, and returns a dictionary
-    of lists of environment objects. Modify sheet names & column
-    mappings to match your actual data.
+    of lists of environment objects. Sheet names and column mappings
+    are defined in ELEMENT_SCHEMAS.
     """
-    
-    # load the excel file
-    xls = pd.read_excel('data/LunarBase.xlsx', sheet_name=None)
-    # Store the Excel sheet names in a variable
-    sheet_names = list(xls.keys())
-    
-        # Container to store environment objects keyed by their sheet names
-    environment_data = {sheet_name: [] for sheet_name in sheet_names}
-
-    # 1) Parse the "Superadobes" sheet
-    if "Superadobes" in xls.keys():
-        df_superadobes = xls["Superadobes"]
-        for _, row in df_superadobes.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", "Radius", "Height", ...
-            # for ID, combine Tag and row index to make it unique
-                        
-            elem_id = f"Superadobe_{row.name+1}"
-            tag = row.get("Tag", "")
-            x = row.get("Center_x", 0.0)
-            y = row.get("Center_y", 0.0)
-            radius = row.get("Radius", 0.0)
-           
-
-            # Create a Superadobe instance
-            sa = Superadobe(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                radius=radius
-                # pass extra **kwargs if needed
-            )
-            environment_data['Superadobes'].append(sa)
-    
-    # 2) Parse the "PressurizedModules" sheet
-
-    if "PressurizedModules" in xls.keys():
-        df_Pressurized_modules = xls["PressurizedModules"]
-        for _, row in df_Pressurized_modules.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", "Length", "Diameter", ...
-            elem_id = f"Pressurized Module_{row.name+1}"
-            tag = row.get("Tag", "")
-            x = row.get("Corner_x", 0.0)
-            y = row.get("Corner_y", 0.0)
-            length = row.get("Length", 0.0)
-            width = row.get("Width", 0.0)
-
-            # Create a PressurizedModule instance
-            pm = PressurizedModule(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['PressurizedModules'].append(pm)
-
-
-        
-    # 3) Parse the "SuperadobePath" sheet
-    if "SuperadobePaths" in xls.keys():
-        df_superadobepath = xls["SuperadobePaths"]
-        for _, row in df_superadobepath.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"Superadobepath_{row.name+1}"
-            tag = row.get("Tag", "")
-            x = row.get("Corner_x", 0.0)
-            y = row.get("Corner_y", 0.0)
-            length = row.get("Length", 0.0)
-            width = row.get("Width", 0.0)
-            # Create a SuperadobePath instance
-            sap = SuperadobePath(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['SuperadobePaths'].append(sap)
- 
-    # 4) Parse the "ControlTowers" sheet
-
-    if "ControlTowers" in xls.keys():
-        df_control_towers=xls["ControlTowers"]
-        for _,row in df_control_towers.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"ControlTower_{row.name+1}"
-            tag = row.get("Tag","")
-            x = row.get("Center_x",0.0)
-            y = row.get("Center_y",0.0)
-            length = row.get("Height",0.0)
-            width = row.get("Width",0.0)
-            # Create a ControlTower instance
-            ct = ControlTower(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['ControlTowers'].append(ct)
-
- # 5) Parse the "PavedRoads" sheet
-    if "PavedRoads" in xls.keys():
-        df_paved_roads =xls["PavedRoads"]
-        for _, row in df_paved_roads.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"PavedRoad_{row.name+1}"
-            tag = row.get("Tag","")
-            x = row.get("Corner_x",0.0)
-            y = row.get("Corner_y",0.0)
-            length = row.get("Length",0.0)
-            width = row.get("Width",0.0)
-            # Create a PavedRoad instance
-            pr = PavedRoad(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['PavedRoads'].append(pr)
-
-# 6) Parse the "HumanQuitAreas" sheet
-
-    if "HumanQuitAreas" in xls.keys():
-        df_human_quit_area = xls["HumanQuitAreas"]
-        for _, row in df_human_quit_area.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"HumanQuitArea_{row.name+1}"
-            tag = row.get("Tag","")
-            x = row.get("Corner_x",0.0)
-            y = row.get("Corner_y",0.0)
-            length = row.get("Length",0.0)
-            width = row.get("Width",0.0)
-            # Create a HumanQuitArea instance
-            hqa = HumanQuitArea(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['HumanQuitAreas'].append(hqa)
-
-# 7) Parse the "CommunicationCenters" sheet
-
-    if "CommunicationCenters" in xls.keys():
-        df_communication_center = xls["CommunicationCenters"]
-        for _, row in df_communication_center.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"CommunicationCenter_{row.name+1}"
-            tag = row.get("Tag","")
-            x = row.get("Center_x",0.0)
-            y = row.get("Center_y",0.0)
-            radius = row.get("Radius",0.0)
-           
-            # Create a CommunicationCenter instance
-            cc = CommunicationCenter(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                radius=radius
-                # pass extra **kwargs if needed
-            )
-            environment_data['CommunicationCenters'].append(cc)
-
-# 8) Parse the "LoadingDocks" sheet
-    if "LoadingDocks" in xls.keys():
-        df_loading_dock = xls["LoadingDocks"]
-        for _, row in df_loading_dock.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"LoadingDock_{row.name+1}"
-            tag = row.get("Tag","")
-            x = row.get("Corner_x",0.0)
-            y = row.get("Corner_y",0.0)
-            length = row.get("Length",0.0)
-            width = row.get("Width",0.0)
-            # Create a LoadingDock instance
-            ld = LoadingDock(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['LoadingDocks'].append(ld)
-
-# 9) Parse the "LunarTransportationSheds" sheet
-
-    if "LunarTransportationSheds" in xls.keys():
-        df_lunar_transportation_shed = xls["LunarTransportationSheds"]
-        for _, row in df_lunar_transportation_shed.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"LunarTrasportationShed_{row.name+1}"
-            tag = row.get("Tag","")
-            x = row.get("Corner_x",0.0)
-            y = row.get("Corner_y",0.0)
-            length = row.get("Length",0.0)
-            width = row.get("Width",0.0)
-            # Create a LunarTrasportationShed instance
-            lts = LunarTransportationShed(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['LunarTransportationSheds'].append(lts)
-
-# 10) Parse the "ClearanceAreas" sheet
-    if "ClearanceAreas" in xls.keys():
-        df_clearance_area = xls["ClearanceAreas"]
-        for _, row in df_clearance_area.iterrows():
-            # Extract columns. Example column names:
-            # "ID", "Tag", "X", "Y", ...
-            elem_id = f"ClearanceArea_{row.name+1}"
-            tag = row.get("Tag","")
-            x = row.get("Corner_x",0.0)
-            y = row.get("Corner_y",0.0)
-            length = row.get("Length",0.0)
-            width = row.get("Width",0.0)
-            # Create a ClearanceArea instance
-            ca = ClearanceArea(
-                element_id=elem_id,
-                tag=tag,
-                x_coord=x,
-                y_coord=y,
-                length=length,
-                width=width
-                # pass extra **kwargs if needed
-            )
-            environment_data['ClearanceAreas'].append(ca)
-# 11) Parse the "InternalRobotTracks" sheet
-
-    if "InternalRobotTracks" in xls.keys():
-        df_internal_robot_track = xls["InternalRobotTracks"]
-         # Extract lines where Straight is True
-        line_rows = df_internal_robot_track[df_internal_robot_track['Note'] == 'Straight']
-        lines = [
-            ((row['X1'] , row['Y1'] ),
-            (row['X2'] , row['Y2'] ))
-            for _, row in line_rows.iterrows()
-        ]
-
-        # Extract rectangles where Identification is Rect
-        rect_rows = df_internal_robot_track[df_internal_robot_track['Note'] == 'Rect']
-        rects = [
-            (row['X1'] ,
-            row['Y1'] ,
-            (row['X2']) ,
-            (row['Y2']))
-            for _, row in rect_rows.iterrows()
-        ]
-
-        irt= InternalRobotTrack(
-            element_id="InternalRobotTrack_1",
-            tag="InternalRobotTrack",
-            lines=lines,
-            rects=rects
-        )
-
-    environment_data['InternalRobotTracks'].append(irt)
+    xls = read_workbook(workbook_path)
+    tables = load_environment_columns(workbook_path, xls)
+    # Container to store environment objects keyed by their sheet names
+    environment_data = {sheet_name: [] for sheet_name in xls}
+    # All elements are views over one EnvironmentTable, also returned under 'EnvironmentTable'
+    table, elements = build_environment_table(tables)
+    environment_data.update(elements)
+    environment_data['EnvironmentTable'] = table
+    if TRACK_SHEET in tables:
+        environment_data[TRACK_SHEET].extend(build_tracks(tables[TRACK_SHEET]))
 
     # Return the dictionary containing all environment objects
     return environment_data
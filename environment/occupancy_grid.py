@@ -0,0 +1,265 @@
+import hashlib
+import os
+import numpy as np
+
+from .track_rasterizer import rasterize_track, geometry_hash, DEFAULT_RESOLUTION_MM, WORLD_WIDTH_MM, WORLD_HEIGHT_MM
+
+"""
+Layered occupancy grid of the whole lunar base.
+
+Every environment class becomes one channel of a grid covering the base at a fixed cell
+size, plus one channel for the internal robot tracks. A channel holds, per cell, the
+number of elements of that class covering the cell, so elements can be removed again
+exactly when they move or disappear: `refresh()` re-rasterizes only the elements whose
+geometry changed (and rebuilds the grid when a new element class appears). Built grids
+are cached on disk, keyed by the geometry they were built from; only the latest one is
+kept.
+
+Same cell convention as the track maps: grids are indexed [y, x] with row 0 at world
+y = 0, and cell (x, y) covers [x * resolution, (x + 1) * resolution) in mm.
+"""
+
+# Bump when the rasterization changes, to invalidate the cached grids
+OCCUPANCY_GRID_VERSION = 1
+TRACK_LAYER = 'InternalRobotTrack'
+# Travel cost of each layer for ground vehicles (inf = impassable); cells outside every
+# layer cost GROUND_COST and overlapping layers take the highest cost
+LAYER_COSTS = {
+    'InternalRobotTrack': 1.0,
+    'PavedRoad': 1.0,
+    'SuperadobePath': 2.0,
+    'LoadingDock': 2.0,
+    'ClearanceArea': 5.0,
+    'HumanQuitArea': 20.0,
+    'Superadobe': np.inf,
+    'PressurizedModule': np.inf,
+    'ControlTower': np.inf,
+    'CommunicationCenter': np.inf,
+    'LunarTransportationShed': np.inf,
+}
+GROUND_COST = 3.0
+
+
+def _footprint(x_coord, y_coord, length, width, radius, resolution, shape):
+    """
+    Return (row slice, column slice, mask) of the cells whose centers lie inside a shape.
+
+    Round shapes (radius not NaN) are centered on (x_coord, y_coord); the others are the
+    rectangle [x_coord, x_coord + length] x [y_coord, y_coord + width].
+    """
+    height, width_cells = shape
+    round_shape = not np.isnan(radius)
+    if round_shape:
+        min_x, min_y, max_x, max_y = x_coord - radius, y_coord - radius, x_coord + radius, y_coord + radius
+    else:
+        min_x, min_y = x_coord, y_coord
+        max_x, max_y = x_coord + np.nan_to_num(length), y_coord + np.nan_to_num(width)
+    if not np.isfinite([min_x, min_y, max_x, max_y]).all():
+        return None
+    col_min = max(int(np.floor(min_x / resolution - 0.5)), 0)
+    col_max = min(int(np.ceil(max_x / resolution - 0.5)), width_cells - 1)
+    row_min = max(int(np.floor(min_y / resolution - 0.5)), 0)
+    row_max = min(int(np.ceil(max_y / resolution - 0.5)), height - 1)
+    if col_min > col_max or row_min > row_max:
+        return None
+    cx = (np.arange(col_min, col_max + 1) + 0.5) * resolution
+    cy = (np.arange(row_min, row_max + 1) + 0.5) * resolution
+    if round_shape:
+        mask = (cx[None, :] - x_coord) ** 2 + (cy[:, None] - y_coord) ** 2 <= radius * radius
+    else:
+        mask = ((cx >= min_x) & (cx <= max_x))[None, :] & ((cy >= min_y) & (cy <= max_y))[:, None]
+    return slice(row_min, row_max + 1), slice(col_min, col_max + 1), mask
+
+
+class OccupancyGrid:
+    """Multi-channel occupancy counts of the environment elements and robot tracks."""
+
+    def __init__(self, table, tracks=(), resolution=DEFAULT_RESOLUTION_MM,
+                 world_size=(WORLD_WIDTH_MM, WORLD_HEIGHT_MM)):
+        """
+        Parameters:
+        - table (EnvironmentTable): Elements to rasterize, one channel per element class.
+        - tracks (List[InternalRobotTrack]): Robot tracks, rasterized into the track channel.
+        - resolution (float): Cell size in mm.
+        - world_size (tuple): (width, height) of the base in mm.
+        """
+        self.table = table
+        self.tracks = list(tracks)
+        self.resolution = float(resolution)
+        self.world_size = tuple(world_size)
+        self.shape = (int(np.ceil(world_size[1] / resolution)), int(np.ceil(world_size[0] / resolution)))
+        self._allocate_layers()
+        # element_id -> (channel, x_coord, y_coord, length, width, radius) as last rasterized
+        self._rasterized = {}
+
+    def _allocate_layers(self):
+        """Create one empty channel per element class of the table, plus the track channel."""
+        self.layers = tuple(element_class.__name__ for element_class in self.table.classes) + (TRACK_LAYER,)
+        self.counts = np.zeros((len(self.layers),) + self.shape, dtype=np.uint16)
+
+    def _geometry(self, table, row):
+        return (int(self.layers.index(table.classes[table.class_ids[row]].__name__)),
+                float(table.x_coord[row]), float(table.y_coord[row]), float(table.length[row]),
+                float(table.width[row]), float(table.radius[row]))
+
+    def _add(self, geometry, amount):
+        channel, x_coord, y_coord, length, width, radius = geometry
+        footprint = _footprint(x_coord, y_coord, length, width, radius, self.resolution, self.shape)
+        if footprint is not None:
+            rows, columns, mask = footprint
+            if amount > 0:
+                self.counts[channel, rows, columns] += mask
+            else:
+                self.counts[channel, rows, columns] -= mask
+
+    def build(self):
+        """Rasterize every element and track from scratch and return the grid."""
+        self.counts[:] = 0
+        self._rasterized = {}
+        table = self.table
+        for row, element_id in enumerate(table.element_ids.tolist()):
+            geometry = self._geometry(table, row)
+            self._add(geometry, 1)
+            self._rasterized[element_id] = geometry
+        self._rasterize_tracks()
+        return self
+
+    def _rasterize_tracks(self):
+        track_channel = self.layers.index(TRACK_LAYER)
+        self.counts[track_channel] = 0
+        for track in self.tracks:
+            track_map = rasterize_track(track.lines, track.rects, self.resolution, track.line_width, self.world_size)
+            self.counts[track_channel] += track_map
+
+    def refresh(self, table=None, tracks=None):
+        """
+        Re-rasterize only the elements that were added, removed or changed.
+
+        Parameters:
+        - table (EnvironmentTable): New table of the environment (e.g. after reloading the
+          workbook), matched to the rasterized elements by element_id. Defaults to the
+          current table, for elements whose geometry was edited in place.
+        - tracks (List[InternalRobotTrack]): New robot tracks; the track channel is only
+          rebuilt when they are given.
+
+        Returns:
+        - List[str]: IDs of the elements that were re-rasterized.
+        """
+        table = self.table if table is None else table
+        if any(element_class.__name__ not in self.layers for element_class in table.classes):
+            # A class without a channel (e.g. a sheet that gained its first element): rebuild
+            # the grid with one channel per class of the new table
+            self.table = table
+            if tracks is not None:
+                self.tracks = list(tracks)
+            self._allocate_layers()
+            self.build()
+            return table.element_ids.tolist()
+        current = {element_id: self._geometry(table, row) for row, element_id in enumerate(table.element_ids.tolist())}
+        changed = {}  # Dictionary used as an ordered set
+        for element_id, geometry in self._rasterized.items():
+            new_geometry = current.get(element_id)
+            if new_geometry is None or not np.allclose(new_geometry, geometry, equal_nan=True):
+                self._add(geometry, -1)
+                changed[element_id] = None
+        for element_id, geometry in current.items():
+            if element_id not in self._rasterized or element_id in changed:
+                self._add(geometry, 1)
+                changed[element_id] = None
+        self._rasterized = current
+        self.table = table
+        if tracks is not None:
+            self.tracks = list(tracks)
+            self._rasterize_tracks()
+        return list(changed)
+
+    def layer(self, name):
+        """Return the boolean occupancy of one layer, indexed [y, x]."""
+        return self.counts[self.layers.index(name)] > 0
+
+    def cost_map(self, costs=None, ground_cost=GROUND_COST):
+        """
+        Combine the layers into a travel cost grid.
+
+        Parameters:
+        - costs (dict): Layer name -> cost, defaults to LAYER_COSTS (layers missing from it are ignored).
+        - ground_cost (float): Cost of cells outside every layer.
+
+        Returns:
+        - numpy.ndarray: float32 costs indexed [y, x], inf where impassable.
+        """
+        costs = LAYER_COSTS if costs is None else costs
+        cost = np.full(self.shape, -np.inf, dtype=np.float32)
+        for index, name in enumerate(self.layers):
+            if name in costs:
+                np.maximum(cost, np.where(self.counts[index] > 0, np.float32(costs[name]), np.float32(-np.inf)), out=cost)
+        cost[np.isneginf(cost)] = ground_cost
+        return cost
+
+    def query(self, points, name=None):
+        """
+        Look up world points in mm.
+
+        Parameters:
+        - points (array-like): (m, 2) world points.
+        - name (str): Layer to query, or None for all layers.
+
+        Returns:
+        - numpy.ndarray: (m,) booleans for one layer, or (m, layers) for all layers.
+          Points outside the grid are never occupied.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        cells = np.floor(points / self.resolution).astype(np.int64)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < self.shape[1]) & (cells[:, 1] >= 0) & (cells[:, 1] < self.shape[0])
+        cells = np.where(inside[:, None], cells, 0)
+        channels = self.counts[:, cells[:, 1], cells[:, 0]].T > 0
+        channels &= inside[:, None]
+        return channels if name is None else channels[:, self.layers.index(name)]
+
+    def cache_key(self):
+        """Return a hash of everything the grid is built from."""
+        digest = hashlib.sha1()
+        table = self.table
+        digest.update(repr((OCCUPANCY_GRID_VERSION, self.resolution, self.world_size, self.layers)).encode())
+        digest.update('\0'.join(map(str, table.element_ids.tolist())).encode())
+        digest.update(table.class_ids.tobytes())
+        for field in ('x_coord', 'y_coord', 'length', 'width', 'radius'):
+            digest.update(getattr(table, field).tobytes())
+        for track in self.tracks:
+            digest.update(f"{geometry_hash(track.lines, track.rects)}:{track.line_width}".encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def load_or_build(cls, table, tracks=(), resolution=DEFAULT_RESOLUTION_MM, cache_dir='data/cache'):
+        """
+        Return the grid of an environment, loading it from the disk cache when it was built before.
+
+        Parameters:
+        - table (EnvironmentTable): Elements to rasterize.
+        - tracks (List[InternalRobotTrack]): Robot tracks.
+        - resolution (float): Cell size in mm.
+        - cache_dir (str): Directory of the cached grids.
+
+        Returns:
+        - OccupancyGrid: The grid, ready for queries and `refresh()`.
+        """
+        grid = cls(table, tracks, resolution)
+        path = os.path.join(cache_dir, f"occupancy_{grid.cache_key()[:16]}.npz")
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                if cached['counts'].shape == grid.counts.shape:
+                    grid.counts[:] = cached['counts']
+                    grid._rasterized = {element_id: grid._geometry(table, row)
+                                        for row, element_id in enumerate(table.element_ids.tolist())}
+                    return grid
+        grid.build()
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(temporary_path, counts=grid.counts)
+        os.replace(temporary_path, path)
+        # Grids of earlier versions of the environment are never used again
+        for file_name in os.listdir(cache_dir):
+            stale_path = os.path.join(cache_dir, file_name)
+            if file_name.startswith('occupancy_') and file_name.endswith('.npz') and stale_path != path:
+                os.remove(stale_path)
+        return grid
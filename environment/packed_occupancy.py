@@ -0,0 +1,95 @@
+import io
+import struct
+import numpy as np
+
+"""
+Bit-packed occupancy maps.
+
+A `PackedOccupancy` stores a binary map (indexed [y, x], occupied/walkable where > 0) with
+one bit per cell, each row packed into bytes with `numpy.packbits`: 8 times smaller than
+a uint8 map and 64 times smaller than an int64 one. Planners can query cells directly on
+the bits, or unpack the whole map on demand. The serialized form is a small header (magic,
+version, height, width) followed by the packed rows, and is what the database stores.
+"""
+
+PACKED_MAGIC = b'LBOC'
+PACKED_VERSION = 1
+_HEADER = struct.Struct('<4sBII')  # magic, version, height, width
+_NPY_MAGIC = b'\x93NUMPY'
+
+
+class PackedOccupancy:
+    """Binary map with one bit per cell."""
+    __slots__ = ('shape', 'bits')
+
+    def __init__(self, bits, shape):
+        """
+        Parameters:
+        - bits (numpy.ndarray): uint8 array of shape (height, ceil(width / 8)), rows packed
+          with `numpy.packbits` (most significant bit first).
+        - shape (tuple): (height, width) of the map in cells.
+        """
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.bits = np.ascontiguousarray(bits, dtype=np.uint8).reshape(self.shape[0], (self.shape[1] + 7) // 8)
+
+    @classmethod
+    def from_array(cls, array):
+        """Pack a 2-D map, cells > 0 become set bits."""
+        array = np.asarray(array)
+        if array.ndim != 2:
+            raise ValueError(f"Expected a 2-D map, got shape {array.shape}.")
+        return cls(np.packbits(array > 0, axis=1), array.shape)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        """Read a map serialized with `to_bytes`, or a legacy `.npy` map."""
+        blob = bytes(blob)
+        if blob.startswith(_NPY_MAGIC):
+            return cls.from_array(np.load(io.BytesIO(blob)))
+        magic, version, height, width = _HEADER.unpack_from(blob)
+        if magic != PACKED_MAGIC or version != PACKED_VERSION:
+            raise ValueError(f"Not a packed occupancy map (magic {magic!r}, version {version}).")
+        bits = np.frombuffer(blob, dtype=np.uint8, offset=_HEADER.size)
+        return cls(bits, (height, width))
+
+    def to_bytes(self):
+        """Serialize the map: header followed by the packed rows."""
+        return _HEADER.pack(PACKED_MAGIC, PACKED_VERSION, *self.shape) + self.bits.tobytes()
+
+    @property
+    def nbytes(self):
+        """Size of the packed bits in bytes."""
+        return self.bits.nbytes
+
+    def unpack(self, dtype=np.uint8):
+        """Return the map as a (height, width) array of 0 and 1."""
+        return np.unpackbits(self.bits, axis=1, count=self.shape[1]).astype(dtype, copy=False)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.unpack(np.uint8 if dtype is None else dtype)
+
+    def walkable(self, x, y):
+        """
+        Query cells directly on the bits.
+
+        Parameters:
+        - x, y (int or array-like): Cell coordinates.
+
+        Returns:
+        - bool or numpy.ndarray: True where the cell is set; cells off the map are False.
+        """
+        x, y = np.asarray(x, dtype=np.int64), np.asarray(y, dtype=np.int64)
+        inside = (x >= 0) & (x < self.shape[1]) & (y >= 0) & (y < self.shape[0])
+        xs, ys = np.where(inside, x, 0), np.where(inside, y, 0)
+        result = inside & (((self.bits[ys, xs >> 3] >> (7 - (xs & 7))) & 1) == 1)
+        return bool(result) if result.ndim == 0 else result
+
+    def count(self):
+        """Return the number of set cells."""
+        return int(np.unpackbits(self.bits, axis=1, count=self.shape[1]).sum())
+
+    def __eq__(self, other):
+        return isinstance(other, PackedOccupancy) and self.shape == other.shape and np.array_equal(self.bits, other.bits)
+
+    def __repr__(self):
+        return f"<PackedOccupancy {self.shape[1]}x{self.shape[0]} cells, {self.nbytes} bytes>"
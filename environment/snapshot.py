@@ -0,0 +1,120 @@
+import hashlib
+import os
+import pickle
+
+"""
+Compiled snapshot of the lunar base environment.
+
+Parsing the workbook with pandas dominates the start-up time of the simulation. After the
+first load, the environment objects (without the robot track maps, which are rasterized
+again on first use) are pickled to `data/cache`, and later starts load that snapshot
+instead. A snapshot is only used when it was built from a workbook with the same content
+hash and with the same SNAPSHOT_VERSION, so editing the workbook or changing the element
+classes (bump the version) rebuilds it automatically.
+"""
+
+# Bump when the environment classes, the loader or the track rasterizer change
+SNAPSHOT_VERSION = 6
+SNAPSHOT_DIR = 'data/cache'
+
+
+def workbook_hash(workbook_path):
+    """Return the SHA-256 hex digest of the workbook's content."""
+    digest = hashlib.sha256()
+    with open(workbook_path, 'rb') as workbook:
+        for chunk in iter(lambda: workbook.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _snapshot_prefix(workbook_path):
+    return f"{os.path.splitext(os.path.basename(workbook_path))[0]}_"
+
+
+def snapshot_path(workbook_path, content_hash, cache_dir=SNAPSHOT_DIR):
+    """Return the snapshot file of a workbook (named after the workbook and its content hash)."""
+    return os.path.join(cache_dir, f"{_snapshot_prefix(workbook_path)}{content_hash[:16]}.pkl")
+
+
+def _read_snapshot(path, content_hash):
+    """Return the environment stored in a snapshot file, or None if it is missing, stale or unreadable."""
+    try:
+        with open(path, 'rb') as snapshot_file:
+            snapshot = pickle.load(snapshot_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError) as error:
+        # Truncated files and pickles of other classes or versions fail in many ways
+        print(f"Ignoring unreadable environment snapshot {path}: {error}")
+        return None
+    if not isinstance(snapshot, dict):
+        print(f"Ignoring unreadable environment snapshot {path}: not an environment snapshot")
+        return None
+    if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('workbook_hash') != content_hash:
+        return None
+    return snapshot.get('environment')
+
+
+def save_snapshot(environment_data, workbook_path, cache_dir=SNAPSHOT_DIR, content_hash=None):
+    """
+    Write the snapshot of an environment loaded from a workbook.
+
+    Parameters:
+    - environment_data (dict): Environment as returned by `load_environment_from_excel`.
+    - workbook_path (str): Workbook the environment was loaded from.
+    - cache_dir (str): Directory of the snapshot files.
+    - content_hash (str): Hash of the workbook, computed when not given.
+
+    Returns:
+    - str: Path of the snapshot file.
+    """
+    if content_hash is None:
+        content_hash = workbook_hash(workbook_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    path = snapshot_path(workbook_path, content_hash, cache_dir)
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'workbook_hash': content_hash,
+        'environment': environment_data,
+    }
+    # Write to a temporary file first so a crash never leaves a truncated snapshot behind
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as snapshot_file:
+        pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+    # Snapshots of earlier versions of the workbook can never be used again
+    prefix = _snapshot_prefix(workbook_path)
+    for file_name in os.listdir(cache_dir):
+        stale_path = os.path.join(cache_dir, file_name)
+        if file_name.startswith(prefix) and file_name.endswith('.pkl') and stale_path != path:
+            os.remove(stale_path)
+    return path
+
+
+def load_environment(workbook_path='data/LunarBase.xlsx', cache_dir=SNAPSHOT_DIR, use_snapshot=True):
+    """
+    Load the environment from its snapshot, or from the workbook when there is no valid snapshot.
+
+    Parameters:
+    - workbook_path (str): Path of the environment workbook.
+    - cache_dir (str): Directory of the snapshot files.
+    - use_snapshot (bool): Set to False to always parse the workbook (the snapshot is still refreshed).
+
+    Returns:
+    - dict: Lists of environment objects keyed by sheet name, as `load_environment_from_excel`.
+    """
+    content_hash = workbook_hash(workbook_path)
+    path = snapshot_path(workbook_path, content_hash, cache_dir)
+    if use_snapshot:
+        environment_data = _read_snapshot(path, content_hash)
+        if environment_data is not None:
+            print(f"Environment loaded from snapshot {path}.")
+            return environment_data
+    # Imported here so that loading a snapshot does not pay for importing pandas
+    from environment.loader import load_environment_from_excel
+    environment_data = load_environment_from_excel(workbook_path)
+    try:
+        save_snapshot(environment_data, workbook_path, cache_dir, content_hash)
+    except OSError as error:
+        print(f"Could not write the environment snapshot: {error}")
+    return environment_data
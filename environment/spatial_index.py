@@ -0,0 +1,204 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+"""
+Spatial indexes for the lunar base environment.
+
+- ElementIndex answers batched queries over the elements of an `EnvironmentTable`:
+  which elements contain a point (uniform grid over the element bounds, exact shape
+  test on the candidates), which overlap a box, and the nearest elements or the elements
+  within a radius of a point (KD-trees over the element centers, one per class).
+- TrackCellIndex answers nearest-cell and radius queries over the walkable cells of a
+  track map (KD-tree over the cell coordinates).
+
+All queries take an (m, 2) array of points and answer for every point at once.
+"""
+
+
+def _expand_ranges(starts, counts):
+    """Return the concatenation of range(start, start + count) for all pairs, vectorized."""
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.intp)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + (np.arange(total) - offsets)
+
+
+class ElementIndex:
+    """
+    Spatial index over the elements of an EnvironmentTable (world coordinates in mm).
+
+    The index is a snapshot of the table geometry: rebuild it after elements move.
+    """
+
+    def __init__(self, table, cell_size=None):
+        """
+        Parameters:
+        - table (EnvironmentTable): Elements to index.
+        - cell_size (float): Size of the grid cells in mm, defaults to the median element extent.
+        """
+        self.table = table
+        bounds = table.bounds()
+        self._valid = np.all(np.isfinite(bounds), axis=1)  # Elements with incomplete geometry are never returned
+        valid_bounds = bounds[self._valid]
+        if cell_size is None:
+            extents = np.maximum(valid_bounds[:, 2] - valid_bounds[:, 0], valid_bounds[:, 3] - valid_bounds[:, 1])
+            cell_size = float(np.median(extents)) if len(extents) else 1.0
+        self.cell_size = max(cell_size, 1e-6)
+        self.origin = valid_bounds[:, :2].min(axis=0) if len(valid_bounds) else np.zeros(2)
+        self._build_grid(np.nonzero(self._valid)[0], valid_bounds)
+        self._trees = {}  # class name (or None for all classes) -> (cKDTree, rows)
+
+    def _cells(self, points):
+        """Return the (col, row) grid cells of world points."""
+        return np.floor((np.asarray(points, dtype=np.float64) - self.origin) / self.cell_size).astype(np.int64)
+
+    def _build_grid(self, rows, bounds):
+        low = self._cells(bounds[:, :2])
+        high = self._cells(bounds[:, 2:])
+        self.grid_shape = (high.max(axis=0) + 1) if len(rows) else np.ones(2, dtype=np.int64)
+        widths = high[:, 0] - low[:, 0] + 1
+        counts = widths * (high[:, 1] - low[:, 1] + 1)
+        # Register every element in every grid cell its bounds overlap
+        local = _expand_ranges(np.zeros(len(rows), dtype=np.int64), counts)
+        repeated_widths = np.repeat(widths, counts)
+        cell_x = np.repeat(low[:, 0], counts) + local % repeated_widths
+        cell_y = np.repeat(low[:, 1], counts) + local // repeated_widths
+        cell_ids = cell_y * self.grid_shape[0] + cell_x
+        order = np.argsort(cell_ids, kind='stable')
+        self._cell_rows = np.repeat(rows, counts)[order]  # Element rows grouped by grid cell
+        self._cell_start = np.searchsorted(cell_ids[order], np.arange(int(np.prod(self.grid_shape)) + 1))
+
+    def _candidates(self, points):
+        """Return (point index, element row) pairs of the elements registered in each point's grid cell."""
+        cells = self._cells(points)
+        inside = np.all((cells >= 0) & (cells < self.grid_shape), axis=1)
+        cell_ids = np.where(inside, cells[:, 1] * self.grid_shape[0] + cells[:, 0], 0)
+        starts = self._cell_start[cell_ids]
+        counts = np.where(inside, self._cell_start[cell_ids + 1] - starts, 0)
+        point_index = np.repeat(np.arange(len(points)), counts)
+        return point_index, self._cell_rows[_expand_ranges(starts, counts)]
+
+    def containing(self, points):
+        """
+        Return the elements containing each point.
+
+        Parameters:
+        - points (array-like): (m, 2) world points in mm.
+
+        Returns:
+        - List[numpy.ndarray]: Table rows of the elements containing each point.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        point_index, rows = self._candidates(points)
+        table = self.table
+        x, y = points[point_index, 0], points[point_index, 1]
+        in_box = (table.min_x[rows] <= x) & (x <= table.max_x[rows]) & (table.min_y[rows] <= y) & (y <= table.max_y[rows])
+        radius = table.radius[rows]
+        in_circle = (table.x_coord[rows] - x) ** 2 + (table.y_coord[rows] - y) ** 2 <= radius ** 2
+        hit = in_box & (np.isnan(radius) | in_circle)
+        return np.split(rows[hit], np.cumsum(np.bincount(point_index[hit], minlength=len(points)))[:-1])
+
+    def overlapping(self, min_x, min_y, max_x, max_y):
+        """Return the table rows of the elements whose bounds overlap a box."""
+        low = np.clip(self._cells([[min_x, min_y]])[0], 0, self.grid_shape - 1)
+        high = np.clip(self._cells([[max_x, max_y]])[0], 0, self.grid_shape - 1)
+        columns = np.arange(low[0], high[0] + 1)
+        cell_ids = (np.arange(low[1], high[1] + 1)[:, None] * self.grid_shape[0] + columns).ravel()
+        starts = self._cell_start[cell_ids]
+        rows = np.unique(self._cell_rows[_expand_ranges(starts, self._cell_start[cell_ids + 1] - starts)])
+        table = self.table
+        overlap = ((table.min_x[rows] <= max_x) & (min_x <= table.max_x[rows])
+                   & (table.min_y[rows] <= max_y) & (min_y <= table.max_y[rows]))
+        return rows[overlap]
+
+    def _tree(self, element_class):
+        """Return the KD-tree over the centers of one class (all classes for None) and its table rows."""
+        key = element_class if element_class is None or isinstance(element_class, str) else element_class.__name__
+        if key not in self._trees:
+            rows = np.nonzero(self._valid)[0] if key is None else self.table.class_rows(key)
+            rows = rows[self._valid[rows]]
+            self._trees[key] = (cKDTree(self.table.centers(rows)) if len(rows) else None, rows)
+        return self._trees[key]
+
+    def nearest(self, points, element_class=None, k=1):
+        """
+        Find the elements whose centers are nearest to each point.
+
+        Parameters:
+        - points (array-like): (m, 2) world points in mm.
+        - element_class (type or str): Only consider this class, e.g. 'Superadobe'.
+        - k (int): Number of neighbours per point.
+
+        Returns:
+        - tuple: (distances, rows), each of shape (m,) for k=1 or (m, k). Missing
+          neighbours have distance inf and row -1.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        tree, rows = self._tree(element_class)
+        shape = (len(points),) if k == 1 else (len(points), k)
+        if tree is None:
+            return np.full(shape, np.inf), np.full(shape, -1)
+        distances, index = tree.query(points, k=k)
+        return distances, np.where(index < len(rows), rows[np.minimum(index, len(rows) - 1)], -1)
+
+    def within_radius(self, points, radius, element_class=None):
+        """
+        Find the elements whose centers are within a radius of each point.
+
+        Parameters:
+        - points (array-like): (m, 2) world points in mm.
+        - radius (float): Search radius in mm.
+        - element_class (type or str): Only consider this class.
+
+        Returns:
+        - List[numpy.ndarray]: Table rows for each point, sorted by distance.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        tree, rows = self._tree(element_class)
+        if tree is None:
+            return [np.empty(0, dtype=np.intp) for _ in points]
+        result = []
+        for point, neighbours in zip(points, tree.query_ball_point(points, radius)):
+            neighbours = np.asarray(neighbours, dtype=np.intp)
+            distances = np.hypot(*(tree.data[neighbours] - point).T)
+            result.append(rows[neighbours[np.argsort(distances, kind='stable')]])
+        return result
+
+
+class TrackCellIndex:
+    """KD-tree over the walkable cells of a track map (map indexed [y, x], walkable where > 0)."""
+
+    def __init__(self, track_map):
+        """
+        Parameters:
+        - track_map (numpy.ndarray): Track map of the robots.
+        """
+        self.cells = np.argwhere(np.asarray(track_map) > 0)[:, ::-1].copy()  # (n, 2) walkable (x, y) cells
+        self.tree = cKDTree(self.cells) if len(self.cells) else None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def nearest(self, points):
+        """
+        Find the walkable cell nearest to each point.
+
+        Parameters:
+        - points (array-like): (m, 2) points in cell coordinates (x, y), may be fractional.
+
+        Returns:
+        - tuple: ((m, 2) int array of (x, y) cells, (m,) distances in cells).
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if self.tree is None:
+            raise ValueError("The track map has no walkable cells.")
+        distances, index = self.tree.query(points)
+        return self.cells[index], distances
+
+    def within_radius(self, points, radius):
+        """Return the (k, 2) walkable cells within `radius` cells of each point."""
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if self.tree is None:
+            return [np.empty((0, 2), dtype=self.cells.dtype) for _ in points]
+        return [self.cells[np.asarray(neighbours, dtype=np.intp)] for neighbours in self.tree.query_ball_point(points, radius)]
@@ -0,0 +1,113 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+"""
+Headless rasterizer for the internal robot tracks.
+
+Track lines and rectangle outlines (in mm) are drawn into a binary occupancy map with a
+fixed cell size, using plain NumPy: a cell is part of the track when its center lies
+within half the line width of a track segment. The result does not depend on the display
+and no pygame window is needed.
+
+Map convention (same as the planners): the map is indexed [row, col] = [y, x] with
+row 0 at world y = 0 (rows grow upwards in the world), and a cell is walkable where > 0.
+"""
+
+# Extent of the lunar base drawing in mm
+WORLD_WIDTH_MM = 1571
+WORLD_HEIGHT_MM = 874
+# Default cell size and track line width in mm
+DEFAULT_RESOLUTION_MM = 3.0
+DEFAULT_LINE_WIDTH_MM = 6.0
+# ID of the track of workbook rows that do not name one
+DEFAULT_TRACK_ID = 'InternalRobotTrack_1'
+# Lines are at least this wide (in cells) so that diagonal tracks stay 4-connected
+MIN_HALF_WIDTH_CELLS = 0.75
+
+_raster_cache = OrderedDict()  # (geometry hash, resolution, line width) -> read-only map
+_MAX_CACHED_RASTERS = 16
+
+
+def world_to_cell(x_mm, y_mm, resolution=DEFAULT_RESOLUTION_MM):
+    """Return the (x, y) cell containing a world point in mm."""
+    return int(np.floor(x_mm / resolution)), int(np.floor(y_mm / resolution))
+
+
+def cell_to_world(x, y, resolution=DEFAULT_RESOLUTION_MM):
+    """Return the world position in mm of the center of an (x, y) cell."""
+    return (x + 0.5) * resolution, (y + 0.5) * resolution
+
+
+def rect_segments(rects):
+    """Return the outline segments ((x1, y1), (x2, y2)) of (x, y, w, h) rectangles."""
+    segments = []
+    for x, y, w, h in rects:
+        corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        segments.extend(zip(corners, corners[1:] + corners[:1]))
+    return segments
+
+
+def geometry_hash(lines, rects):
+    """Return a hash of the track geometry, used as part of the raster cache key."""
+    digest = hashlib.sha1()
+    digest.update(np.asarray(lines, dtype=np.float64).reshape(-1, 4).tobytes())
+    digest.update(b'|')
+    digest.update(np.asarray(rects, dtype=np.float64).reshape(-1, 4).tobytes())
+    return digest.hexdigest()
+
+
+def _draw_segment(grid, p1, p2, half_width, resolution):
+    """Mark every cell whose center is within half_width (mm) of the segment p1-p2."""
+    height, width = grid.shape
+    (x1, y1), (x2, y2) = p1, p2
+    # Only look at the cells in the bounding box of the thick segment
+    col_min = max(int(np.floor((min(x1, x2) - half_width) / resolution)), 0)
+    col_max = min(int(np.ceil((max(x1, x2) + half_width) / resolution)), width - 1)
+    row_min = max(int(np.floor((min(y1, y2) - half_width) / resolution)), 0)
+    row_max = min(int(np.ceil((max(y1, y2) + half_width) / resolution)), height - 1)
+    if col_min > col_max or row_min > row_max:
+        return
+    cx = (np.arange(col_min, col_max + 1) + 0.5) * resolution
+    cy = (np.arange(row_min, row_max + 1) + 0.5) * resolution
+    px, py = cx[None, :] - x1, cy[:, None] - y1
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = dx * dx + dy * dy
+    # Distance from each cell center to the closest point of the segment
+    t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0) if length_sq > 0 else 0.0
+    dist_sq = (px - t * dx) ** 2 + (py - t * dy) ** 2
+    grid[row_min:row_max + 1, col_min:col_max + 1] |= dist_sq <= half_width * half_width
+
+
+def rasterize_track(lines, rects, resolution=DEFAULT_RESOLUTION_MM, line_width=DEFAULT_LINE_WIDTH_MM,
+                    world_size=(WORLD_WIDTH_MM, WORLD_HEIGHT_MM)):
+    """
+    Rasterize track lines and rectangle outlines into an occupancy map.
+
+    Parameters:
+    - lines (List[tuple]): ((x1, y1), (x2, y2)) segments in mm.
+    - rects (List[tuple]): (x, y, w, h) rectangles in mm, only the outline is drawn.
+    - resolution (float): Cell size in mm.
+    - line_width (float): Track line width in mm.
+    - world_size (tuple): (width, height) of the world in mm.
+
+    Returns:
+    - numpy.ndarray: Read-only uint8 map indexed [y, x], 1 on the track. Maps are cached
+      per (geometry, resolution, line width), so copy the result before modifying it.
+    """
+    key = (geometry_hash(lines, rects), float(resolution), float(line_width), tuple(world_size))
+    if key in _raster_cache:
+        _raster_cache.move_to_end(key)
+        return _raster_cache[key]
+    width = int(np.ceil(world_size[0] / resolution))
+    height = int(np.ceil(world_size[1] / resolution))
+    grid = np.zeros((height, width), dtype=bool)
+    half_width = max(line_width / 2.0, MIN_HALF_WIDTH_CELLS * resolution)
+    for p1, p2 in list(lines) + rect_segments(rects):
+        _draw_segment(grid, p1, p2, half_width, resolution)
+    track_map = grid.astype(np.uint8)
+    track_map.setflags(write=False)
+    _raster_cache[key] = track_map
+    if len(_raster_cache) > _MAX_CACHED_RASTERS:
+        _raster_cache.popitem(last=False)
+    return track_map
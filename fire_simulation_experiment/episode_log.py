@@ -0,0 +1,308 @@
+import json
+import struct
+import zlib
+import matplotlib.pyplot as plt
+import numpy as np
+from field_archive import CHUNK_HEADER, FieldArchiveWriter, FieldArchiveReader, scan_chunks
+
+"""
+Record and replay of fire experiment episodes.
+
+`EpisodeRecorder` logs one frame per simulation step: the robot positions as moves relative
+to the previous frame, the remaining mass and status of every fire, and the events of the
+step (ignitions, extinguish calls) together with the random seed of the episode. The
+temperature and fire maps go to a field archive next to the log (`<path>.fields`).
+
+Frames are grouped into blocks of `keyframe_interval` frames (`flush()` may end a block
+early); every block starts with a keyframe holding the absolute robot positions, and the
+field archive uses the same chunk length and is flushed at the same frames, so both
+restart from absolute values together. `EpisodeReplayer` seeks to any frame by decoding
+one block of each file, and rebuilds it without running the fire physics again.
+
+Log layout:
+- header: magic, version, grid rows, grid columns, robots, fires, keyframe interval, seed
+- blocks: block header (magic, first frame, frame count, payload size) + zlib payload with
+  the step numbers (int64), the keyframe positions (int32), the moves (int16), the fire
+  masses (float32), the packed fire statuses and the events of the block as JSON
+"""
+
+LOG_MAGIC = b'EPLG'
+LOG_VERSION = 1
+BLOCK_MAGIC = b'EPBK'
+_HEADER = struct.Struct('<4sBIIIIIq')  # magic, version, rows, columns, robots, fires, keyframe interval, seed
+NO_SEED = -1
+
+
+class EpisodeRecorder:
+    """Writes the frames and events of an episode to a log and a field archive."""
+
+    def __init__(self, path, grid_size, num_robots, num_fires, seed=None, keyframe_interval=64,
+                 temperature_step=0.01):
+        """
+        Parameters:
+        - path (str): Log file, overwritten if it exists; the maps go to `path + '.fields'`.
+        - grid_size (tuple): (rows, columns) of the maps.
+        - num_robots (int): Number of robots of the episode.
+        - num_fires (int): Number of fire materials of the experiment.
+        - seed (int): Random seed the episode was started with.
+        - keyframe_interval (int): Frames per block; a replay decodes at most one block to seek.
+        - temperature_step (float): Quantization step of the recorded temperatures in °C.
+        """
+        self.path = path
+        self.grid_size = (int(grid_size[0]), int(grid_size[1]))
+        self.num_robots = int(num_robots)
+        self.num_fires = int(num_fires)
+        self.seed = seed
+        self.keyframe_interval = int(keyframe_interval)
+        self.frames = 0
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(LOG_MAGIC, LOG_VERSION, *self.grid_size, self.num_robots, self.num_fires,
+                                      self.keyframe_interval, NO_SEED if seed is None else int(seed)))
+        self.fields = FieldArchiveWriter(path + '.fields', self.grid_size, chunk_length=self.keyframe_interval,
+                                         temperature_step=temperature_step)
+        self._pending_events = []  # Events recorded since the last frame
+        self._reset_block()
+
+    def _reset_block(self):
+        self._steps, self._positions, self._masses, self._on, self._events = [], [], [], [], {}
+
+    def record_event(self, kind, *values):
+        """Record an event; it belongs to the next recorded frame."""
+        self._pending_events.append([kind, *[_plain(value) for value in values]])
+
+    def record_ignition(self, loc):
+        """Record the ignition of the material at loc (x, y)."""
+        self.record_event('ignite', loc[0], loc[1])
+
+    def record_extinguish(self, position, radius, power):
+        """Record an extinguish call of a robot at position (x, y)."""
+        self.record_event('extinguish', position[0], position[1], radius, power)
+
+    def record_frame(self, step, robot_positions, temperature, fire, fires):
+        """
+        Record the state at the end of a step.
+
+        Parameters:
+        - step (int): Simulation step.
+        - robot_positions (List[tuple]): (x, y) of every robot.
+        - temperature (numpy.ndarray): Temperature map (°C).
+        - fire (numpy.ndarray): Fire map.
+        - fires (List[Fire]): Fire materials, for their remaining mass and status.
+        """
+        positions = np.asarray(robot_positions, dtype=np.int32).reshape(self.num_robots, 2)
+        if len(fires) != self.num_fires:
+            raise ValueError(f"Expected {self.num_fires} fires, got {len(fires)}.")
+        if self._pending_events:
+            self._events[str(len(self._steps))] = self._pending_events
+            self._pending_events = []
+        self._steps.append(int(step))
+        self._positions.append(positions)
+        self._masses.append([fire.m_r for fire in fires])
+        self._on.append([fire.Status == "on" for fire in fires])
+        self.fields.append(temperature, fire, step)
+        self.frames += 1
+        if len(self._steps) == self.keyframe_interval:
+            self._write_block()
+
+    def _write_block(self):
+        if not self._steps:
+            return
+        positions = np.stack(self._positions)
+        moves = np.diff(positions, axis=0, prepend=positions[:1]).astype(np.int16)  # First row is zero
+        on = np.packbits(np.asarray(self._on, dtype=bool).reshape(len(self._steps), self.num_fires), axis=1)
+        payload = zlib.compress(np.asarray(self._steps, dtype=np.int64).tobytes() + positions[0].tobytes()
+                                + moves.tobytes() + np.asarray(self._masses, dtype=np.float32).tobytes()
+                                + on.tobytes() + json.dumps(self._events).encode())
+        first_frame = self.frames - len(self._steps)
+        self._file.write(CHUNK_HEADER.pack(BLOCK_MAGIC, first_frame, len(self._steps), len(payload)))
+        self._file.write(payload)
+        self._reset_block()
+
+    def flush(self):
+        """Write the pending frames as a (shorter) block and flush both files."""
+        self._write_block()
+        self.fields.flush()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            self.fields.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _plain(value):
+    """Convert NumPy scalars to Python numbers for JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class EpisodeFrame:
+    """State of an episode at one recorded frame."""
+
+    __slots__ = ('index', 'step', 'robot_positions', 'temperature', 'fire', 'fire_masses', 'fire_on', 'events')
+
+    def __init__(self, index, step, robot_positions, temperature, fire, fire_masses, fire_on, events):
+        self.index = index
+        self.step = step
+        self.robot_positions = robot_positions  # (robots, 2) int array of (x, y)
+        self.temperature = temperature
+        self.fire = fire
+        self.fire_masses = fire_masses
+        self.fire_on = fire_on
+        self.events = events  # [kind, values...] recorded during the step
+
+
+class EpisodeReplayer:
+    """Seeks and plays back an episode written by EpisodeRecorder."""
+
+    def __init__(self, path):
+        """
+        Parameters:
+        - path (str): Log file (the field archive is read from `path + '.fields'`).
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        magic, version, rows, columns, self.num_robots, self.num_fires, self.keyframe_interval, seed = _HEADER.unpack(
+            self._file.read(_HEADER.size))
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError(f"{path} is not an episode log (magic {magic!r}, version {version}).")
+        self.grid_size = (rows, columns)
+        self.seed = None if seed == NO_SEED else seed
+        self.fields = FieldArchiveReader(path + '.fields')
+        self._blocks = self._scan_blocks()  # (first frame, frame count, payload offset, payload size)
+        self._block_starts = np.array([block[0] for block in self._blocks], dtype=np.int64)
+        self._cached_block = None  # (block index, decoded block)
+        self._fig = None
+
+    def _scan_blocks(self):
+        """Read the block headers; a truncated last block is ignored."""
+        return scan_chunks(self._file, _HEADER.size, BLOCK_MAGIC)
+
+    def __len__(self):
+        # Frames present in both the log and the field archive
+        if not self._blocks:
+            return 0
+        first_frame, count = self._blocks[-1][:2]
+        return min(first_frame + count, len(self.fields))
+
+    def _decode_block(self, index):
+        """Return (steps, positions, masses, on, events) of one block, keeping the last decoded block."""
+        if self._cached_block is not None and self._cached_block[0] == index:
+            return self._cached_block[1]
+        _, count, offset, size = self._blocks[index]
+        self._file.seek(offset)
+        raw = zlib.decompress(self._file.read(size))
+        robots, fires = self.num_robots, self.num_fires
+        steps = np.frombuffer(raw, dtype=np.int64, count=count)
+        position = steps.nbytes
+        keyframe = np.frombuffer(raw, dtype=np.int32, count=robots * 2, offset=position).reshape(robots, 2)
+        position += keyframe.nbytes
+        moves = np.frombuffer(raw, dtype=np.int16, count=count * robots * 2, offset=position).reshape(count, robots, 2)
+        position += moves.nbytes
+        masses = np.frombuffer(raw, dtype=np.float32, count=count * fires, offset=position).reshape(count, fires)
+        position += masses.nbytes
+        packed_size = count * ((fires + 7) // 8)
+        packed = np.frombuffer(raw, dtype=np.uint8, count=packed_size, offset=position).reshape(count, -1)
+        position += packed_size
+        on = np.unpackbits(packed, axis=1, count=fires).astype(bool)
+        events = {int(key): value for key, value in json.loads(raw[position:].decode()).items()}
+        positions = keyframe + np.cumsum(moves, axis=0, dtype=np.int32)  # Rebuild every frame from the keyframe
+        block = (steps, positions, masses, on, events)
+        self._cached_block = (index, block)
+        return block
+
+    def frame(self, frame_index):
+        """
+        Return one frame.
+
+        Parameters:
+        - frame_index (int): Frame number (negative numbers count from the end).
+
+        Returns:
+        - EpisodeFrame: The recorded state.
+        """
+        if frame_index < 0:
+            frame_index += len(self)
+        if not 0 <= frame_index < len(self):
+            raise IndexError(f"Frame {frame_index} is not in the episode ({len(self)} frames).")
+        # Blocks are usually keyframe_interval frames long, but flush() writes shorter ones
+        index = int(np.searchsorted(self._block_starts, frame_index, side='right')) - 1
+        steps, positions, masses, on, events = self._decode_block(index)
+        local = frame_index - self._blocks[index][0]
+        _, temperature, fire = self.fields.frame(frame_index)
+        return EpisodeFrame(frame_index, int(steps[local]), positions[local], temperature, fire, masses[local],
+                            on[local], events.get(local, []))
+
+    def frames(self, start=0, stop=None, every=1):
+        """Yield the frames [start, stop), one in `every`."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for frame_index in range(start, stop, every):
+            yield self.frame(frame_index)
+
+    def __iter__(self):
+        return self.frames()
+
+    def events(self):
+        """Yield (frame index, step, event) for every recorded event."""
+        for index, (first_frame, _, _, _) in enumerate(self._blocks):
+            steps, _, _, _, events = self._decode_block(index)
+            for local in sorted(events):
+                for event in events[local]:
+                    yield first_frame + local, int(steps[local]), event
+
+    def visualize(self, frame_index, pause=0.001):
+        """
+        Draw one frame in the layout of FireExperiment.visualize (temperature, fire map with
+        the robots, fire material mass).
+        """
+        frame = self.frame(frame_index)
+        colors = ['red' if on else 'blue' for on in frame.fire_on]
+        if self._fig is None:
+            self._fig, self._axs = plt.subplots(1, 3, figsize=(18, 6))
+            self._im1 = self._axs[0].imshow(frame.temperature, cmap='jet', vmin=20, vmax=np.max(frame.temperature))
+            self._axs[0].set_title('Temperature Map')
+            plt.colorbar(self._im1, ax=self._axs[0])
+            self._im2 = self._axs[1].imshow(frame.fire, cmap='Reds', vmin=0, vmax=1)
+            self._axs[1].set_title('Fire Map')
+            plt.colorbar(self._im2, ax=self._axs[1])
+            self._robots, = self._axs[1].plot(frame.robot_positions[:, 0], frame.robot_positions[:, 1], 's',
+                                              color='green', markersize=6)
+            self._bar = self._axs[2].bar([f"M{i+1}" for i in range(self.num_fires)], frame.fire_masses, color=colors)
+            self._axs[2].set_title('Fire Material Mass')
+            self._axs[2].tick_params(axis='x', rotation=90)
+            plt.tight_layout()
+            plt.ion()
+            plt.show()
+        else:
+            self._im1.set_data(frame.temperature)
+            self._im1.set_clim(vmin=20, vmax=np.max(frame.temperature))
+            self._im2.set_data(frame.fire)
+            self._robots.set_data(frame.robot_positions[:, 0], frame.robot_positions[:, 1])
+            for bar, mass, color in zip(self._bar, frame.fire_masses, colors):
+                bar.set_height(mass)
+                bar.set_color(color)
+        self._fig.suptitle(f"Step: {frame.step}")
+        self._fig.canvas.draw_idle()
+        plt.pause(pause)
+
+    def play(self, start=0, stop=None, every=1, pause=0.001):
+        """Draw the frames [start, stop), one in `every`, as fast as matplotlib allows."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for frame_index in range(start, stop, every):
+            self.visualize(frame_index, pause)
+
+    def close(self):
+        self._file.close()
+        self.fields.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
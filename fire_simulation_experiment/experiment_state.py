@@ -0,0 +1,87 @@
+import random
+import numpy as np
+
+"""
+Snapshots of the complete state of a FireExperiment.
+
+A snapshot holds the temperature and fire maps, the state of every Fire (phase, mass,
+temperatures, histories) and AirCooling (timer, temperature), the step counter and the
+random number generator states. The maps are not copied: the experiment's location system
+freezes them and continues on a private copy (copy-on-write), so taking a snapshot costs
+the fire and cooler attributes only. Restoring and forking (see FireExperiment.restore and
+FireExperiment.fork) hand the same frozen maps to the experiment, which copies each map on
+its first access; many forks of one snapshot share the maps until they are simulated.
+"""
+
+
+def _freeze_object(obj):
+    """Return (class, attributes) of an object, with its lists and arrays as immutable copies."""
+    attributes, lists = {}, []
+    for name, value in vars(obj).items():
+        if isinstance(value, list):
+            attributes[name] = tuple(value)
+            lists.append(name)
+        elif isinstance(value, np.ndarray):
+            value = value.copy()
+            value.setflags(write=False)
+            attributes[name] = value
+        else:
+            attributes[name] = value
+    return type(obj), attributes, tuple(lists)
+
+
+def _thaw_object(state):
+    """Rebuild an object frozen by _freeze_object, with lists and arrays of its own."""
+    cls, attributes, lists = state
+    obj = cls.__new__(cls)
+    for name, value in attributes.items():
+        if name in lists:
+            value = list(value)
+        elif isinstance(value, np.ndarray):
+            value = value.copy()
+        setattr(obj, name, value)
+    return obj
+
+
+class ExperimentSnapshot:
+    """Immutable state of a FireExperiment at one step."""
+
+    def __init__(self, experiment, random_state=True):
+        """
+        Capture the state of an experiment.
+
+        Parameters:
+        - experiment (FireExperiment): The experiment.
+        - random_state (bool): Also capture the states of numpy.random and random, so a
+          restored experiment draws the same numbers.
+        """
+        self.grid_size = experiment.grid_size
+        self.max_steps = experiment.max_steps
+        self.step = experiment.step
+        self.temp, self.fire = experiment.location.share()
+        self.fires = tuple(_freeze_object(fire) for fire in experiment.fires)
+        self.coolers = tuple(_freeze_object(cooler) for cooler in experiment.coolers)
+        self.random_state = (np.random.get_state(), random.getstate()) if random_state else None
+
+    def restore(self, experiment, random_state=True):
+        """
+        Put an experiment (and its location system) back into the captured state.
+
+        Parameters:
+        - experiment (FireExperiment): Experiment to overwrite.
+        - random_state (bool): Also restore the random number generators, if they were captured.
+        """
+        experiment.grid_size = self.grid_size
+        experiment.max_steps = self.max_steps
+        experiment.step = self.step
+        experiment.location.use(self.temp, self.fire)
+        experiment.fires = [_thaw_object(state) for state in self.fires]
+        experiment.coolers = [_thaw_object(state) for state in self.coolers]
+        if random_state and self.random_state is not None:
+            np.random.set_state(self.random_state[0])
+            random.setstate(self.random_state[1])
+
+    @property
+    def nbytes(self):
+        """Bytes of the (shared) maps of the snapshot."""
+        return self.temp.nbytes + self.fire.nbytes
@@ -0,0 +1,212 @@
+import struct
+import zlib
+import numpy as np
+
+"""
+Chunked, compressed archive of the temperature and fire maps of a fire experiment.
+
+Frames are grouped into chunks of `chunk_length` consecutive frames. Inside a chunk the
+temperatures are quantized to multiples of `temperature_step` (°C) and stored as the
+first frame followed by frame-to-frame differences, which are mostly zero or tiny and
+compress very well; the fire maps are bit-packed. Every chunk is zlib-compressed and
+written behind a small header (first frame, frame count, size), so a reader finds any
+frame by reading the chunk headers only, and decompresses just the chunk it needs.
+
+File layout:
+- header: magic, version, grid rows, grid columns, chunk length, temperature step
+- chunks: chunk header (magic, first frame, frame count, payload size) + zlib payload
+  with the step numbers (int64), the quantized temperature deltas (int32) and the packed
+  fire maps of the chunk's frames
+"""
+
+ARCHIVE_MAGIC = b'FLDA'
+ARCHIVE_VERSION = 1
+CHUNK_MAGIC = b'CHNK'
+_HEADER = struct.Struct('<4sBIIId')  # magic, version, rows, columns, chunk length, temperature step
+CHUNK_HEADER = struct.Struct('<4sQIQ')  # magic, first frame, frame count, payload size
+
+
+def scan_chunks(file, offset, magic):
+    """
+    Read the chunk headers of a file (skipping the payloads); a truncated last chunk is ignored.
+
+    Parameters:
+    - file: Binary file object.
+    - offset (int): Position of the first chunk header (the size of the file header).
+    - magic (bytes): Magic of the chunk headers.
+
+    Returns:
+    - List[tuple]: (first frame, frame count, payload offset, payload size) of every chunk.
+    """
+    chunks = []
+    file.seek(0, 2)
+    end = file.tell()
+    while offset + CHUNK_HEADER.size <= end:
+        file.seek(offset)
+        chunk_magic, first_frame, count, size = CHUNK_HEADER.unpack(file.read(CHUNK_HEADER.size))
+        payload_offset = offset + CHUNK_HEADER.size
+        if chunk_magic != magic or payload_offset + size > end:
+            break
+        chunks.append((first_frame, count, payload_offset, size))
+        offset = payload_offset + size
+    return chunks
+
+
+class FieldArchiveWriter:
+    """Appends temperature and fire frames to an archive file."""
+
+    def __init__(self, path, grid_size, chunk_length=64, temperature_step=0.01, compression_level=6):
+        """
+        Parameters:
+        - path (str): Archive file, overwritten if it exists.
+        - grid_size (tuple): (rows, columns) of the maps.
+        - chunk_length (int): Number of frames per chunk.
+        - temperature_step (float): Quantization step of the temperatures in °C; stored
+          temperatures are within half a step of the simulated ones.
+        - compression_level (int): zlib compression level.
+        """
+        self.path = path
+        self.grid_size = (int(grid_size[0]), int(grid_size[1]))
+        self.chunk_length = int(chunk_length)
+        self.temperature_step = float(temperature_step)
+        self.compression_level = compression_level
+        self.frames = 0  # Frames written so far, including the pending ones
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, *self.grid_size, self.chunk_length,
+                                      self.temperature_step))
+        self._steps, self._temperatures, self._fires = [], [], []
+
+    def append(self, temperature, fire, step=None):
+        """
+        Add one frame.
+
+        Parameters:
+        - temperature (numpy.ndarray): Temperature map (°C).
+        - fire (numpy.ndarray): Fire map, burning where > 0.
+        - step (int): Simulation step of the frame, defaults to the frame number.
+        """
+        if temperature.shape != self.grid_size or fire.shape != self.grid_size:
+            raise ValueError(f"Expected maps of shape {self.grid_size}, got {temperature.shape} and {fire.shape}.")
+        self._steps.append(self.frames if step is None else int(step))
+        self._temperatures.append(np.rint(np.asarray(temperature) / self.temperature_step).astype(np.int32))
+        self._fires.append(np.packbits(np.asarray(fire) > 0, axis=1))
+        self.frames += 1
+        if len(self._steps) == self.chunk_length:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        if not self._steps:
+            return
+        quantized = np.stack(self._temperatures)
+        deltas = np.diff(quantized, axis=0, prepend=np.zeros((1,) + self.grid_size, dtype=np.int32))
+        payload = zlib.compress(np.asarray(self._steps, dtype=np.int64).tobytes() + deltas.tobytes()
+                                + np.stack(self._fires).tobytes(), self.compression_level)
+        first_frame = self.frames - len(self._steps)
+        self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, first_frame, len(self._steps), len(payload)))
+        self._file.write(payload)
+        self._steps, self._temperatures, self._fires = [], [], []
+
+    def flush(self):
+        """Write the pending frames as a (shorter) chunk and flush the file."""
+        self._write_chunk()
+        self._file.flush()
+
+    def close(self):
+        """Write the pending frames and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FieldArchiveReader:
+    """Random access and streaming reads of an archive written by FieldArchiveWriter."""
+
+    def __init__(self, path):
+        """
+        Parameters:
+        - path (str): Archive file.
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        magic, version, rows, columns, self.chunk_length, self.temperature_step = _HEADER.unpack(
+            self._file.read(_HEADER.size))
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError(f"{path} is not a field archive (magic {magic!r}, version {version}).")
+        self.grid_size = (rows, columns)
+        self._chunks = self._scan_chunks()  # (first frame, frame count, payload offset, payload size)
+        self._chunk_starts = np.array([chunk[0] for chunk in self._chunks], dtype=np.int64)
+        self._cached_chunk = None  # (chunk index, decoded chunk)
+        self.chunks_read = 0  # Number of chunks decompressed, to check that access stays local
+
+    def _scan_chunks(self):
+        return scan_chunks(self._file, _HEADER.size, CHUNK_MAGIC)
+
+    def __len__(self):
+        if not self._chunks:
+            return 0
+        first_frame, count = self._chunks[-1][:2]
+        return first_frame + count
+
+    def _decode_chunk(self, index):
+        """Return (steps, temperatures, fires) of one chunk, keeping the last decoded chunk."""
+        if self._cached_chunk is not None and self._cached_chunk[0] == index:
+            return self._cached_chunk[1]
+        _, count, offset, size = self._chunks[index]
+        self._file.seek(offset)
+        raw = zlib.decompress(self._file.read(size))
+        rows, columns = self.grid_size
+        packed_columns = (columns + 7) // 8
+        steps = np.frombuffer(raw, dtype=np.int64, count=count)
+        position = steps.nbytes
+        deltas = np.frombuffer(raw, dtype=np.int32, count=count * rows * columns, offset=position)
+        position += deltas.nbytes
+        packed = np.frombuffer(raw, dtype=np.uint8, offset=position).reshape(count, rows, packed_columns)
+        temperatures = np.cumsum(deltas.reshape(count, rows, columns), axis=0, dtype=np.int64) * self.temperature_step
+        fires = np.unpackbits(packed, axis=2, count=columns)
+        chunk = (steps, temperatures, fires)
+        self._cached_chunk = (index, chunk)
+        self.chunks_read += 1
+        return chunk
+
+    def frame(self, frame_index):
+        """
+        Return one frame.
+
+        Parameters:
+        - frame_index (int): Frame number (negative numbers count from the end).
+
+        Returns:
+        - tuple: (step, temperature map as float64 °C, fire map as uint8 0/1).
+        """
+        if frame_index < 0:
+            frame_index += len(self)
+        if not 0 <= frame_index < len(self):
+            raise IndexError(f"Frame {frame_index} is not in the archive ({len(self)} frames).")
+        index = int(np.searchsorted(self._chunk_starts, frame_index, side='right')) - 1
+        steps, temperatures, fires = self._decode_chunk(index)
+        local = frame_index - self._chunks[index][0]
+        return int(steps[local]), temperatures[local], fires[local]
+
+    def frames(self, start=0, stop=None):
+        """Yield (step, temperature, fire) for frames [start, stop), decoding one chunk at a time."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for frame_index in range(start, stop):
+            yield self.frame(frame_index)
+
+    def __iter__(self):
+        return self.frames()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -3,6 +3,9 @@ import matplotlib.pyplot as plt
 from numpy import mean
 from fire import Fire
 from location_system import Location
+from field_archive import FieldArchiveWriter
+from episode_log import EpisodeRecorder
+from experiment_state import ExperimentSnapshot
 from numpy.linalg import norm
 
 class FireExperiment:
@@ -12,10 +15,16 @@ class FireExperiment:
         self.fires = []  # List of Fire instances
         self.coolers = []  # List of AirCooling instances
         self.step = 0
-        Location.initialize(grid_size)  # Initialize the location system
+        self.telemetry = None  # Optional sqlite_database.telemetry.TelemetryRecorder, fed once per step
+        self.archive = None  # FieldArchiveWriter of the temperature and fire maps, see start_archive
+        self.archive_every = 1
+        self.metrics = None  # Optional metrics.MetricsPipeline, sent the field metrics of every step
+        self.recorder = None  # EpisodeRecorder of the episode, see start_recording
+        self.location = Location  # Location system of the experiment; forks have their own
+        self.location.initialize(grid_size)  # Initialize the location system
         # Initialize environment
-        Location._temp = np.full(self.grid_size, 25.0)
-        Location._fire = np.zeros(self.grid_size)
+        self.location._temp = np.full(self.grid_size, 25.0)
+        self.location._fire = np.zeros(self.grid_size)
      
     
     def deploy_materials(self,size):
@@ -50,29 +59,140 @@ class FireExperiment:
         """
         Artificially heat some material points to start the fire.
         """
-        fire_map = Location.Fire()
+        fire_map = self.location.Fire()
         for fire in np.random.choice(self.fires, size, replace=False):
-            temp_map = Location.Temp()
+            temp_map = self.location.Temp()
             temp_map[fire.loc[1], fire.loc[0]] = fire.T_i + 50  # 20°C above ignition
            
             fire_map[fire.loc[1], fire.loc[0]] = 1
-            Location.Fire(fire_map)
-            Location.Temp(temp_map)
+            self.location.Fire(fire_map)
+            self.location.Temp(temp_map)
+            if self.recorder is not None:
+                self.recorder.record_ignition(fire.loc)
 
 
-    def update_all(self):
+    def update_all(self, robot_positions=None):
         """
         Update all fires and air coolers.
+
+        Parameters:
+        - robot_positions: (x, y) of the robots after this step, recorded when an episode is being recorded
         """
-        fire_map = Location.Fire()
+        fire_map = self.location.Fire()
         for fire in self.fires:
-            fire.update(Location)
+            fire.update(self.location)
         self.step += 1 
         
-        Location.Fire(fire_map)
+        self.location.Fire(fire_map)
         self.passive_cooling_step()
+        if self.telemetry is not None or self.metrics:
+            temp = self.location.Temp()
+            fires_on = sum(1 for fire in self.fires if fire.Status == "on")
+            max_temperature, mean_temperature = float(np.max(temp)), float(np.mean(temp))
+            if self.telemetry is not None:
+                self.telemetry.record_field(self.step, fires_on, max_temperature, mean_temperature)
+            if self.metrics:
+                self.metrics.emit(self.step, fire_count=fires_on, max_temperature=max_temperature,
+                                  mean_temperature=mean_temperature)
+        if self.archive is not None and self.step % self.archive_every == 0:
+            self.archive.append(self.location.Temp(), self.location.Fire(), self.step)
+        if self.recorder is not None:
+            self._record_frame(robot_positions)
 
         
+    def start_archive(self, path, every=1, **archive_options):
+        """
+        Start recording the temperature and fire maps to a field archive.
+
+        Parameters:
+        - path: archive file to write
+        - every: record one frame every `every` steps
+        - archive_options: chunk_length, temperature_step, compression_level (see FieldArchiveWriter)
+        """
+        self.stop_archive()
+        self.archive = FieldArchiveWriter(path, self.grid_size, **archive_options)
+        self.archive_every = every
+        self.archive.append(self.location.Temp(), self.location.Fire(), self.step)  # State when recording starts
+
+    def stop_archive(self):
+        """
+        Stop recording the maps and close the archive.
+        """
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def start_recording(self, path, robot_positions, seed=None, **recorder_options):
+        """
+        Start recording the episode (robot moves, ignitions, extinguish calls, maps) for replay.
+
+        Parameters:
+        - path: episode log to write (see episode_log.EpisodeReplayer to play it back)
+        - robot_positions: (x, y) of the robots when recording starts
+        - seed: random seed the episode was started with
+        - recorder_options: keyframe_interval, temperature_step (see EpisodeRecorder)
+        """
+        self.stop_recording()
+        self.recorder = EpisodeRecorder(path, self.grid_size, len(robot_positions), len(self.fires), seed=seed,
+                                        **recorder_options)
+        fire_map = self.location.Fire()
+        for fire in self.fires:
+            if fire_map[fire.loc[1], fire.loc[0]] > 0:  # Ignited before recording started
+                self.recorder.record_ignition(fire.loc)
+        self._record_frame(robot_positions)  # State when recording starts
+
+    def _record_frame(self, robot_positions):
+        if robot_positions is None:
+            raise ValueError("update_all needs the robot positions while an episode is being recorded.")
+        self.recorder.record_frame(self.step, robot_positions, self.location.Temp(), self.location.Fire(), self.fires)
+
+    def stop_recording(self):
+        """
+        Stop recording the episode and close the log.
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def snapshot(self, random_state=True):
+        """
+        Capture the complete state of the experiment (maps, fires, coolers, step, random state).
+
+        Parameters:
+        - random_state: also capture the numpy.random and random generator states
+
+        Returns:
+        - ExperimentSnapshot, to pass to restore() or fork()
+        """
+        return ExperimentSnapshot(self, random_state)
+
+    def restore(self, snapshot, random_state=True):
+        """
+        Return the experiment to a snapshot.
+
+        Parameters:
+        - snapshot: ExperimentSnapshot of this experiment or of one with the same grid size
+        - random_state: also restore the random generators captured in the snapshot
+        """
+        snapshot.restore(self, random_state)
+
+    def fork(self, snapshot=None):
+        """
+        Create an independent experiment starting from a snapshot (by default the current
+        state), with a location system of its own. Forks share the snapshot's maps until
+        they modify them, and record, archive or report nothing.
+
+        Returns:
+        - FireExperiment: the fork; use fork.location instead of Location to read its maps
+        """
+        snapshot = snapshot if snapshot is not None else self.snapshot()
+        forked = FireExperiment.__new__(FireExperiment)
+        forked.telemetry = forked.archive = forked.metrics = forked.recorder = None
+        forked.archive_every = 1
+        forked.location = Location.fork(snapshot.temp, snapshot.fire)
+        snapshot.restore(forked, random_state=False)
+        return forked
+
     def visualize(self, robot_positions):
         """
         Update and visualize the environment:
@@ -81,8 +201,8 @@ class FireExperiment:
         - Fire material mass/status
         - Robot positions (updated cleanly)
         """
-        temp = Location.Temp()
-        fire_map = Location.Fire()
+        temp = self.location.Temp()
+        fire_map = self.location.Fire()
         fires = self.fires
 
         if not hasattr(self, '_fig'):
@@ -162,12 +282,12 @@ class FireExperiment:
     
         
         print("Starting simulation...")
-        temp_map = Location.Temp()
-        fire_map = Location.Fire()
+        temp_map = self.location.Temp()
+        fire_map = self.location.Fire()
         print(f"Initial temperature: {mean(temp_map)} °C")
         while np.max(temp_map) > 50.0:
             self.update_all()
-            temp_map = Location.Temp()
+            temp_map = self.location.Temp()
             self.step += 1
             fire=self.fires
             # print which fire is on
@@ -181,7 +301,7 @@ class FireExperiment:
         """
         Apply Newton's cooling across the entire temperature map.
         """
-        temp = Location.Temp()
+        temp = self.location.Temp()
         ambient_temp = 25.0  # Room ambient temperature
         cooling_constant = 0.001  # Experiment with values
 
@@ -189,7 +309,7 @@ class FireExperiment:
         # dT/dt = -k * (T - T_ambient)
         temp = temp + cooling_constant * (ambient_temp - temp)
 
-        Location.Temp(temp)
+        self.location.Temp(temp)
     
 
     def extinguish_fire(self, robot_position, extinguish_radius=5, power=5.0):
@@ -202,7 +322,8 @@ class FireExperiment:
         - power: how strong the extinguisher is (1.0 = normal)
         """
         x, y = robot_position
-  
+        if self.recorder is not None:
+            self.recorder.record_extinguish(robot_position, extinguish_radius, power)
 
         # Precomputed fire locations (N,2)
         for fire in self.fires:
@@ -212,4 +333,4 @@ class FireExperiment:
                 dist = np.linalg.norm(np.array(fire.loc) - np.array((x, y)))
                 if dist <= extinguish_radius:
                    # print(f"Extinguishing fire at {fire.loc} with power {power} from robot at {robot_position}")
-                    fire.fire_killing(n=power, suppression_type='basic', location_system=Location, extinguish_radius=extinguish_radius)
+                    fire.fire_killing(n=power, suppression_type='basic', location_system=self.location, extinguish_radius=extinguish_radius)
@@ -8,10 +8,16 @@ Methods:
 - Temp(new_temp=None): Get or set the temperature array.
 - Fire(new_fire=None): Get or set the fire state array.
 - initialize(grid_size=(100, 100)): Initialize or reset the location system with a specific grid size.
+- share(): Freeze the current maps and return them, for a snapshot.
+- use(temp, fire): Continue from frozen maps (restoring a snapshot).
+- fork(temp, fire): Create a separate location system (a subclass) starting from frozen maps.
+Maps that are shared with a snapshot are read-only; the first Temp()/Fire() access copies
+them (copy-on-write), so snapshots and forks cost nothing until they are simulated.
 """
 class Location:
     _temp = None  # Temperature map (numpy array)
     _fire = None  # Fire map (numpy array)
+    _shared = frozenset()  # Names of the maps still shared with a snapshot
 
     @classmethod
     def initialize(cls, grid_size):
@@ -21,6 +27,7 @@ class Location:
         """
         cls._temp = np.full(grid_size, 25.0)  # Default temperature 25°C
         cls._fire = np.zeros(grid_size)       # No fires initially
+        cls._shared = frozenset()
        
 
     @classmethod
@@ -31,6 +38,10 @@ class Location:
         """
         if new_temp is not None:
             cls._temp = new_temp
+            cls._shared = cls._shared - {'_temp'}
+        elif '_temp' in cls._shared:
+            cls._temp = cls._temp.copy()  # Private copy on first access
+            cls._shared = cls._shared - {'_temp'}
         return cls._temp
 
     @classmethod
@@ -41,4 +52,38 @@ class Location:
         """
         if new_fire is not None:
             cls._fire = new_fire
+            cls._shared = cls._shared - {'_fire'}
+        elif '_fire' in cls._shared:
+            cls._fire = cls._fire.copy()  # Private copy on first access
+            cls._shared = cls._shared - {'_fire'}
         return cls._fire
+
+    @classmethod
+    def share(cls):
+        """
+        Freeze the current maps and return them; the next access gets a private copy.
+        - returns: (temperature map, fire map), read-only
+        """
+        cls._temp.setflags(write=False)
+        cls._fire.setflags(write=False)
+        cls._shared = frozenset(('_temp', '_fire'))
+        return cls._temp, cls._fire
+
+    @classmethod
+    def use(cls, temp, fire):
+        """
+        Continue from frozen maps, copying each one on its first access.
+        - temp, fire: read-only maps returned by share()
+        """
+        cls._temp, cls._fire = temp, fire
+        cls._shared = frozenset(('_temp', '_fire'))
+
+    @classmethod
+    def fork(cls, temp, fire):
+        """
+        Create a location system of its own that starts from frozen maps.
+        - temp, fire: read-only maps returned by share()
+        - returns: a subclass of Location, used like Location
+        """
+        return type('LocationFork', (Location,), {'_temp': temp, '_fire': fire,
+                                                  '_shared': frozenset(('_temp', '_fire'))})
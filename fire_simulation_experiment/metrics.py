@@ -0,0 +1,297 @@
+import math
+from collections import deque
+import numpy as np
+
+"""
+Streaming metrics of fire experiments and trainers.
+
+The simulation loop emits one lightweight `StepEvent` per step (step number, source such as
+a genome ID, and a few scalar metrics) with `MetricsPipeline.emit`. The pipeline pushes the
+event into each consumer, a primed generator that updates its aggregate incrementally and
+keeps bounded state: rolling means and percentiles over a window, whole-run summaries and
+counters in constant memory, a sink into the telemetry database, a monitor printing the
+aggregates live and a log printing selected events (such as the result of each genome). A pipeline without consumers costs one truth test per step, so loops check
+`if pipeline:` before computing metrics they only need for it.
+"""
+
+
+class StepEvent:
+    """One step of a simulation: where it came from, when, and its metrics."""
+
+    __slots__ = ('source', 'step', 'values')
+
+    def __init__(self, source, step, values):
+        self.source = source
+        self.step = step
+        self.values = values  # Metric name -> scalar
+
+
+class MetricConsumer:
+    """Base of the pipeline consumers: a generator fed with events by `send`."""
+
+    def __init__(self, metric=None, name=None):
+        """
+        Parameters:
+        - metric (str): Metric the consumer aggregates; events without it are ignored.
+        - name (str): Name of the consumer in `MetricsPipeline.results`.
+        """
+        self.metric = metric
+        self.name = name or (f"{type(self).__name__.lower()}:{metric}" if metric else type(self).__name__.lower())
+        self.reset()
+
+    def reset(self):
+        """Forget everything consumed so far."""
+        self._consumer = self.consume()
+        next(self._consumer)  # Run up to the first yield so the generator accepts events
+
+    def send(self, event):
+        self._consumer.send(event)
+
+    def consume(self):
+        """Generator receiving events with `yield`; subclasses update their aggregate in it."""
+        while True:
+            yield
+
+    def result(self):
+        """Return the current aggregate."""
+        return None
+
+
+class RollingMean(MetricConsumer):
+    """Mean of a metric over the last `window` events that carry it."""
+
+    def __init__(self, metric, window=100, name=None):
+        self.window = window
+        super().__init__(metric, name)
+
+    def consume(self):
+        self._values = deque(maxlen=self.window)
+        self._sum = 0.0
+        added = 0
+        while True:
+            event = yield
+            value = event.values.get(self.metric)
+            if value is None:
+                continue
+            if len(self._values) == self.window:
+                self._sum -= self._values[0]
+            self._values.append(value)
+            self._sum += value
+            added += 1
+            if added % self.window == 0:
+                self._sum = math.fsum(self._values)  # Drop the rounding error of the running sum
+
+    def result(self):
+        return self._sum / len(self._values) if self._values else None
+
+
+class Percentiles(MetricConsumer):
+    """Percentiles of a metric over the last `window` events that carry it."""
+
+    def __init__(self, metric, percentiles=(50, 90, 99), window=1000, name=None):
+        self.percentiles = tuple(percentiles)
+        self.window = window
+        super().__init__(metric, name)
+
+    def consume(self):
+        self._values = deque(maxlen=self.window)
+        while True:
+            event = yield
+            value = event.values.get(self.metric)
+            if value is not None:
+                self._values.append(value)
+
+    def result(self):
+        # Computed on request only, so the per-step cost stays one append
+        if not self._values:
+            return None
+        return dict(zip(self.percentiles, np.percentile(np.fromiter(self._values, dtype=np.float64),
+                                                        self.percentiles).tolist()))
+
+
+class Summary(MetricConsumer):
+    """Count, mean, standard deviation, minimum and maximum of a metric over the whole run, in constant memory."""
+
+    def consume(self):
+        self._count, self._mean, self._m2 = 0, 0.0, 0.0
+        self._min, self._max = math.inf, -math.inf
+        while True:
+            event = yield
+            value = event.values.get(self.metric)
+            if value is None:
+                continue
+            # Welford's update of the mean and the sum of squared deviations
+            self._count += 1
+            delta = value - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (value - self._mean)
+            self._min = min(self._min, value)
+            self._max = max(self._max, value)
+
+    def result(self):
+        if not self._count:
+            return None
+        return {'count': self._count, 'mean': self._mean, 'std': math.sqrt(self._m2 / self._count),
+                'min': self._min, 'max': self._max}
+
+
+class Counter(MetricConsumer):
+    """Counts events, or the events whose metric passes a predicate, per source and in total."""
+
+    def __init__(self, metric=None, predicate=None, name=None):
+        """
+        Parameters:
+        - metric (str): Count only events carrying this metric (all events by default).
+        - predicate (callable): Count only events whose metric value passes this test.
+        """
+        self.predicate = predicate
+        super().__init__(metric, name)
+
+    def consume(self):
+        self.total = 0
+        self.by_source = {}
+        while True:
+            event = yield
+            if self.metric is not None:
+                value = event.values.get(self.metric)
+                if value is None or (self.predicate is not None and not self.predicate(value)):
+                    continue
+            self.total += 1
+            self.by_source[event.source] = self.by_source.get(event.source, 0) + 1
+
+    def result(self):
+        return self.total
+
+
+class TelemetrySink(MetricConsumer):
+    """Forwards the field metrics of the events to a telemetry recorder (see sqlite_database.telemetry)."""
+
+    def __init__(self, recorder, every=1, name='telemetry'):
+        """
+        Parameters:
+        - recorder (TelemetryRecorder): Recorder whose `record_field` gets the events; its
+          writes happen on its own thread.
+        - every (int): Forward one event in `every`.
+        """
+        self.recorder = recorder
+        self.every = every
+        super().__init__('fire_count', name)
+
+    def consume(self):
+        self.forwarded = 0
+        seen = 0
+        while True:
+            event = yield
+            values = event.values
+            if 'fire_count' not in values or 'max_temperature' not in values:
+                continue
+            seen += 1
+            if seen % self.every:
+                continue
+            self.recorder.record_field(event.step, values['fire_count'], values['max_temperature'],
+                                       values.get('mean_temperature'))
+            self.forwarded += 1
+
+    def result(self):
+        return self.forwarded
+
+
+class Monitor(MetricConsumer):
+    """Prints the results of other consumers every `every` events, for watching long runs live."""
+
+    def __init__(self, consumers, every=1000, output=print, name='monitor'):
+        """
+        Parameters:
+        - consumers (List[MetricConsumer]): Consumers whose results are printed (they must be
+          fed by the same pipeline).
+        - every (int): Print after every `every` events.
+        - output (callable): Receives the formatted line.
+        """
+        self.consumers = list(consumers)
+        self.every = every
+        self.output = output
+        super().__init__(None, name)
+
+    def consume(self):
+        events = 0
+        while True:
+            event = yield
+            events += 1
+            if events % self.every == 0:
+                results = ', '.join(f"{consumer.name}={_format(consumer.result())}" for consumer in self.consumers)
+                self.output(f"[step {event.step}, source {event.source}] {results}")
+
+
+class EventLog(MetricConsumer):
+    """Prints every event that carries a metric, e.g. the result of each evaluated genome."""
+
+    def __init__(self, metric, template, output=print, name=None):
+        """
+        Parameters:
+        - metric (str): Only events carrying this metric are printed.
+        - template (str): str.format template, filled with `source`, `step` and the event's metrics.
+        - output (callable): Receives the formatted line.
+        """
+        self.template = template
+        self.output = output
+        super().__init__(metric, name)
+
+    def consume(self):
+        self.printed = 0
+        while True:
+            event = yield
+            if self.metric in event.values:
+                self.output(self.template.format(source=event.source, step=event.step, **event.values))
+                self.printed += 1
+
+    def result(self):
+        return self.printed
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    if isinstance(value, dict):
+        return '{' + ', '.join(f"{key}: {_format(item)}" for key, item in value.items()) + '}'
+    return str(value)
+
+
+class MetricsPipeline:
+    """Fans step events out to a set of consumers."""
+
+    def __init__(self, *consumers):
+        self.consumers = []
+        for consumer in consumers:
+            self.add(consumer)
+
+    def add(self, consumer):
+        """Add a consumer and return it."""
+        self.consumers.append(consumer)
+        return consumer
+
+    def __bool__(self):
+        return bool(self.consumers)
+
+    def emit(self, step, source=None, **values):
+        """
+        Send one step event to every consumer.
+
+        Parameters:
+        - step (int): Simulation step.
+        - source: What the step belongs to (e.g. a genome ID), None for a single simulation.
+        - values: Scalar metrics of the step.
+        """
+        if not self.consumers:
+            return
+        event = StepEvent(source, step, values)
+        for consumer in self.consumers:
+            consumer.send(event)
+
+    def results(self):
+        """Return the current aggregate of every consumer by name."""
+        return {consumer.name: consumer.result() for consumer in self.consumers}
+
+    def reset(self):
+        """Reset every consumer (e.g. between batches)."""
+        for consumer in self.consumers:
+            consumer.reset()
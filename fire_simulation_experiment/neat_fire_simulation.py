@@ -5,10 +5,15 @@ import os
 import matplotlib.pyplot as plt
 from fire_experiment import FireExperiment
 from location_system import Location
+from training_store import TrainingRunStore, TrainingRunReporter
+from metrics import MetricsPipeline, EventLog
 
 GRID_SIZE = (30, 30)
 NUM_ROBOTS = 5
 SENSOR_RANGE = 2
+# Per-step metrics of the evaluations (burning_cells, fitness) and the result of each genome
+# (genome_fitness); add consumers (metrics.RollingMean, Monitor, ...) to watch a run
+METRICS = MetricsPipeline(EventLog('genome_fitness', "Genome {source} fitness: {genome_fitness}"))
 
 def extract_sensor_input(robot_pos, grid_size, sensor_range):
     x, y = robot_pos
@@ -140,6 +145,8 @@ def evaluate_genomes(genomes, config):
                     team_fitness += COORDINATION_REWARD * (near_robots / NUM_ROBOTS)
 
             fire_count = np.count_nonzero(Location.Fire())
+            if METRICS:
+                METRICS.emit(step, source=genome_id, burning_cells=int(fire_count), fitness=team_fitness)
             if fire_count < prev_fire_count:
                 extinguished = prev_fire_count - fire_count
                 team_fitness += EXTINGUISH_REWARD * extinguished
@@ -148,8 +155,8 @@ def evaluate_genomes(genomes, config):
                 team_fitness += (300 - step - 1) * TIME_BONUS
                 break
             # print(f'move_dir: {move_dir}, try_extinguish: {try_extinguish}')
-        print(f"Genome {genome_id} fitness: {team_fitness/1700}")
         genome.fitness = team_fitness/1700
+        METRICS.emit(step, source=genome_id, genome_fitness=genome.fitness)
 
 def run_neat(config_filename):
     config_path = os.path.join(os.path.dirname(__file__), config_filename)
@@ -164,12 +171,21 @@ def run_neat(config_filename):
     stats = neat.StatisticsReporter()
     p.add_reporter(stats)
 
-    winner = p.run(evaluate_genomes, 50)
+    # Record the run (config, per-generation statistics and champions); episodes are not seeded
+    store = TrainingRunStore()
+    try:
+        run_id = store.start_run(config_path, script='neat_fire_simulation',
+                                 parameters={'GRID_SIZE': GRID_SIZE, 'NUM_ROBOTS': NUM_ROBOTS, 'SENSOR_RANGE': SENSOR_RANGE})
+        p.add_reporter(TrainingRunReporter(store, run_id))
+        print(f"Training run {run_id}")
 
-    with open('best_robot_controller_7.pkl', 'wb') as f:
-        pickle.dump(winner, f)
+        winner = p.run(evaluate_genomes, 50)
+        store.finish_run(run_id)
+    finally:
+        store.close()
 
     plot_stats(stats, view=True)
+    return run_id
 
 def plot_stats(statistics, ylog=False, view=False, filename='fitness.svg'):
     generation = range(len(statistics.most_fit_genomes))
@@ -1,10 +1,11 @@
 import neat
 import numpy as np
-import pickle
 import os
 import matplotlib.pyplot as plt
 from fire_experiment import FireExperiment
 from location_system import Location
+from training_store import TrainingRunStore, TrainingRunReporter
+from metrics import MetricsPipeline, EventLog
 import random
 TOTAL_MATERIALS = 10
 GRID_SIZE = (30, 30)
@@ -18,6 +19,12 @@ extinguish_radius= 5
 MAX_FIRE_COUNT = 5  # Maximum number of fires to extinguish
 FIRE_CONSTRAINT_TIME=100
 STUCK_PANELTY = +0.005  # Penalty for being stuck in the same position
+EPISODE_SEED = 42  # Every genome is evaluated on the same episode
+# Per-step metrics of the evaluations (burning_cells, stagnation, penalties, fitness) and the result of
+# each genome (genome_*); add consumers (metrics.RollingMean, Monitor, ...) to watch a run
+METRICS = MetricsPipeline(EventLog('genome_fitness', "Genome {source} fitness: {genome_fitness:.4f}, "
+                                   "Stagnation: {genome_stagnation}, Stuck penalty: {genome_stuck_penalty}, "
+                                   "Move penalty: {genome_move_penalty:.4f}"))
 def get_local_grid(center, robot_positions):
     cx, cy = center
     temp = Location.Temp() / 100.0
@@ -44,7 +51,7 @@ def evaluate_genomes(genomes, config):
         return (x, y)
      
     for genome_id, genome in genomes:
-        random_seed = 42
+        random_seed = EPISODE_SEED
         np.random.seed(random_seed)
         random.seed(random_seed)
         net = neat.nn.FeedForwardNetwork.create(genome, config)
@@ -136,6 +143,10 @@ def evaluate_genomes(genomes, config):
 
                 
             stagnation_counter = sum(robot["stagnation_counter"] for robot in robots)
+            if METRICS:
+                METRICS.emit(step, source=genome_id, burning_cells=int(np.count_nonzero(fire_grid)),
+                             stagnation=stagnation_counter, move_penalty=move_panelty, stuck_penalty=Stuck_panelty,
+                             fitness=team_fitness)
                
 
             # Fire reduction fitness
@@ -159,11 +170,19 @@ def evaluate_genomes(genomes, config):
                 break
         
         genome.fitness = team_fitness  # Normalize fitness by number of robots
-        print(f"Genome {genome_id} fitness: {genome.fitness:.4f}, Stagnation: {stagnation_counter}, Stuck penalty: {Stuck_panelty}, Move penalty: {move_panelty:.4f}")
+        METRICS.emit(step, source=genome_id, genome_fitness=genome.fitness, genome_stagnation=stagnation_counter,
+                     genome_stuck_penalty=Stuck_panelty, genome_move_penalty=move_panelty)
         # Check robot stagnation
         
        
 
+TRAINING_PARAMETERS = {
+    'TOTAL_MATERIALS': TOTAL_MATERIALS, 'GRID_SIZE': GRID_SIZE, 'NUM_ROBOTS': NUM_ROBOTS, 'SENSOR_RANGE': SENSOR_RANGE,
+    'MOVE_PENALTY': MOVE_PENALTY, 'FIRE_REACHED_REWARD': FIRE_REACHED_REWARD,
+    'FIRE_EXTENGISH_REWARD': FIRE_EXTENGISH_REWARD, 'SIM_TIME': SIM_TIME, 'extinguish_radius': extinguish_radius,
+    'MAX_FIRE_COUNT': MAX_FIRE_COUNT, 'FIRE_CONSTRAINT_TIME': FIRE_CONSTRAINT_TIME, 'STUCK_PANELTY': STUCK_PANELTY,
+}
+
 def run_neat(config_filename):
     config_path = os.path.join(os.path.dirname(__file__), config_filename)
     config = neat.Config(
@@ -177,12 +196,20 @@ def run_neat(config_filename):
     stats = neat.StatisticsReporter()
     p.add_reporter(stats)
 
-    winner = p.run(evaluate_genomes, 100)
+    # Record the run (config, seed, reward weights, per-generation statistics and champions)
+    store = TrainingRunStore()
+    try:
+        run_id = store.start_run(config_path, script='neat_v2', seed=EPISODE_SEED, parameters=TRAINING_PARAMETERS)
+        p.add_reporter(TrainingRunReporter(store, run_id))
+        print(f"Training run {run_id}")
 
-    with open('best_robot_controller_9.pkl', 'wb') as f:
-        pickle.dump(winner, f)
+        winner = p.run(evaluate_genomes, 100)
+        store.finish_run(run_id)
+    finally:
+        store.close()
 
     plot_stats(stats, view=True)
+    return run_id
 
 def plot_stats(statistics, ylog=False, view=False, filename='fitness.svg'):
     generation = range(len(statistics.most_fit_genomes))
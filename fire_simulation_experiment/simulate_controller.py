@@ -4,6 +4,8 @@ import numpy as np
 from fire_experiment import FireExperiment
 from location_system import Location
 from neat_v2 import get_local_grid
+from training_store import TrainingRunStore
+from episode_log import EpisodeReplayer
 import random
 import os
 
@@ -22,10 +24,27 @@ STUCK_PENALTY = -5.0
 
 
 
-def simulate_best_controller(controller_path, config_path):
+def load_controller(controller, generation=None):
+    """
+    Load a controller genome.
+
+    Parameters:
+    - controller (str): Path to a pickled genome, or the ID of a run in the training store.
+    - generation (int): Generation of the champion of a stored run, its fittest champion by default.
+
+    Returns:
+    - neat.DefaultGenome: The genome.
+    """
+    if os.path.isfile(controller):
+        with open(controller, 'rb') as f:
+            return pickle.load(f)
+    with TrainingRunStore() as store:
+        return store.load_champion(controller, generation)
+
+
+def simulate_best_controller(controller_path, config_path, generation=None, record_path=None, visualize=True):
     # Load genome and config
-    with open(controller_path, 'rb') as f:
-        genome = pickle.load(f)
+    genome = load_controller(controller_path, generation)
 
     config = neat.Config(
         neat.DefaultGenome, neat.DefaultReproduction,
@@ -50,6 +69,10 @@ def simulate_best_controller(controller_path, config_path):
         y = np.random.randint(0, GRID_SIZE[0])
         robots.append({"pos": (x, y), "stagnation_counter": 0})
 
+    # Record the episode so it can be reviewed with replay_episode instead of re-simulated
+    if record_path is not None:
+        experiment.start_recording(record_path, [r["pos"] for r in robots], seed=random_seed)
+
     team_fitness = 0
 
     for step in range(SIM_TIME):
@@ -88,8 +111,18 @@ def simulate_best_controller(controller_path, config_path):
 
        
 
-        experiment.update_all()
-        experiment.visualize(robot_positions=[r["pos"] for r in robots])
+        experiment.update_all(robot_positions=[r["pos"] for r in robots])
+        if visualize:
+            experiment.visualize(robot_positions=[r["pos"] for r in robots])
+
+    experiment.stop_recording()
+
+
+def replay_episode(record_path, start=0, stop=None, every=1):
+    """Play back an episode recorded by simulate_best_controller, without re-running the simulation."""
+    with EpisodeReplayer(record_path) as replayer:
+        print(f"Replaying {len(replayer)} frames (seed {replayer.seed})")
+        replayer.play(start, stop, every)
 
       
 # Run the simulation
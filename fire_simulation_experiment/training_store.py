@@ -0,0 +1,305 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+import uuid
+import neat
+import numpy as np
+
+"""
+Store of NEAT training runs.
+
+Every training run gets a row in `training_runs` with the configuration it used (file
+path, full text and hash), the random seed and the reward weights of the training script.
+`TrainingRunReporter` is a neat reporter that, after every generation, writes the fitness
+statistics, species count and timing of the generation to `generation_stats` and the
+pickled champion genome of the generation to `champions`. Comparing runs is then a query
+over small indexed tables, and a champion is loaded by (run, generation) without touching
+any other genome. The store is a SQLite file next to the simulation database.
+"""
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'training_runs.db')
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS training_runs (
+        run_id TEXT PRIMARY KEY,
+        script TEXT,
+        config_path TEXT,
+        config_hash TEXT,
+        config_text TEXT,
+        seed INTEGER,
+        parameters TEXT,
+        started_at REAL,
+        finished_at REAL,
+        generations INTEGER DEFAULT 0,
+        best_fitness REAL,
+        best_generation INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS generation_stats (
+        run_id TEXT NOT NULL,
+        generation INTEGER NOT NULL,
+        best_fitness REAL,
+        mean_fitness REAL,
+        stdev_fitness REAL,
+        population_size INTEGER,
+        species_count INTEGER,
+        evaluation_seconds REAL,
+        generation_seconds REAL,
+        PRIMARY KEY (run_id, generation)
+    );
+    CREATE TABLE IF NOT EXISTS champions (
+        run_id TEXT NOT NULL,
+        generation INTEGER NOT NULL,
+        genome_key INTEGER,
+        fitness REAL,
+        genome BLOB,
+        PRIMARY KEY (run_id, generation)
+    );
+    CREATE INDEX IF NOT EXISTS idx_training_runs_best_fitness ON training_runs (best_fitness);
+    CREATE INDEX IF NOT EXISTS idx_training_runs_config_hash ON training_runs (config_hash);
+    CREATE INDEX IF NOT EXISTS idx_generation_stats_best_fitness ON generation_stats (best_fitness);
+    CREATE INDEX IF NOT EXISTS idx_champions_fitness ON champions (run_id, fitness);
+'''
+
+
+class TrainingRunStore:
+    """SQLite store of training runs, per-generation statistics and champion genomes."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Parameters:
+        - path (str): Store file, created with its tables if it does not exist.
+        """
+        self.path = os.path.normpath(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+
+    def start_run(self, config_path, script='', seed=None, parameters=None, run_id=None):
+        """
+        Register a new training run.
+
+        Parameters:
+        - config_path (str): neat configuration file of the run; its text is stored too.
+        - script (str): Training script (e.g. 'neat_v2').
+        - seed (int): Random seed of the run, if one was set.
+        - parameters (dict): Reward weights and other constants of the training script.
+        - run_id (str): ID of the run, a new unique ID by default.
+
+        Returns:
+        - str: The run ID.
+        """
+        run_id = run_id or time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        config_text = ''
+        if config_path and os.path.isfile(config_path):
+            with open(config_path) as f:
+                config_text = f.read()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO training_runs (run_id, script, config_path, config_hash, config_text, seed, parameters, "
+                "started_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, script, config_path, hashlib.sha1(config_text.encode()).hexdigest(), config_text, seed,
+                 json.dumps(parameters or {}, sort_keys=True), time.time()))
+        return run_id
+
+    def record_generation(self, run_id, generation, fitnesses, species_count, evaluation_seconds=None,
+                          generation_seconds=None, champion=None):
+        """
+        Store the statistics (and optionally the champion) of one generation in one transaction.
+
+        Parameters:
+        - run_id (str): ID of the run.
+        - generation (int): Generation number.
+        - fitnesses (List[float]): Fitness of every genome of the population.
+        - species_count (int): Number of species.
+        - evaluation_seconds (float): Time spent in the fitness function.
+        - generation_seconds (float): Time of the whole generation.
+        - champion (neat.DefaultGenome): Best genome of the generation.
+        """
+        fitnesses = np.asarray([f for f in fitnesses if f is not None], dtype=np.float64)
+        best = float(fitnesses.max()) if fitnesses.size else None
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO generation_stats (run_id, generation, best_fitness, mean_fitness, stdev_fitness, "
+                "population_size, species_count, evaluation_seconds, generation_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, generation, best, float(fitnesses.mean()) if fitnesses.size else None,
+                 float(fitnesses.std()) if fitnesses.size else None, int(fitnesses.size), species_count,
+                 evaluation_seconds, generation_seconds))
+            if champion is not None:
+                self._save_champion(run_id, generation, champion)
+            # Keep the run summary current, so a crashed run still shows its progress
+            self.conn.execute(
+                "UPDATE training_runs SET generations = MAX(generations, ?), "
+                "best_generation = CASE WHEN best_fitness IS NULL OR ? > best_fitness THEN ? ELSE best_generation END, "
+                "best_fitness = CASE WHEN best_fitness IS NULL OR ? > best_fitness THEN ? ELSE best_fitness END "
+                "WHERE run_id = ?", (generation + 1, best, generation, best, best, run_id))
+
+    def _save_champion(self, run_id, generation, genome):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO champions (run_id, generation, genome_key, fitness, genome) VALUES (?, ?, ?, ?, ?)",
+            (run_id, generation, getattr(genome, 'key', None), genome.fitness,
+             sqlite3.Binary(pickle.dumps(genome, pickle.HIGHEST_PROTOCOL))))
+
+    def save_champion(self, run_id, generation, genome):
+        """Store a champion genome of a run (e.g. the winner returned by neat)."""
+        with self.conn:
+            self._save_champion(run_id, generation, genome)
+
+    def finish_run(self, run_id):
+        """Mark a run as finished."""
+        with self.conn:
+            self.conn.execute("UPDATE training_runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def load_champion(self, run_id, generation=None):
+        """
+        Load a champion genome.
+
+        Parameters:
+        - run_id (str): ID of the run.
+        - generation (int): Generation of the champion, the fittest champion of the run by default.
+
+        Returns:
+        - neat.DefaultGenome: The champion.
+        """
+        if generation is None:
+            row = self.conn.execute("SELECT genome FROM champions WHERE run_id = ? ORDER BY fitness DESC LIMIT 1",
+                                    (run_id,)).fetchone()
+        else:
+            row = self.conn.execute("SELECT genome FROM champions WHERE run_id = ? AND generation = ?",
+                                    (run_id, generation)).fetchone()
+        if row is None:
+            raise KeyError(f"No champion for run {run_id!r}, generation {generation}.")
+        return pickle.loads(row[0])
+
+    def load_config_text(self, run_id):
+        """Return the neat configuration text a run was trained with."""
+        row = self.conn.execute("SELECT config_text FROM training_runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown training run {run_id!r}.")
+        return row[0]
+
+    def _columns(self, sql, parameters, columns):
+        # Text columns as object arrays, integer columns without NULL as int64, the others as float64 with NaN
+        rows = self.conn.execute(sql, parameters).fetchall()
+        result = {}
+        for index, name in enumerate(columns):
+            values = [row[index] for row in rows]
+            if any(isinstance(value, str) for value in values):
+                result[name] = np.array(values, dtype=object)
+            elif values and all(isinstance(value, int) for value in values):
+                result[name] = np.array(values, dtype=np.int64)
+            else:
+                result[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        return result
+
+    def list_runs(self, script=None, config_hash=None, order_by='best_fitness', limit=None):
+        """
+        Return a summary of the runs, best first, as NumPy columns.
+
+        Parameters:
+        - script (str): Only runs of this training script.
+        - config_hash (str): Only runs trained with this configuration.
+        - order_by (str): 'best_fitness' (descending) or 'started_at' (ascending).
+        - limit (int): Return at most this many runs.
+
+        Returns:
+        - dict: Column name (run_id, script, config_hash, seed, parameters, started_at,
+          generations, best_fitness, best_generation) -> NumPy array.
+        """
+        columns = ['run_id', 'script', 'config_hash', 'seed', 'parameters', 'started_at', 'generations',
+                   'best_fitness', 'best_generation']
+        order = {'best_fitness': 'best_fitness DESC', 'started_at': 'started_at'}[order_by]
+        sql = f"SELECT {', '.join(columns)} FROM training_runs WHERE 1"
+        parameters = []
+        if script is not None:
+            sql += " AND script = ?"
+            parameters.append(script)
+        if config_hash is not None:
+            sql += " AND config_hash = ?"
+            parameters.append(config_hash)
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(int(limit))
+        return self._columns(sql, parameters, columns)
+
+    def generation_stats(self, run_id=None):
+        """
+        Return the per-generation statistics of one run, or of every run, as NumPy columns.
+
+        Returns:
+        - dict: Column name (run_id, generation, best_fitness, mean_fitness, stdev_fitness,
+          population_size, species_count, evaluation_seconds, generation_seconds) -> NumPy array.
+        """
+        columns = ['run_id', 'generation', 'best_fitness', 'mean_fitness', 'stdev_fitness', 'population_size',
+                   'species_count', 'evaluation_seconds', 'generation_seconds']
+        sql = f"SELECT {', '.join(columns)} FROM generation_stats"
+        parameters = ()
+        if run_id is not None:
+            sql += " WHERE run_id = ?"
+            parameters = (run_id,)
+        return self._columns(sql + " ORDER BY run_id, generation", parameters, columns)
+
+    def import_pickle(self, pickle_path, config_path=None, run_id=None):
+        """
+        Store a controller pickled by an earlier training script as a run of its own, so the
+        old `best_robot_controller_*.pkl` files can be compared with the recorded runs.
+
+        Returns:
+        - str: The run ID (defaults to the file name without extension).
+        """
+        with open(pickle_path, 'rb') as f:
+            genome = pickle.load(f)
+        run_id = self.start_run(config_path, script=f"imported:{os.path.basename(pickle_path)}",
+                                run_id=run_id or os.path.splitext(os.path.basename(pickle_path))[0])
+        with self.conn:
+            self._save_champion(run_id, 0, genome)
+            self.conn.execute("UPDATE training_runs SET generations = 1, best_fitness = ?, best_generation = 0, "
+                              "finished_at = started_at WHERE run_id = ?", (genome.fitness, run_id))
+        return run_id
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrainingRunReporter(neat.reporting.BaseReporter):
+    """neat reporter writing the statistics and champion of every generation to a TrainingRunStore."""
+
+    def __init__(self, store, run_id):
+        """
+        Parameters:
+        - store (TrainingRunStore): Store to write to.
+        - run_id (str): Run registered with `store.start_run`.
+        """
+        self.store = store
+        self.run_id = run_id
+        self.generation = None
+        self._generation_start = None
+        self._evaluation_seconds = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self._generation_start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        # Called right after the fitness function, before reproduction
+        elapsed = time.perf_counter() - self._generation_start
+        fitnesses = [genome.fitness for genome in population.values()]
+        self.store.record_generation(self.run_id, self.generation, fitnesses, len(species.species),
+                                     evaluation_seconds=elapsed, champion=best_genome)
+
+    def end_generation(self, config, population, species_set):
+        with self.store.conn:
+            self.store.conn.execute("UPDATE generation_stats SET generation_seconds = ? WHERE run_id = ? AND generation = ?",
+                                    (time.perf_counter() - self._generation_start, self.run_id, self.generation))
@@ -1,13 +1,23 @@
-from environment.loader import load_environment_from_excel  # Import the function to load environment data from an Excel file
+from environment.snapshot import load_environment  # Import the function to load environment data from its snapshot or the Excel file
 from environment.environment_elements import visualize_environment  # Import the function to visualize the environment
 from simulation_visualizer.simulation_visualizer_element import SimulationVisualizer  # Import the SimulationVisualizer class for rendering the environment
 from sqlite_database.schema import initialize_schema
-from sqlite_database.writer import save_environment_element, save_internal_robot_tracks, save_designation_target_points
+from sqlite_database.connection import get_connection
+from sqlite_database.telemetry import TelemetryRecorder
+from sqlite_database.writer import save_environment_elements, save_internal_robot_tracks, save_designation_target_points, delete_environment_elements, delete_designation_target_points
 from sqlite_database.reader import get_designation_targets_points  # Import the function to get all environment elements from the database
-import sqlite3  # Import the SQLite library for database operations
 import json  # Import the JSON library for data serialization
 import numpy as np  # Import NumPy for numerical operations
 from mobileobjects.mobileobject_configurator import configure_internal_robot_element
+from mobileobjects.cooperative_planner import CooperativePlanner
+from mobileobjects.planning_pool import PlanningPool
+from mobileobjects.task_dispatcher import TaskDispatcher
+from mobileobjects.distance_field import TrackGraph
+from mobileobjects.event_kernel import EventKernel, MobileObjectAgent
+from mobileobjects.track_maps import TRACK_MAPS
+from environment.designation_points import DesignationPointService, target_point_id
+from environment.occupancy_grid import OccupancyGrid
+from environment.hot_reload import WorkbookWatcher
 """
 This module serves as the main entry point for the Lunar Base simulation.
 It orchestrates the loading of environment data, visualization, and database operations.
@@ -17,9 +27,26 @@ The main function is executed when the script is run directly.
 It is designed to be modular and extensible, allowing for easy integration of new features and components.
 """
 
+# Plan the robots cooperatively (WHCA*) on the shared track; when False each robot runs
+# plain A* on a pool of worker processes so planning never stalls the render loop. The
+# pool is only used then (and without EVENT_DRIVEN): cooperative plans reserve cells in
+# one shared table, so they are planned one after another on the main thread
+COOPERATIVE_PLANNING = True
+# Without cooperative planning, drive the robots with the discrete-event kernel instead of
+# calling update() on every robot every frame; idle robots then cost nothing
+EVENT_DRIVEN = False
+# Watch the workbook while the simulation runs and apply every edit to the database, the
+# static render, the occupancy grid and the robots without restarting (reloaded on a
+# worker thread, so an edit never stalls the render loop)
+WATCH_WORKBOOK = True
+# SQLite database of the simulation (opened once per thread and kept open)
+DB_PATH = 'data/lunar_base_sim.db'
+# Record the robot positions and statuses of every tick (written by a background thread)
+RECORD_TELEMETRY = True
+
 def main():
-    # Load environment objects from the specified Excel file
-    env_data = load_environment_from_excel()
+    # Load environment objects from the snapshot, parsing the Excel file only when it changed
+    env_data = load_environment()
    
     # Print out the details of the superadobes (habitat structures)
    
@@ -39,44 +66,37 @@ def main():
     # Visualize the entire environment using the provided visualization function
   
    
-    initialize_schema()  # Initialize the SQLite database schema
+    initialize_schema(DB_PATH)  # Initialize the SQLite database schema
     # Store to database without waiting
     # visualize_environment(all_elements) 
     visualizer= SimulationVisualizer()  # Create an instance of the SimulationVisualizer class
     visualizer.render_static_environment(all_elements)  # Render the static environment elements onto a separate surface
    
-    conn = sqlite3.connect('data/lunar_base_sim.db')
+    conn = get_connection()
     storing_elements = [element for element in all_elements if element not in env_data['ClearanceAreas'] and element not in env_data['InternalRobotTracks']]
-    for element in storing_elements:
-        save_environment_element(conn, element)
+    save_environment_elements(conn, storing_elements)  # All elements in one transaction
     # Save the internal robot tracks to the database
     for track in env_data['InternalRobotTracks']:
         save_internal_robot_tracks(conn, track)
     
-   # Extract superadobe center coordinates and store them in a np.array for accessibility
-    superadobe_centers = [element.center for element in env_data['Superadobes']]
-    superadobe_centers = np.array(superadobe_centers)*0.5
-    # print(f"Superadobe centers: {superadobe_centers}")
-    conn.close()  # Close the database connection
-   
-   # Extract the points from the final map of the internal robot tracks
-    final_map = env_data['InternalRobotTracks'][0].final_map
-    points = [(j, i) for i, row in enumerate(final_map) for j, val in enumerate(row) if val == 1]
+   # Track whose map and resolution the occupancy grid and the designation points use
+    track = env_data['InternalRobotTracks'][0]
+    environment_table = env_data['EnvironmentTable']
+    # Rasterize every environment layer into the shared world grid (cached on disk)
+    occupancy_grid = OccupancyGrid.load_or_build(environment_table, env_data['InternalRobotTracks'], track.resolution)
+    print(f"Occupancy grid ready: {len(occupancy_grid.layers)} layers of {occupancy_grid.shape[1]}x{occupancy_grid.shape[0]} cells.")
    
-   # Now find the closet point to the superadobe centers/2 on the points from the final map to save as a designation points for the robots for each superadobe
-   # print(f"Points from the final map: {points}")
-    if not points:
+    # Find the closest reachable track cell to every superadobe in one KD-tree query
+    designation_service = DesignationPointService(track.final_map, track.resolution)
+    if len(designation_service.index) == 0:
         print("No points found in the final map.")
         return
-    # Find the closest point to the superadobe centers
-    closest_points = [
-        min(points, key=lambda p: np.linalg.norm(np.array(p) - np.array(center)))
-        for center in superadobe_centers
-    ]
+    closest_points = {target_point_id(element_id): point
+                      for element_id, point in designation_service.designate(env_data['Superadobes']).items()}
     # print(f"Closest points for each superadobe center: {closest_points}")
     # Save the closest points to the database
-    save_designation_target_points(closest_points)   
-    
+    save_designation_target_points(closest_points)
+
     #get the designation targets points for the robots
     designation_targets_points = []
     for superadobe_id in range(10, 14):  # Loop through superadobe IDs from 7 to 28 (inclusive)
@@ -85,18 +105,42 @@ def main():
     print(f"Designation targets points for the robots: {designation_targets_points}")
   
     # Configure the internal robot element with the loaded environment data
-    internal_robot_elements = configure_internal_robot_element(designation_targets_points) 
+    internal_robot_elements = configure_internal_robot_element(designation_targets_points, track_id=track.element_id)
     print(f"Internal robot elements: {internal_robot_elements}")
-    internal_robot_elements[0].target_list = [tuple(internal_robot_elements[1].current_position)]
-    internal_robot_elements[1].target_list = [tuple(internal_robot_elements[0].current_position)]
-    internal_robot_elements[3].target_list = [tuple(internal_robot_elements[2].current_position)]
-    internal_robot_elements[2].target_list = [tuple(internal_robot_elements[3].current_position)]
-    # print the internal robot elements target position and target list
-   
-    for element in internal_robot_elements:
-        element.tasks=[('testing')]
-        element.start()
-        
+    planner = None
+    planners = {}
+    planning_pool = None
+    kernel = None
+    agents = {}
+    if COOPERATIVE_PLANNING:
+        # Share one cooperative planner per track so the robots plan around each other
+        planners = {}
+        for element in internal_robot_elements:
+            if element.track_id not in planners:
+                planners[element.track_id] = CooperativePlanner(element.mobile_object_map)
+            element.planner = planners[element.track_id]
+            element.planner.hold(element.element_id, element.current_position)  # Keep the start cells until each robot plans
+        planner = planners.get(track.element_id)  # None when no robot runs on the loaded track
+    elif EVENT_DRIVEN:
+        # Robots only act on their own events (waypoint reached, task complete, path ready)
+        kernel = EventKernel()
+        agents = {element.element_id: MobileObjectAgent(kernel, element) for element in internal_robot_elements}
+    else:
+        # Send the A* requests to worker processes; robots hold position until their path arrives
+        planning_pool = PlanningPool({element.track_id: TRACK_MAPS.packed(element.track_id) for element in internal_robot_elements})
+        for element in internal_robot_elements:
+            element.planning_pool = planning_pool
+
+    # Assign the designation points of every superadobe to the robots and start them
+    dispatcher_track_id = track.element_id if planner is not None else internal_robot_elements[0].track_id
+    track_graph = planner.graph if planner is not None else TrackGraph(internal_robot_elements[0].mobile_object_map)
+    dispatcher = TaskDispatcher(track_graph)
+    dispatcher.add_tasks({task_id: point[:2] for task_id, point in closest_points.items()})
+    if kernel is not None:
+        dispatcher.dispatch(internal_robot_elements, start=lambda robot: agents[robot.element_id].start())
+    else:
+        dispatcher.dispatch(internal_robot_elements)
+
     print(f"Internal robot elements target position: {internal_robot_elements[0].target_position}")
     print(f"Internal robot elements target list: {internal_robot_elements[1].target_position}")
     # Start the internal robot elements
@@ -104,11 +148,103 @@ def main():
     print(f"Internal robot elements current task: {internal_robot_elements[0].current_task}")
     # print the current status of the internal robot elements
     
+    watcher = None
+    if WATCH_WORKBOOK:
+        def store_environment_changes(diff, new_data):
+            """Write the changes of a workbook edit to the database and the occupancy grid (runs on the reload thread)."""
+            new_table = new_data['EnvironmentTable']
+            new_tracks = new_data['InternalRobotTracks']
+            conn = get_connection()  # The reload thread's own connection
+            delete_environment_elements(conn, diff.removed)
+            changed_elements = new_table.elements([new_table.rows[element_id] for element_id in diff.added + diff.changed])
+            save_environment_elements(conn, [element for element in changed_elements if element.__class__.__name__ != 'ClearanceArea'])
+            for new_track in new_tracks:
+                if new_track.element_id in diff.tracks_changed:
+                    save_internal_robot_tracks(conn, new_track)  # Rasterizes the edited track
+            occupancy_grid.refresh(new_table, new_tracks if diff.tracks_changed else None)
+
+            # Designation points of added, moved or removed superadobes, or of all of them when the track changed
+            removed_superadobes = [element_id for element_id in diff.removed if element_id.startswith('Superadobe_')]
+            if removed_superadobes:
+                delete_designation_target_points(conn, [target_point_id(element_id) for element_id in removed_superadobes])
+            superadobe_changed = any(element_id.startswith('Superadobe_') for element_id in diff.added + diff.changed)
+            if (superadobe_changed or diff.tracks_changed) and new_tracks:
+                new_track = new_tracks[0]
+                service = DesignationPointService(new_track.final_map, new_track.resolution)
+                if len(service.index):
+                    save_designation_target_points({target_point_id(element_id): point
+                                                    for element_id, point in service.designate(new_data['Superadobes']).items()})
+
+        def apply_environment_changes(diff, new_data):
+            """Show a workbook edit and hand edited track maps to the running robots and planners (runs in the render loop)."""
+            new_table = new_data['EnvironmentTable']
+            new_tracks = new_data['InternalRobotTracks']
+            if diff.tracks_changed:
+                # Tracks cross the whole base, redraw everything
+                visualizer.env_surface.fill((0, 0, 0))
+                visualizer.render_static_environment(new_table.elements() + new_tracks)
+            else:
+                boxes = diff.dirty_boxes()
+                rows = sorted({row for box in boxes for row in new_table.rows_overlapping(*box).tolist()})
+                visualizer.rerender_static_regions(boxes, new_table.elements(rows) + new_tracks)
+
+            edited_tracks = [new_track.element_id for new_track in new_tracks if new_track.element_id in diff.tracks_changed]
+            for track_id in diff.tracks_changed:
+                TRACK_MAPS.invalidate(track_id)  # The store reloads the map saved by the reload thread
+            pool_maps = {track_id: TRACK_MAPS.packed(track_id) for track_id in edited_tracks
+                         if any(element.track_id == track_id for element in internal_robot_elements)}
+            if planning_pool is not None and pool_maps:
+                planning_pool.update_maps(pool_maps)
+            for track_id in edited_tracks:
+                track_map = TRACK_MAPS.get(track_id)
+                if track_id in planners:
+                    planners[track_id].set_map(track_map)
+                if track_id == dispatcher_track_id:
+                    dispatcher.set_graph(planners[track_id].graph if track_id in planners else TrackGraph(track_map))
+                for element in internal_robot_elements:
+                    if element.track_id == track_id:
+                        # Re-plans robots that are on their way (through their agent, which reschedules them)
+                        (agents.get(element.element_id) or element).set_track_map(track_map)
+
+            # Designate added and moved superadobes, drop removed ones; idle robots start on new tasks
+            removed_tasks = [target_point_id(element_id) for element_id in diff.removed if element_id.startswith('Superadobe_')]
+            dispatcher.remove_tasks(removed_tasks, redispatch=False)
+            new_tasks = {}
+            for element_id in diff.added + diff.changed:
+                if element_id.startswith('Superadobe_'):
+                    point = get_designation_targets_points(target_point_id(element_id))  # Saved by the reload thread
+                    if point is not None:
+                        new_tasks[target_point_id(element_id)] = point[:2]
+            dispatcher.add_tasks(new_tasks, redispatch=False)
+            if new_tasks or removed_tasks or dispatcher_track_id in diff.tracks_changed:
+                dispatcher.redispatch()
+
+        watcher = WorkbookWatcher(env_data, background=True)
+        watcher.add_listener(store_environment_changes, background=True)
+        watcher.add_listener(apply_environment_changes)
+
+    telemetry = TelemetryRecorder(description='main') if RECORD_TELEMETRY else None
+    if telemetry is not None:
+        print(f"Recording telemetry of run {telemetry.run_id}.")
+    tick = 0
+
     # Render the internal robot elements onto the main screen
     while True:
+        if watcher is not None:
+            watcher.poll()  # Check for edits at most twice a second; reloads run on a worker thread
         # Draw only dynamic elements (robots)
-        for element in internal_robot_elements:
-            element.update()
+        if kernel is not None:
+            kernel.run(until=kernel.now + 1)  # Advance the simulated clock by one tick per frame
+            for agent in agents.values():
+                agent.sync_position()
+        else:
+            for element in internal_robot_elements:
+                element.update()
+        for track_planner in planners.values():
+            track_planner.advance()  # Move the reservation tables on to the next tick
+        if telemetry is not None:
+            telemetry.record_robots(tick, internal_robot_elements)  # Queued only, never waits for the disk
+        tick += 1
         visualizer.render_frame(internal_robot_elements)  # Render the dynamic elements (robots) onto the main screen
     
     print("Simulation completed successfully.")  # Print a message indicating successful completion of the simulation
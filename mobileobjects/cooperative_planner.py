@@ -0,0 +1,249 @@
+import heapq
+import numpy as np
+from collections import defaultdict
+
+from .distance_field import TrackGraph, NEIGHBOUR_OFFSETS
+
+"""
+Cooperative path planning for robots sharing the same track (Windowed Hierarchical
+Cooperative A*, WHCA*).
+
+Each robot plans a space-time path for a short window, reserving the cells (and the
+moves between them) it will occupy at every tick. Later robots plan around those
+reservations instead of colliding with them. Beyond the window the robot simply follows
+its true-distance field to the goal, so the search cost per robot depends on the window
+size only, not on the number of robots or the distance to the goal.
+"""
+
+# Possible actions per tick: wait in place, or move to one of the 4-connected neighbours
+ACTIONS = ((0, 0),) + NEIGHBOUR_OFFSETS
+
+
+class ReservationTable:
+    """
+    Hashed space-time reservation table.
+
+    - Cells are reserved as (x, y, t) -> robot_id.
+    - Moves are reserved as (x_from, y_from, x_to, y_to, t) -> robot_id, where t is the
+      arrival tick, so that two robots cannot swap cells head-on.
+    - A robot that finished its path is parked: its final cell stays reserved from the
+      arrival tick onwards until the robot plans again.
+    - A robot that cannot avoid an existing reservation (boxed in) takes it over, and the
+      previous owner is marked as displaced so it re-plans before its next step.
+    """
+
+    def __init__(self):
+        self._cells = {}  # (x, y, t) -> robot_id
+        self._edges = {}  # (x1, y1, x2, y2, t) -> robot_id
+        self._parked = {}  # (x, y) -> (robot_id, t_from)
+        self._owned = {}  # robot_id -> (cell keys, edge keys, parked cell)
+        self._by_time = defaultdict(list)  # t -> keys reserved at that tick, used for pruning
+        self.displaced = set()  # robots whose reservations were taken over by another robot
+
+    def is_free(self, x, y, t, robot_id):
+        """Check whether cell (x, y) is free for the robot at tick t."""
+        owner = self._cells.get((x, y, t))
+        if owner is not None and owner != robot_id:
+            return False
+        parked = self._parked.get((x, y))
+        if parked is not None and parked[0] != robot_id and t >= parked[1]:
+            return False
+        return True
+
+    def is_move_free(self, x1, y1, x2, y2, t, robot_id):
+        """Check that no other robot moves from (x2, y2) to (x1, y1) arriving at tick t."""
+        owner = self._edges.get((x2, y2, x1, y1, t))
+        return owner is None or owner == robot_id
+
+    def reserve(self, robot_id, path, start_time, window):
+        """
+        Reserve the first `window` ticks of a path for a robot.
+
+        Parameters:
+        - robot_id (str): Robot owning the reservation.
+        - path (List[tuple]): Cells, path[k] being occupied at tick start_time + k.
+        - start_time (int): Tick of path[0].
+        - window (int): Number of ticks to reserve.
+        """
+        self.release(robot_id)
+        cell_keys = []
+        edge_keys = []
+        for k, (x, y) in enumerate(path[:window + 1]):
+            t = start_time + k
+            key = (x, y, t)
+            owner = self._cells.get(key)
+            if owner is not None and owner != robot_id:
+                self.displaced.add(owner)
+            self._cells[key] = robot_id
+            cell_keys.append(key)
+            self._by_time[t].append(key)
+            if k > 0:
+                px, py = path[k - 1]
+                edge = (px, py, x, y, t)
+                self._edges[edge] = robot_id
+                edge_keys.append(edge)
+                self._by_time[t].append(edge)
+        parked = None
+        if len(path) - 1 <= window:
+            # The robot reaches its goal inside the window and stays there afterwards
+            parked = tuple(path[-1])
+            self._parked[parked] = (robot_id, start_time + len(path) - 1)
+        self._owned[robot_id] = (cell_keys, edge_keys, parked)
+
+    def hold(self, robot_id, position, start_time):
+        """Park a robot at its current cell from start_time onwards."""
+        self.release(robot_id)
+        parked = (int(position[0]), int(position[1]))
+        self._parked[parked] = (robot_id, start_time)
+        self._owned[robot_id] = ([], [], parked)
+
+    def release(self, robot_id):
+        """Drop every reservation held by a robot."""
+        cell_keys, edge_keys, parked = self._owned.pop(robot_id, ([], [], None))
+        for key in cell_keys:
+            if self._cells.get(key) == robot_id:
+                del self._cells[key]
+        for key in edge_keys:
+            if self._edges.get(key) == robot_id:
+                del self._edges[key]
+        if parked is not None and self._parked.get(parked, (None,))[0] == robot_id:
+            del self._parked[parked]
+
+    def prune(self, before_time):
+        """Forget reservations for ticks earlier than before_time."""
+        for t in [t for t in self._by_time if t < before_time]:
+            for key in self._by_time.pop(t):
+                if len(key) == 3:
+                    self._cells.pop(key, None)
+                else:
+                    self._edges.pop(key, None)
+
+
+class CooperativePlanner:
+    """
+    WHCA* planner shared by all robots on one track map.
+
+    The planner owns the simulation tick counter used by the reservation table; the
+    simulation loop calls `advance()` once per tick after updating the robots.
+    Robots using this planner move exactly one cell (or wait) per tick.
+    """
+
+    def __init__(self, grid_map, window=16, max_cached_fields=64):
+        """
+        Parameters:
+        - grid_map (numpy.ndarray): Track map shared by the robots, walkable where > 0.
+        - window (int): Number of ticks searched in space-time and reserved per plan.
+        - max_cached_fields (int): Number of goal distance fields kept in memory.
+        """
+        self.graph = TrackGraph(grid_map, max_cached_fields)
+        self.max_cached_fields = max_cached_fields
+        self.window = window
+        self.reservations = ReservationTable()
+        self.time = 0
+        self._reserved_steps = {}  # robot_id -> number of reserved steps in its last plan
+
+    def set_map(self, grid_map):
+        """
+        Plan on a new track map from now on (e.g. after the track was edited); the
+        reservations are kept and the robots re-plan with `MobileObjectElement.set_track_map`.
+        """
+        self.graph = TrackGraph(grid_map, self.max_cached_fields)
+
+    def advance(self, steps=1):
+        """Advance the planner clock and drop reservations that are in the past."""
+        self.time += steps
+        self.reservations.prune(self.time - 1)
+
+    def hold(self, robot_id, position, start_time=None):
+        """Reserve a robot's current cell until it plans a path (e.g. before the robots start)."""
+        self.reservations.hold(robot_id, position, self.time if start_time is None else start_time)
+
+    def plan(self, robot_id, start, goal, start_time=None):
+        """
+        Plan a conflict-free path and reserve its first window of ticks.
+
+        Parameters:
+        - robot_id (str): Identifier of the planning robot.
+        - start (tuple): (x, y) cell occupied at start_time.
+        - goal (tuple): (x, y) target cell.
+        - start_time (int): Tick of the start cell, defaults to the planner's current tick.
+
+        Returns:
+        - List[tuple]: Cells from start to goal, one per tick (repeated cells are waits).
+          [start] if the goal cannot be reached.
+        """
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        t0 = self.time if start_time is None else start_time
+        field = self.graph.field(goal)
+        if not np.isfinite(field[start[1], start[0]]):
+            # Unreachable goal: stay where we are and keep the cell
+            self._reserved_steps[robot_id] = 0
+            self.reservations.hold(robot_id, start, t0)
+            return [start]
+
+        window_path = self._search_window(robot_id, start, goal, t0, field)
+        # Outside the window other robots are ignored: follow the distance field to the goal
+        path = window_path + self.graph.descend(window_path[-1], goal)[1:]
+        # Only the searched part of the path is checked against other robots, so only that part is reserved
+        self._reserved_steps[robot_id] = len(window_path) - 1
+        self.reservations.reserve(robot_id, path, t0, len(window_path) - 1)
+        return path
+
+    def is_displaced(self, robot_id):
+        """Return True (once) if another robot took over part of this robot's reservations."""
+        if robot_id in self.reservations.displaced:
+            self.reservations.displaced.discard(robot_id)
+            return True
+        return False
+
+    def reserved_steps(self, robot_id):
+        """Return how many steps of the robot's last plan are covered by reservations."""
+        return self._reserved_steps.get(robot_id, 0)
+
+    def _search_window(self, robot_id, start, goal, t0, field):
+        """Space-time A* over the reservation table, limited to `window` ticks."""
+        reservations = self.reservations
+        height, width = field.shape
+        window = self.window
+        counter = 0
+        h0 = field[start[1], start[0]]
+        open_heap = [(h0, h0, counter, 0, start[0], start[1])]
+        parents = {(start[0], start[1], 0): None}
+        terminal = None
+        while open_heap:
+            _, h, _, k, x, y = heapq.heappop(open_heap)
+            if k == window or ((x, y) == goal and self._goal_free(robot_id, goal, t0 + k)):
+                terminal = (x, y, k)
+                break
+            t = t0 + k + 1
+            for dx, dy in ACTIONS:
+                nx, ny = x + dx, y + dy
+                if not (0 <= ny < height and 0 <= nx < width):
+                    continue
+                nh = field[ny, nx]
+                if nh == np.inf or (nx, ny, k + 1) in parents:
+                    continue
+                if not reservations.is_free(nx, ny, t, robot_id):
+                    continue
+                if (dx or dy) and not reservations.is_move_free(x, y, nx, ny, t, robot_id):
+                    continue
+                parents[(nx, ny, k + 1)] = (x, y, k)
+                counter += 1
+                heapq.heappush(open_heap, (k + 1 + nh, nh, counter, k + 1, nx, ny))
+
+        if terminal is None:
+            # Boxed in: wait one tick in place and search again after it
+            return [start, start]
+        path = []
+        node = terminal
+        while node is not None:
+            path.append((node[0], node[1]))
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def _goal_free(self, robot_id, goal, t):
+        """Check that the robot can stay on its goal from tick t to the end of the window."""
+        return all(self.reservations.is_free(goal[0], goal[1], tick, robot_id)
+                   for tick in range(t, t + self.window + 1))
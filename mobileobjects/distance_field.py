@@ -0,0 +1,131 @@
+import numpy as np
+from collections import OrderedDict
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+"""
+This module turns a robot map into a graph of walkable cells and provides cached
+true-distance fields over it. The fields are used as exact heuristics by the planners
+and as route costs by anything that needs path lengths without running A*.
+"""
+
+# 4-connected moves, the same neighbourhood the A* finder uses by default
+NEIGHBOUR_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class TrackGraph:
+    """
+    Graph view of a mobile object map.
+
+    Every cell with a value > 0 becomes a node and every pair of 4-connected walkable
+    cells becomes an edge. Distances are computed with SciPy's compiled shortest path
+    routines and cached per goal cell.
+    """
+
+    def __init__(self, grid_map, max_cached_fields=64):
+        """
+        Build the graph for the given map.
+
+        Parameters:
+        - grid_map (numpy.ndarray): 2-D map indexed as [y, x], walkable where > 0.
+        - max_cached_fields (int): Number of per-goal distance fields kept in memory.
+        """
+        self.walkable = np.asarray(grid_map) > 0
+        self.shape = self.walkable.shape
+        self.max_cached_fields = max_cached_fields
+        self._fields = OrderedDict()  # goal (x, y) -> 2-D distance field, least recently used first
+
+        # Number the walkable cells so they can be used as graph nodes
+        rows, cols = np.nonzero(self.walkable)
+        self.node_index = np.full(self.shape, -1, dtype=np.int64)
+        self.node_index[rows, cols] = np.arange(len(rows))
+        self.node_rows = rows
+        self.node_cols = cols
+
+        # Connect each walkable cell to its right and lower walkable neighbours (undirected)
+        src = []
+        dst = []
+        right = self.walkable[:, :-1] & self.walkable[:, 1:]
+        r, c = np.nonzero(right)
+        src.append(self.node_index[r, c])
+        dst.append(self.node_index[r, c + 1])
+        down = self.walkable[:-1, :] & self.walkable[1:, :]
+        r, c = np.nonzero(down)
+        src.append(self.node_index[r, c])
+        dst.append(self.node_index[r + 1, c])
+        src = np.concatenate(src)
+        dst = np.concatenate(dst)
+        n = len(rows)
+        self.graph = csr_matrix((np.ones(len(src)), (src, dst)), shape=(n, n))
+
+    def node(self, position):
+        """Return the node index of an (x, y) cell, or -1 if it is not walkable or off the map."""
+        x, y = int(position[0]), int(position[1])
+        if 0 <= y < self.shape[0] and 0 <= x < self.shape[1]:
+            return int(self.node_index[y, x])
+        return -1
+
+    def distances(self, sources):
+        """
+        Compute hop distances from several cells to every walkable cell in one call.
+
+        Parameters:
+        - sources (List[tuple]): (x, y) source cells.
+
+        Returns:
+        - numpy.ndarray: Array of shape (len(sources), number of nodes); inf where unreachable.
+        """
+        result = np.full((len(sources), self.graph.shape[0]), np.inf)
+        indices = [self.node(source) for source in sources]
+        valid = [i for i, index in enumerate(indices) if index >= 0]
+        if valid and self.graph.shape[0]:
+            result[valid] = dijkstra(self.graph, directed=False, unweighted=True,
+                                     indices=[indices[i] for i in valid])
+        return result
+
+    def field(self, goal):
+        """
+        Return the distance from every cell to the goal as a 2-D array indexed [y, x].
+
+        Unwalkable and unreachable cells are inf. Fields are cached per goal.
+        """
+        goal = (int(goal[0]), int(goal[1]))
+        field = self._fields.get(goal)
+        if field is not None:
+            self._fields.move_to_end(goal)
+            return field
+        field = np.full(self.shape, np.inf)
+        field[self.node_rows, self.node_cols] = self.distances([goal])[0]
+        field.flags.writeable = False
+        self._fields[goal] = field
+        if len(self._fields) > self.max_cached_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    def path_length(self, start, goal):
+        """Return the number of steps of the shortest path between two cells (inf if none)."""
+        x, y = int(start[0]), int(start[1])
+        if not (0 <= y < self.shape[0] and 0 <= x < self.shape[1]):
+            return np.inf
+        return float(self.field(goal)[y, x])
+
+    def descend(self, start, goal):
+        """
+        Follow the distance field from start down to the goal.
+
+        Returns:
+        - List[tuple]: Cells from start to goal (inclusive), or [start] if the goal is unreachable.
+        """
+        field = self.field(goal)
+        x, y = int(start[0]), int(start[1])
+        path = [(x, y)]
+        if not np.isfinite(field[y, x]):
+            return path
+        while field[y, x] > 0:
+            for dx, dy in NEIGHBOUR_OFFSETS:
+                nx, ny = x + dx, y + dy
+                if 0 <= ny < self.shape[0] and 0 <= nx < self.shape[1] and field[ny, nx] == field[y, x] - 1:
+                    x, y = nx, ny
+                    break
+            path.append((x, y))
+        return path
@@ -0,0 +1,257 @@
+import heapq
+import itertools
+import time
+import numpy as np
+from collections import Counter
+
+"""
+Discrete-event simulation kernel for mobile objects.
+
+Instead of calling `update()` on every robot every frame, robots are driven by timestamped
+events on a simulated clock (one time unit = one tick, i.e. one cell at velocity 1):
+
+- ARRIVE_WAYPOINT: the robot reaches the next corner of its path,
+- TASK_COMPLETE: the robot finished the work at its target,
+- REPLAN_DONE: a new path is available.
+
+Straight path segments are covered by a single event, and robots with nothing to do have
+no events at all, so they cost nothing. `EventKernel.run` processes events as fast as the
+CPU allows, or paced against the wall clock when a real-time scale is given.
+"""
+
+ARRIVE_WAYPOINT = 'arrive_waypoint'
+TASK_COMPLETE = 'task_complete'
+REPLAN_DONE = 'replan_done'
+
+
+class Event:
+    """A scheduled callback. Cancelled events stay in the queue and are skipped when popped."""
+    __slots__ = ('time', 'kind', 'callback', 'args', 'cancelled')
+
+    def __init__(self, time, kind, callback, args):
+        self.time = time
+        self.kind = kind
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class EventKernel:
+    """Priority queue of timestamped events on a simulated clock."""
+
+    def __init__(self, start_time=0.0):
+        self.now = start_time  # Current simulated time
+        self._queue = []  # heap of (time, sequence, Event); the sequence keeps FIFO order for equal times
+        self._sequence = itertools.count()
+        self.event_counts = Counter()  # Processed events per kind
+
+    def schedule(self, delay, kind, callback, *args):
+        """Schedule callback(*args) after `delay` time units and return the event."""
+        return self.schedule_at(self.now + delay, kind, callback, *args)
+
+    def schedule_at(self, at_time, kind, callback, *args):
+        """Schedule callback(*args) at an absolute simulated time and return the event."""
+        if at_time < self.now:
+            raise ValueError(f"Cannot schedule an event in the past ({at_time} < {self.now}).")
+        event = Event(at_time, kind, callback, args)
+        heapq.heappush(self._queue, (at_time, next(self._sequence), event))
+        return event
+
+    def cancel(self, event):
+        """Cancel a scheduled event."""
+        event.cancelled = True
+
+    def pending(self):
+        """Return the number of events still queued (including cancelled ones)."""
+        return len(self._queue)
+
+    def run(self, until=None, realtime_scale=None, max_events=None):
+        """
+        Process events in time order.
+
+        Parameters:
+        - until (float): Stop before the first event later than this time and move the
+          clock to it. None runs until the queue is empty.
+        - realtime_scale (float): Wall-clock seconds per simulated time unit (e.g. 1/30 to
+          replay at 30 ticks per second). None runs as fast as possible.
+        - max_events (int): Stop after this many events.
+
+        Returns:
+        - int: Number of events processed.
+        """
+        processed = 0
+        wall_start = time.perf_counter()
+        sim_start = self.now
+        while self._queue and (max_events is None or processed < max_events):
+            at_time, _, event = self._queue[0]
+            if until is not None and at_time > until:
+                break
+            heapq.heappop(self._queue)
+            if event.cancelled:
+                continue
+            if realtime_scale is not None:
+                delay = (at_time - sim_start) * realtime_scale - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.now = at_time
+            event.callback(*event.args)
+            self.event_counts[event.kind] += 1
+            processed += 1
+        if until is not None and (max_events is None or processed < max_events):
+            self.now = max(self.now, until)
+        return processed
+
+
+class MobileObjectAgent:
+    """
+    Drives a `MobileObjectElement` through an `EventKernel`.
+
+    The agent follows the same life cycle as `MobileObjectElement.update()`: visit the
+    targets in `target_list`, then drive back to the home location and become idle.
+    Paths are computed with the robot's own planner (A* or D* Lite). Robots sharing a
+    cooperative planner reserve the track tick by tick and must keep using `update()`.
+
+    Change the robot's map through the agent (`block_cells`, `unblock_cells`,
+    `set_track_map`): it stops the robot on the cell it has reached, lets the robot repair
+    its path and schedules the new path. An arrival scheduled for a path that was replaced
+    behind the agent's back is ignored, and the robot continues on its new path.
+    """
+
+    def __init__(self, kernel, mobile_object, service_time=0.0, planning_time=0.0):
+        """
+        Parameters:
+        - kernel (EventKernel): Kernel scheduling the robot's events.
+        - mobile_object (MobileObjectElement): Robot driven by this agent.
+        - service_time (float): Time spent at each target before the task is complete.
+        - planning_time (float): Simulated delay between a planning request and its result.
+        """
+        if mobile_object.planner is not None:
+            raise ValueError(f"{mobile_object.tag} uses a cooperative planner, which needs tick-by-tick update().")
+        self.kernel = kernel
+        self.mobile_object = mobile_object
+        self.service_time = service_time
+        self.planning_time = planning_time
+        self._leg_start_time = None  # Time the robot left the last waypoint
+        self._leg = None  # (from cell, to cell) of the segment being driven
+        self._next_event = None
+
+    def block_cells(self, cells):
+        """Block cells of the robot's map (see `MobileObjectElement.block_cells`) and follow the repaired path."""
+        self._change_map(self.mobile_object.block_cells, cells)
+
+    def unblock_cells(self, cells):
+        """Restore blocked cells (see `MobileObjectElement.unblock_cells`) and follow the repaired path."""
+        self._change_map(self.mobile_object.unblock_cells, cells)
+
+    def set_track_map(self, track_map):
+        """Drive on a new track map (see `MobileObjectElement.set_track_map`) and follow the repaired path."""
+        self._change_map(self.mobile_object.set_track_map, track_map)
+
+    def _change_map(self, change, argument):
+        robot = self.mobile_object
+        event = self._next_event
+        interrupted = event is not None and event.kind in (ARRIVE_WAYPOINT, REPLAN_DONE)
+        if interrupted:
+            # Stop on the cell reached so far; the repair plans from there
+            self.sync_position()
+            self.kernel.cancel(event)
+            self._next_event = None
+            self._leg = None
+            robot.current_status = "moving"  # Let the robot repair its path
+        change(argument)
+        if interrupted:
+            if event.kind == REPLAN_DONE:
+                robot.path = robot._compute_path()  # The pending result was planned on the old map
+            self._follow_current_path()
+
+    def _follow_current_path(self):
+        """Schedule the robot's current path from its current cell."""
+        robot = self.mobile_object
+        path = robot.path
+        if path and tuple(path[0]) != tuple(robot.current_position) and tuple(robot.current_position) in path:
+            path = path[path.index(tuple(robot.current_position)):]  # Skip the cells already driven
+        robot.path = list(path) if path else [tuple(robot.current_position)]
+        robot.current_status = "moving"
+        self._schedule_next_waypoint()
+
+    def is_idle(self):
+        """Return True if the robot has no scheduled events."""
+        return self._next_event is None
+
+    def start(self):
+        """Start working on the robot's target list if the robot is idle."""
+        if self.is_idle():
+            self._next_target()
+
+    def _next_target(self):
+        robot = self.mobile_object
+        if robot.target_list:
+            robot.target_position = robot.target_list.pop(0)
+            robot.current_task = robot.tasks[0] if robot.tasks else None
+        elif tuple(robot.current_position) != tuple(robot.home_location):
+            robot.target_position = robot.home_location
+            robot.current_task = None
+        else:
+            # Back home with nothing to do: no more events until start() is called again
+            robot.current_status = "idle"
+            if robot.tasks:
+                robot.tasks.pop(0)
+            self._next_event = None
+            return
+        path = robot._compute_path()
+        self._next_event = self.kernel.schedule(self.planning_time, REPLAN_DONE, self._on_replan_done, path)
+
+    def _on_replan_done(self, path):
+        robot = self.mobile_object
+        robot.path = list(path) if path else [tuple(robot.current_position)]
+        robot.current_status = "moving"
+        self._schedule_next_waypoint()
+
+    def _schedule_next_waypoint(self):
+        robot = self.mobile_object
+        path = robot.path
+        if len(path) <= 1:
+            self._leg = None
+            self._next_event = self.kernel.schedule(self.service_time, TASK_COMPLETE, self._on_task_complete)
+            return
+        # Drive to the last cell of the current straight segment in one event
+        steps = np.diff(np.asarray(path[:], dtype=np.int64), axis=0)
+        turns = np.nonzero(np.any(steps[1:] != steps[:-1], axis=1))[0]
+        index = int(turns[0]) + 1 if len(turns) else len(path) - 1
+        self._leg_start_time = self.kernel.now
+        self._leg = (path[0], path[index])
+        self._next_event = self.kernel.schedule(index / robot.current_velocity, ARRIVE_WAYPOINT,
+                                                self._on_arrive_waypoint, path, index)
+
+    def _on_arrive_waypoint(self, path, index):
+        robot = self.mobile_object
+        if robot.path is not path:
+            # The path was replaced (e.g. repaired by robot.block_cells) after this arrival was
+            # scheduled, so the index is meaningless: continue on the new path instead
+            self._leg = None
+            self._follow_current_path()
+            return
+        robot.current_position = robot.path[index]
+        robot.path = robot.path[index:]
+        robot.update_direction()
+        self._schedule_next_waypoint()
+
+    def _on_task_complete(self):
+        self._leg = None
+        self._next_target()
+
+    def position(self):
+        """Return the robot's (x, y) position at the kernel's current time, interpolated along its segment."""
+        if self._leg is None:
+            return tuple(self.mobile_object.current_position)
+        (x0, y0), (x1, y1) = self._leg
+        length = abs(x1 - x0) + abs(y1 - y0)
+        travelled = (self.kernel.now - self._leg_start_time) * self.mobile_object.current_velocity
+        fraction = min(1.0, travelled / length) if length else 1.0
+        return (x0 + (x1 - x0) * fraction, y0 + (y1 - y0) * fraction)
+
+    def sync_position(self):
+        """Move the robot to the cell it has reached at the kernel's current time, for rendering between events."""
+        if self._leg is not None:
+            x, y = self.position()
+            self.mobile_object.current_position = (int(round(x)), int(round(y)))
@@ -0,0 +1,174 @@
+import heapq
+import numpy as np
+
+from .distance_field import NEIGHBOUR_OFFSETS
+
+"""
+Incremental path planning (D* Lite) for a single mobile object.
+
+The planner searches backwards from the goal and keeps its g/rhs values between calls.
+When cells of the map become blocked or free again only the vertices whose distance to
+the goal actually changes are re-expanded, so repairing a path after a fire or a stalled
+rover costs time proportional to the size of the change instead of a full search.
+"""
+
+INF = float('inf')
+
+
+class DStarLitePlanner:
+    """
+    D* Lite planner on a 4-connected grid map with unit step costs.
+
+    Cells are (x, y) tuples and the map is indexed as [y, x], walkable where > 0,
+    the same convention as the A* finder used by `MobileObjectElement.path_planning`.
+    """
+
+    def __init__(self, grid_map, start, goal):
+        """
+        Parameters:
+        - grid_map (numpy.ndarray): Map of the robot's environment, walkable where > 0.
+        - start (tuple): (x, y) current cell of the robot.
+        - goal (tuple): (x, y) target cell.
+        """
+        self.walkable = np.array(grid_map) > 0  # Own copy, updated through block_cells/unblock_cells
+        self.height, self.width = self.walkable.shape
+        self.start = (int(start[0]), int(start[1]))
+        self.goal = (int(goal[0]), int(goal[1]))
+        self._last_start = self.start
+        self.km = 0
+        self.g = {}  # cell -> cost-to-goal estimate (missing means inf)
+        self.rhs = {self.goal: 0}  # cell -> one-step lookahead cost (missing means inf)
+        self._queue = []  # heap of (key, cell) entries, stale entries are skipped
+        self._queued = {}  # cell -> key of its live heap entry
+        self._push(self.goal)
+        self.expansions = 0  # Number of vertex expansions, useful to monitor replanning cost
+
+    def _heuristic(self, a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def _key(self, cell):
+        best = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return (best + self._heuristic(self.start, cell) + self.km, best)
+
+    def _push(self, cell):
+        key = self._key(cell)
+        self._queued[cell] = key
+        heapq.heappush(self._queue, (key, cell))
+
+    def _is_walkable(self, cell):
+        x, y = cell
+        return 0 <= x < self.width and 0 <= y < self.height and bool(self.walkable[y, x])
+
+    def _neighbours(self, cell):
+        x, y = cell
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                yield (nx, ny)
+
+    def _update_vertex(self, cell):
+        if cell != self.goal:
+            if self._is_walkable(cell):
+                self.rhs[cell] = min((1 + self.g.get(n, INF) for n in self._neighbours(cell)
+                                      if self.walkable[n[1], n[0]]), default=INF)
+            else:
+                self.rhs[cell] = INF
+        self._queued.pop(cell, None)
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            self._push(cell)
+
+    def _pop(self):
+        """Pop the lowest live heap entry, skipping stale ones."""
+        while self._queue:
+            key, cell = heapq.heappop(self._queue)
+            if self._queued.get(cell) == key:
+                del self._queued[cell]
+                return key, cell
+        return None, None
+
+    def _top_key(self):
+        while self._queue:
+            key, cell = self._queue[0]
+            if self._queued.get(cell) == key:
+                return key
+            heapq.heappop(self._queue)
+        return (INF, INF)
+
+    def compute_shortest_path(self):
+        """Expand vertices until the start cell is consistent."""
+        while (self._top_key() < self._key(self.start)
+               or self.rhs.get(self.start, INF) != self.g.get(self.start, INF)):
+            k_old, cell = self._pop()
+            if cell is None:
+                break
+            self.expansions += 1
+            k_new = self._key(cell)
+            if k_old < k_new:
+                self._queued[cell] = k_new
+                heapq.heappush(self._queue, (k_new, cell))
+            elif self.g.get(cell, INF) > self.rhs.get(cell, INF):
+                self.g[cell] = self.rhs[cell]
+                for neighbour in self._neighbours(cell):
+                    self._update_vertex(neighbour)
+            else:
+                self.g[cell] = INF
+                self._update_vertex(cell)
+                for neighbour in self._neighbours(cell):
+                    self._update_vertex(neighbour)
+
+    def move_start(self, position):
+        """Tell the planner the robot has moved; all search state is kept."""
+        self.start = (int(position[0]), int(position[1]))
+
+    def block_cells(self, cells):
+        """
+        Mark cells as blocked and update the affected vertices.
+
+        Parameters:
+        - cells (List[tuple]): (x, y) cells that cannot be traversed any more.
+        """
+        self._set_cells(cells, False)
+
+    def unblock_cells(self, cells):
+        """
+        Mark cells as free again and update the affected vertices.
+
+        Parameters:
+        - cells (List[tuple]): (x, y) cells that can be traversed again.
+        """
+        self._set_cells(cells, True)
+
+    def _set_cells(self, cells, walkable):
+        changed = []
+        for x, y in cells:
+            x, y = int(x), int(y)
+            if 0 <= x < self.width and 0 <= y < self.height and self.walkable[y, x] != walkable:
+                self.walkable[y, x] = walkable
+                changed.append((x, y))
+        if not changed:
+            return
+        # The key modifier must include the robot's movement since the last change
+        self.km += self._heuristic(self._last_start, self.start)
+        self._last_start = self.start
+        for cell in changed:
+            self._update_vertex(cell)
+            for neighbour in self._neighbours(cell):
+                self._update_vertex(neighbour)
+
+    def plan(self):
+        """
+        Repair the search and return the current shortest path.
+
+        Returns:
+        - List[tuple]: Cells from the start to the goal, or [start] if the goal is unreachable.
+        """
+        self.compute_shortest_path()
+        cell = self.start
+        path = [cell]
+        if self.g.get(cell, INF) == INF:
+            return path
+        while cell != self.goal and len(path) <= self.walkable.size:
+            cell = min((n for n in self._neighbours(cell) if self.walkable[n[1], n[0]]),
+                       key=lambda n: self.g.get(n, INF))
+            path.append(cell)
+        return path
@@ -4,6 +4,7 @@ import json
 import pathfinding.core.grid
 import pathfinding.finder.a_star
 import math
+from .incremental_planner import DStarLitePlanner
 class MobileObjectElement:
     """Base class for mobile objects in the simulation."""
     """Base (super) class for all mobile objects: InternalRobot,ExternalRobot,HumanTransportVehicle.
@@ -41,6 +42,21 @@ class MobileObjectElement:
         self.task_type = []
         # Store the mobile object type
         self.mobile_object_type = type
+        # Store the shared cooperative planner (None plans alone with A*)
+        self.planner = None
+        # Store the planner tick of the last step and the steps taken since the last plan
+        self._last_tick = None
+        self._steps_since_plan = 0
+        # Store whether paths are repaired incrementally (D* Lite) instead of re-planned from scratch
+        self.incremental_replanning = False
+        # Store the D* Lite planner of the current target and the original values of blocked map cells
+        self.incremental_planner = None
+        self._blocked_cells = {}
+        # Store the shared planning worker pool (None plans inside update) and the pending request
+        self.planning_pool = None
+        self.pending_path = None
+        # Store the ID of the map the mobile object plans on, used by the planning pool
+        self.track_id = None
         for key, value in kwargs.items():
             setattr(self, key, value)  # Dynamically set attributes for the object
     def __repr__(self):
@@ -82,25 +98,149 @@ class MobileObjectElement:
         Parameters:
         - target_position (tuple): Target position (x, y) for the mobile object.
         """
-        # Create a grid based on the mobile object's map
-        grid = pathfinding.core.grid.Grid(matrix=self.mobile_object_map)
-        # Identify the start node from the current position
-        start = grid.node(self.current_position[0], self.current_position[1])
-        # Identify the end node from the target position
-        end = grid.node(self.target_position[0], self.target_position[1])
-        # Use the A* algorithm to find the path
-        finder = pathfinding.finder.a_star.AStarFinder()
-        path_temp, _ = finder.find_path(start, end, grid)
-        # Convert the path to a list of (x, y) coordinates
-        path = [(node.x, node.y) for node in path_temp]
+        if self._uses_planning_pool():
+            # Hand the request to the worker pool; update() holds position until the path arrives
+            self._request_path()
+            print(f"Path requested for mobile object {self.tag} to target position {self.target_position}.")
+            return
+        path = self._compute_path()
         # Store the path in the object's attributes
         self.path = path
         # Update the status of the mobile object to "moving"
         self.current_status = "moving"
-        self.update()
+        # A single-cell path means the target is already reached; the next update handles the arrival
+        if len(self.path) > 1:
+            self.update()
         # Print a message indicating that the path has been planned
         print(f"Path planned for mobile object {self.tag} to target position {self.target_position}.")
 
+    def _uses_planning_pool(self):
+        """Plain A* requests go to the worker pool; cooperative and D* Lite planning stay in-process."""
+        return self.planning_pool is not None and self.planner is None and not self.incremental_replanning
+
+    def _request_path(self):
+        """Submit a planning request to the worker pool and hold position until it is done."""
+        self.pending_path = self.planning_pool.submit(self.track_id, self.current_position, self.target_position,
+                                                      blocked=list(self._blocked_cells))
+        self.path = [self.current_position]
+        self.current_status = "planning"
+
+    def _poll_pending_path(self):
+        """Take over the path from the worker pool once it is ready; never blocks."""
+        if not self.pending_path.done():
+            return
+        self.path = self.pending_path.result()
+        self.pending_path = None
+        self.current_status = "moving"
+        print(f"Path planned for mobile object {self.tag} to target position {self.target_position}.")
+
+    def _compute_path(self):
+        """
+        Compute a path from the current position to the target position with the planner
+        configured for this mobile object, without changing its status.
+        """
+        if self.planner is not None:
+            # Plan around the paths reserved by the other robots sharing the planner
+            path = self.planner.plan(self.element_id, self.current_position, self.target_position,
+                                     start_time=self._plan_start_time())
+            self._steps_since_plan = 0
+        elif self.incremental_replanning:
+            # Keep the D* Lite search state as long as the target stays the same
+            target = (int(self.target_position[0]), int(self.target_position[1]))
+            if self.incremental_planner is None or self.incremental_planner.goal != target:
+                self.incremental_planner = DStarLitePlanner(self.mobile_object_map, self.current_position, target)
+            else:
+                self.incremental_planner.move_start(self.current_position)
+            path = self.incremental_planner.plan()
+        else:
+            # Create a grid based on the mobile object's map
+            grid = pathfinding.core.grid.Grid(matrix=self.mobile_object_map)
+            # Identify the start node from the current position
+            start = grid.node(self.current_position[0], self.current_position[1])
+            # Identify the end node from the target position
+            end = grid.node(self.target_position[0], self.target_position[1])
+            # Use the A* algorithm to find the path
+            finder = pathfinding.finder.a_star.AStarFinder()
+            path_temp, _ = finder.find_path(start, end, grid)
+            # Convert the path to a list of (x, y) coordinates
+            path = [(node.x, node.y) for node in path_temp]
+        return path
+
+    def block_cells(self, cells):
+        """
+        Mark cells of the mobile object map as blocked (e.g. by a fire or a stalled rover)
+        and repair the current path if it is affected.
+
+        Parameters:
+        - cells (List[tuple]): (x, y) cells that cannot be traversed any more.
+        """
+        cells = [(int(x), int(y)) for x, y in cells]
+        if not self.mobile_object_map.flags.writeable:
+            # The map is shared with the other robots on the track, take a private copy
+            self.mobile_object_map = self.mobile_object_map.copy()
+        for x, y in cells:
+            if (x, y) not in self._blocked_cells:
+                # Remember the original value so the cell can be restored
+                self._blocked_cells[(x, y)] = self.mobile_object_map[y, x]
+                self.mobile_object_map[y, x] = 0
+        if self.incremental_planner is not None:
+            # The key modifier must account for the movement since the last plan before any key changes
+            self.incremental_planner.move_start(self.current_position)
+            self.incremental_planner.block_cells(cells)
+        blocked = set(cells)
+        if self.pending_path is not None or (self.path and any(cell in blocked for cell in self.path)):
+            self._repair_path()
+
+    def unblock_cells(self, cells):
+        """
+        Restore cells previously blocked with `block_cells` and let the incremental
+        planner take advantage of them.
+
+        Parameters:
+        - cells (List[tuple]): (x, y) cells that can be traversed again.
+        """
+        cells = [(int(x), int(y)) for x, y in cells]
+        for x, y in cells:
+            if (x, y) in self._blocked_cells:
+                self.mobile_object_map[y, x] = self._blocked_cells.pop((x, y))
+        if self.incremental_planner is not None:
+            self.incremental_planner.move_start(self.current_position)
+            self.incremental_planner.unblock_cells(cells)
+            # A freed cell may open a shorter route, which D* Lite finds cheaply
+            if self.current_status == "moving":
+                self._repair_path()
+
+    def set_track_map(self, track_map):
+        """
+        Drive on a new map of the track (e.g. after the track was edited in the workbook).
+        Cells blocked with `block_cells` stay blocked, and a mobile object on its way
+        re-plans its path on the new map.
+
+        Parameters:
+        - track_map (numpy.ndarray): New map, walkable where > 0 (may be shared and read-only).
+        """
+        blocked = list(self._blocked_cells)
+        self._blocked_cells = {}
+        self.mobile_object_map = track_map if not blocked else track_map.copy()
+        for x, y in blocked:
+            self._blocked_cells[(x, y)] = self.mobile_object_map[y, x]
+            self.mobile_object_map[y, x] = 0
+        self.incremental_planner = None  # Its search state belongs to the old map
+        self._repair_path()
+
+    def _repair_path(self):
+        """Re-plan the remaining path after a map change, if the mobile object is on its way."""
+        if self.current_status not in ("moving", "planning") or self.target_position is None:
+            return
+        if self._uses_planning_pool():
+            # Drop the outdated request, its result would be based on the old map
+            if self.pending_path is not None:
+                self.pending_path.cancel()
+            self._request_path()
+            return
+        self.path = self._compute_path()
+        print(f"Path repaired for mobile object {self.tag} to target position {self.target_position}.")
+
     def start(self):
         """
         Start the mobile object and set its status to "moving".
@@ -135,14 +275,14 @@ class MobileObjectElement:
         self.update_direction()
         if self.current_status == "moving":
             # Check if the mobile object has reached the target position
-            if self.current_position == self.path[-1] and self.current_task != None:
+            if len(self.path) == 1 and self.current_position == self.path[-1] and self.current_task != None:
                 # Update the current status to "idle"
                 self.current_status = "idle"
                 #print(f"Mobile object {self.tag} has reached the target position {self.target_position}.")
                 # Check if the mobile object has any target positions left
-                if len(self.target_list) > 1:
+                if len(self.target_list) > 0:
                     # Set the target position to the next element in the target list
-                    self.target_position = self.target_list[0]
+                    self.target_position = self.target_list.pop(0)
                     # Plan the path to the target position
                     self.path_planning()
                 else:
@@ -165,12 +305,25 @@ class MobileObjectElement:
                 self.tasks.pop(0)
                 
             else:
+                # With a cooperative planner the robot takes exactly one step per planner tick
+                if self.planner is not None and self._last_tick == self.planner.time:
+                    return
+                if self.planner is not None and self.planner.is_displaced(self.element_id):
+                    # A boxed-in robot took one of our reserved cells: plan again before stepping
+                    self.path = self.planner.plan(self.element_id, self.current_position, self.target_position,
+                                                  start_time=self._plan_start_time())
+                    self._steps_since_plan = 0
                 # Update the current position to the next position in the path
                 self.move()
                 # Remove the first position from the path
                 self.path.pop(0)
+                if self.planner is not None:
+                    self._cooperative_step()
                 # Print a message indicating that the mobile object is moving to the target position
                 #print(f"Mobile object {self.tag} is moving to target position {self.target_position}.")
+        elif self.current_status == "planning":
+            # Hold position while the worker pool computes the path
+            self._poll_pending_path()
         elif self.current_status == "idle":
             # Print a message indicating that the mobile object is idle
 
@@ -179,6 +332,30 @@ class MobileObjectElement:
             # Print a message indicating that the mobile object is not moving
             print(f"Mobile object {self.tag} is not moving.")
     
+    def _plan_start_time(self):
+        """
+        Return the planner tick at which the robot occupies its current position.
+        If the robot already stepped during the current tick it is there now, otherwise it
+        has been there since the previous tick.
+        """
+        if self._last_tick == self.planner.time:
+            return self.planner.time
+        return self.planner.time - 1
+
+    def _cooperative_step(self):
+        """
+        Book-keeping after a step taken with a cooperative planner.
+        Re-plans halfway through the reserved window so the robot always has reservations
+        ahead of it (WHCA*).
+        """
+        self._last_tick = self.planner.time
+        self._steps_since_plan += 1
+        replan_after = max(1, min(self.planner.window // 2, self.planner.reserved_steps(self.element_id)))
+        if self._steps_since_plan >= replan_after and len(self.path) > 1:
+            self.path = self.planner.plan(self.element_id, self.current_position, self.target_position,
+                                          start_time=self.planner.time)
+            self._steps_since_plan = 0
+
     def update_direction(self):
         self.direction_angle = 0
         if len(self.path) >= 2:
@@ -1,6 +1,7 @@
 from mobileobjects.mobileobject_elements import InternalRobotElement
+from environment.track_rasterizer import DEFAULT_TRACK_ID
 
-def configure_internal_robot_element(points, **kwargs):
+def configure_internal_robot_element(points, track_id=DEFAULT_TRACK_ID, **kwargs):
     """
     Configure an internal robot element with the given parameters.
     
@@ -11,6 +12,7 @@ def configure_internal_robot_element(points, **kwargs):
     - y_coord (float): Y-coordinate of the internal robot's position.
     - velocity (float): Velocity of the internal robot.
     - type (str): Type of the internal robot.
+    - track_id (str or List[str]): Track of all the robots, or of each robot in the order of `points`.
     - **kwargs: Additional keyword arguments for configuration.
     
     Returns:
@@ -18,10 +20,12 @@ def configure_internal_robot_element(points, **kwargs):
     """
     # Create and return an instance of InternalRobotElement with the provided parameters
     internal_robot_elements = []
-    for i, (x_coord, y_coord) in enumerate(points, start=1):
+    track_ids = [track_id] * len(points) if isinstance(track_id, str) else list(track_id)
+    for i, ((x_coord, y_coord), robot_track_id) in enumerate(zip(points, track_ids), start=1):
         element_id = f'InternalRobot_{i}'
         tag = f'IR_{i}'
         velocity = 1.0
-        internal_robot_elements.append(InternalRobotElement(element_id, tag, x_coord, y_coord, velocity, **kwargs))
+        internal_robot_elements.append(InternalRobotElement(element_id, tag, x_coord, y_coord, velocity,
+                                                            track_id=robot_track_id, **kwargs))
     return internal_robot_elements
     
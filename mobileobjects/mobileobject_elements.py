@@ -5,7 +5,8 @@ from pathfinding.finder.a_star import AStarFinder
 from .mobileobject_base import MobileObjectElement # Import the base class `EnvironmentElement` from the `environment_base` module in the same package.
 import pygame  # Import Pygame for rendering
 from typing import List  # Import List type for type hinting
-from sqlite_database.reader import get_internal_robot_track_map  # Import the function to get the internal robot track map from the database
+from .track_maps import TRACK_MAPS  # Shared track maps, loaded from the database on first use
+from environment.track_rasterizer import cell_to_world, DEFAULT_RESOLUTION_MM, DEFAULT_TRACK_ID
 
 class InternalRobotElement(MobileObjectElement):
     """
@@ -13,12 +14,13 @@ class InternalRobotElement(MobileObjectElement):
     Inherits from the MobileObjectElement class.
     """
 
-    def __init__(self, element_id, tag, x_coord, y_coord, velocity, **kwargs):
+    def __init__(self, element_id, tag, x_coord, y_coord, velocity, track_id=DEFAULT_TRACK_ID, **kwargs):
         """
         Initialize the InternalRobotElement with the given parameters.
 
         Parameters:
         - tag (str): Unique identifier for the internal robot.
+        - track_id (str): ID of the track the robot drives on.
         - mobile_object_map (numpy.ndarray): Map of the internal robot's environment.
         - target_list (List[tuple]): List of target positions for the internal robot.
         - current_position (tuple): Current position of the internal robot.
@@ -30,8 +32,10 @@ class InternalRobotElement(MobileObjectElement):
 
         # Initialize the base class with the given parameters
         super().__init__(element_id, tag, x_coord, y_coord, velocity, type, **kwargs)
-        # Initialize the internal robot's map
-        self.mobile_object_map = np.array(get_internal_robot_track_map('InternalRobotTrack_1'))
+        # Share the read-only map of the robot's track; block_cells copies it on first write
+        self.track_id = track_id
+        self.mobile_object_map = TRACK_MAPS.get(self.track_id)
+        self.resolution = DEFAULT_RESOLUTION_MM  # Cell size of the track map in mm
         self.icon = pygame.image.load('data/assets/internal_robot_icon.png')  # Load the robot icon image
         self.icon = pygame.transform.scale(self.icon, (32, 32))  # Scale the icon to a suitable size
        
@@ -44,15 +48,16 @@ class InternalRobotElement(MobileObjectElement):
         - scale: mm-to-pixel scaling factor
         """
 
-        # Draw the robot at its current position
-        x_px, y_px = self.current_position[0] * 2, self.current_position[1] * 2
+        # Draw the robot at the center of its current cell
+        x_px, y_px = transform_coords(*cell_to_world(self.current_position[0], self.current_position[1], self.resolution))
 
         # Calculate angle (optional, based on velocity or direction)
         if hasattr(self, "direction_angle"):
-            rotated_icon = pygame.transform.rotate(self.icon, -self.direction_angle)
+            # Map rows grow upwards like pygame angles, so the direction angle is used as is
+            rotated_icon = pygame.transform.rotate(self.icon, self.direction_angle)
         else:
             rotated_icon = self.icon
 
-        icon_rect = rotated_icon.get_rect(center=(x_px, y_px+25))
+        icon_rect = rotated_icon.get_rect(center=(x_px, y_px))
         screen.blit(rotated_icon, icon_rect)
 
@@ -0,0 +1,123 @@
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathfinding.core.grid import Grid
+from pathfinding.finder.a_star import AStarFinder
+
+"""
+Asynchronous path planning for mobile objects.
+
+Planning requests are sent to a pool of workers and return a `concurrent.futures.Future`
+that the mobile object polls from its `update()` method, so the simulation/render loop
+never waits for A*. Each worker receives the track maps once, when it starts, and keeps
+its own pathfinding grid per map between requests. The worker state is thread-local:
+A* writes its search state into the grid's nodes, so worker threads (and the threads of
+an executor replaced by `update_maps`) must never share a grid.
+"""
+
+# Per-worker state, filled in by _initialize_worker in the worker's own thread:
+# maps (map_id -> numpy map) and grids (map_id -> pathfinding Grid built from the map)
+_worker = threading.local()
+
+
+def _initialize_worker(maps):
+    """Store the track maps in the worker (runs once per worker process or thread), unpacking packed maps."""
+    _worker.maps = {map_id: np.asarray(track_map) for map_id, track_map in maps.items()}
+    _worker.grids = {}
+
+
+def _plan_path(map_id, start, goal, blocked):
+    """
+    Run A* in a worker.
+
+    Parameters:
+    - map_id (str): ID of the map to plan on.
+    - start (tuple): (x, y) start cell.
+    - goal (tuple): (x, y) target cell.
+    - blocked (tuple): (x, y) cells blocked on the requesting robot's own map.
+
+    Returns:
+    - List[tuple]: Path as (x, y) cells, empty if no path exists.
+    """
+    grid = _worker.grids.get(map_id)
+    if grid is None:
+        grid = Grid(matrix=_worker.maps[map_id])
+        _worker.grids[map_id] = grid
+    grid.cleanup()  # Reset the search state left by the previous request
+    nodes = [grid.node(x, y) for x, y in blocked]
+    walkable = [node.walkable for node in nodes]
+    for node in nodes:
+        node.walkable = False
+    try:
+        path, _ = AStarFinder().find_path(grid.node(*start), grid.node(*goal), grid)
+        return [(node.x, node.y) for node in path]
+    finally:
+        for node, was_walkable in zip(nodes, walkable):
+            node.walkable = was_walkable
+
+
+class PlanningPool:
+    """
+    Pool of path planning workers shared by the mobile objects.
+
+    Mobile objects with `planning_pool` set submit their planning requests here instead of
+    running A* inside `update()`.
+    """
+
+    def __init__(self, maps, max_workers=None, use_processes=True):
+        """
+        Parameters:
+        - maps (dict): map_id -> track map the workers plan on, a numpy.ndarray or a
+          PackedOccupancy (8 times smaller to send to the worker processes).
+        - max_workers (int): Number of workers, defaults to the number of CPUs minus one.
+        - use_processes (bool): Plan in worker processes (A* is pure Python, so threads
+          would compete with the simulation loop for the GIL). Threads are useful when
+          processes are not available; each thread plans on grids of its own.
+        """
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) - 1)
+        self.maps = dict(maps)
+        self.max_workers = max_workers
+        self.executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = self._start_workers()
+
+    def _start_workers(self):
+        return self.executor_class(max_workers=self.max_workers, initializer=_initialize_worker,
+                                   initargs=(dict(self.maps),))
+
+    def update_maps(self, maps):
+        """
+        Plan on new maps from now on (e.g. after a track was edited).
+
+        New workers are started with the updated maps; the old workers finish the requests
+        already submitted to them and then exit.
+
+        Parameters:
+        - maps (dict): map_id -> new track map, merged into the current maps.
+        """
+        self.maps.update(maps)
+        old_executor, self.executor = self.executor, self._start_workers()
+        old_executor.shutdown(wait=False)
+
+    def submit(self, map_id, start, goal, blocked=()):
+        """
+        Queue a planning request.
+
+        Parameters:
+        - map_id (str): ID of the map to plan on.
+        - start (tuple): (x, y) start cell.
+        - goal (tuple): (x, y) target cell.
+        - blocked (iterable): (x, y) cells to treat as blocked for this request.
+
+        Returns:
+        - concurrent.futures.Future: Resolves to the path as a list of (x, y) cells.
+        """
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        blocked = tuple((int(x), int(y)) for x, y in blocked)
+        return self.executor.submit(_plan_path, map_id, start, goal, blocked)
+
+    def shutdown(self, wait=True):
+        """Stop the workers, cancelling requests that have not started."""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
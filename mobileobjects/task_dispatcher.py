@@ -0,0 +1,213 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+"""
+Task dispatching for mobile objects.
+
+Pending target points (for example the superadobe designation points) are assigned to
+robots by solving a sequence of linear assignment problems over path lengths on the
+track. Each round gives every robot at most one more task and minimises the sum of the
+robots' completion times, which keeps both the total travel and the makespan low.
+Path lengths come from one compiled shortest-path call per target point and are cached,
+so re-dispatching after new tasks arrive only computes the rows of the new targets.
+"""
+
+# Cost used in place of inf for unreachable robot/task pairs, which are never assigned
+UNREACHABLE_COST = 1e12
+
+
+class TaskDispatcher:
+    """
+    Assigns target points to robots and feeds them to the robots' target lists.
+
+    The dispatcher owns the `target_list` of the robots it dispatches to: targets that a
+    robot has not started yet are taken back and re-assigned together with new tasks on
+    every `dispatch()` call. Targets already being driven to are never reassigned. After
+    the first `dispatch()`, adding or removing tasks re-dispatches to the same robots, so
+    idle robots pick up new work without another call.
+    """
+
+    def __init__(self, graph, task_name='designation'):
+        """
+        Parameters:
+        - graph (TrackGraph): Graph of the track the robots drive on (e.g. `CooperativePlanner.graph`).
+        - task_name (str): Task label given to robots started by the dispatcher.
+        """
+        self.graph = graph
+        self.task_name = task_name
+        self.pending = {}  # task_id -> (x, y) target waiting for a robot
+        self.queued = {}  # robot_id -> [(task_id, (x, y))] assigned but not started yet
+        self._distance_rows = {}  # (x, y) -> hop distances from that cell to every track node
+        self.last_total_travel = 0.0  # Travel (cells) of the last dispatch
+        self.last_makespan = 0.0  # Completion time (cells) of the busiest robot in the last dispatch
+        self.robots = []  # Robots of the last dispatch, re-dispatched to when tasks change
+        self.start = None  # Start callable of the last dispatch
+        self._cancelled = set()  # Removed tasks that may still be queued on a robot
+
+    def add_tasks(self, tasks, redispatch=True):
+        """
+        Add pending tasks (a task_id already known gets the new target).
+
+        Parameters:
+        - tasks (dict): task_id -> (x, y) target cell.
+        - redispatch (bool): Re-assign the tasks that have not been started to the robots of
+          the last dispatch right away; idle robots start on their new targets.
+
+        Returns:
+        - dict: Assignment of the re-dispatch (see `dispatch`), empty if none happened.
+        """
+        for task_id, point in tasks.items():
+            self.pending[task_id] = (int(point[0]), int(point[1]))
+            self._cancelled.discard(task_id)
+        return self.redispatch() if redispatch and tasks else {}
+
+    def remove_tasks(self, task_ids, redispatch=True):
+        """
+        Drop tasks that have not been started (e.g. the designation points of removed superadobes).
+
+        Parameters:
+        - task_ids (Iterable[str]): Tasks to drop; a task already being driven to is finished.
+        - redispatch (bool): Take the dropped tasks off the robots' target lists right away.
+
+        Returns:
+        - dict: Assignment of the re-dispatch (see `dispatch`), empty if none happened.
+        """
+        task_ids = set(task_ids)
+        for task_id in task_ids:
+            self.pending.pop(task_id, None)
+        queued = {task_id for tasks in self.queued.values() for task_id, _ in tasks}
+        self._cancelled.update(task_ids & queued)
+        return self.redispatch() if redispatch and task_ids & queued else {}
+
+    def redispatch(self):
+        """Dispatch again to the robots of the last `dispatch()` call, if there was one."""
+        if not self.robots:
+            return {}
+        return self.dispatch(self.robots, self.start)
+
+    def set_graph(self, graph):
+        """Assign on a new track graph (e.g. after the track was edited); cached distances are dropped."""
+        self.graph = graph
+        self._distance_rows = {}
+
+    def _rows(self, points):
+        """Return the cached distance rows of the given points, computing missing ones in one call."""
+        missing = list(dict.fromkeys(point for point in points if point not in self._distance_rows))
+        if missing:
+            for point, row in zip(missing, self.graph.distances(missing)):
+                self._distance_rows[point] = row
+        return np.array([self._distance_rows[point] for point in points])
+
+    def _reclaim(self, robot):
+        """Take back the targets queued on a robot that it has not started yet."""
+        queued = self.queued.pop(robot.element_id, [])
+        left = len(robot.target_list)
+        not_started = queued[len(queued) - left:] if left else []
+        for task_id, point in not_started:
+            if task_id not in self._cancelled:
+                self.pending.setdefault(task_id, point)  # A task added again keeps its new target
+        robot.target_list = []
+
+    def _robot_state(self, robot):
+        """Return (cell the robot will be free at, ticks until it is free)."""
+        if robot.current_task is not None and robot.current_status in ("moving", "planning") and robot.target_position is not None:
+            target = (int(robot.target_position[0]), int(robot.target_position[1]))
+            if robot.current_status == "moving" and robot.path:
+                return target, float(len(robot.path) - 1)
+            return target, self.graph.path_length(robot.current_position, target)
+        position = (int(robot.current_position[0]), int(robot.current_position[1]))
+        return position, 0.0
+
+    def assign(self, robots):
+        """
+        Solve the assignment of all pending tasks to the robots without touching the robots.
+
+        Parameters:
+        - robots (List[MobileObjectElement]): Robots available for the tasks.
+
+        Returns:
+        - dict: robot_id -> [(task_id, (x, y))] in driving order. Tasks that no robot can
+          reach stay pending.
+        """
+        assignment = {robot.element_id: [] for robot in robots}
+        task_ids = list(self.pending)
+        if not robots or not task_ids:
+            self.last_total_travel = 0.0
+            self.last_makespan = 0.0
+            return assignment
+        points = [self.pending[task_id] for task_id in task_ids]
+        rows = self._rows(points)  # (tasks, nodes)
+        task_nodes = np.array([self.graph.node(point) for point in points])
+
+        states = [self._robot_state(robot) for robot in robots]
+        robot_nodes = np.array([self.graph.node(position) for position, _ in states])
+        ready = np.array([ticks for _, ticks in states], dtype=float)
+        start_ready = ready.copy()
+        # Travel from each robot's start cell and from each task cell to every task
+        start_travel = rows[:, robot_nodes].T  # (robots, tasks)
+        start_travel[robot_nodes < 0, :] = np.inf  # Robots off the track cannot reach anything
+        task_travel = rows[:, task_nodes].T  # (tasks, tasks), row = from, column = to
+        task_travel[task_nodes < 0, :] = np.inf
+        at_task = np.full(len(robots), -1)  # Task each robot finished last, -1 while at its start cell
+        remaining = np.arange(len(task_ids))
+        while len(remaining):
+            # Completion time of every robot for every remaining task
+            travel = np.where(at_task[:, None] >= 0, task_travel[at_task][:, remaining], start_travel[:, remaining])
+            cost = ready[:, None] + travel
+            feasible = np.isfinite(cost)
+            if not feasible.any():
+                break
+            robot_idx, task_idx = linear_sum_assignment(np.where(feasible, cost, UNREACHABLE_COST))
+            chosen = feasible[robot_idx, task_idx]
+            robot_idx, task_idx = robot_idx[chosen], task_idx[chosen]
+            for r, c in zip(robot_idx, task_idx):
+                task = remaining[c]
+                assignment[robots[r].element_id].append((task_ids[task], points[task]))
+                ready[r] = cost[r, c]
+                at_task[r] = task
+            remaining = np.delete(remaining, task_idx)
+
+        self.last_total_travel = float(np.sum(ready - start_ready))
+        self.last_makespan = float(ready.max())
+        for tasks in assignment.values():
+            for task_id, _ in tasks:
+                del self.pending[task_id]
+        return assignment
+
+    def dispatch(self, robots, start=None):
+        """
+        Re-assign every task that has not been started and hand the targets to the robots.
+
+        Robots that are not working on a task (idle, or driving home) are started on their
+        first new target right away.
+
+        Parameters:
+        - robots (List[MobileObjectElement]): Robots managed by the dispatcher.
+        - start (callable): Called with each robot to start, defaults to `robot.start()`
+          (e.g. `MobileObjectAgent.start` for robots driven by an `EventKernel`).
+
+        Returns:
+        - dict: robot_id -> [(task_id, (x, y))] assigned in this call.
+        """
+        self.robots = list(robots)
+        self.start = start
+        for robot in robots:
+            self._reclaim(robot)
+        self._cancelled.clear()
+        assignment = self.assign(robots)
+        for robot in robots:
+            tasks = assignment[robot.element_id]
+            if not tasks:
+                continue
+            self.queued[robot.element_id] = tasks
+            robot.target_list = [point for _, point in tasks]
+            if robot.current_task is None:
+                if not robot.tasks:
+                    robot.tasks = [self.task_name]
+                if start is None:
+                    robot.start()
+                else:
+                    start(robot)
+        print(f"Dispatched {sum(len(tasks) for tasks in assignment.values())} tasks, "
+              f"makespan {self.last_makespan:.0f}, total travel {self.last_total_travel:.0f}.")
+        return assignment
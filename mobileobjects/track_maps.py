@@ -0,0 +1,91 @@
+import weakref
+from collections import OrderedDict
+
+from sqlite_database.reader import get_internal_robot_track_map, get_internal_robot_track_timestamp
+from environment.packed_occupancy import PackedOccupancy
+
+"""
+Shared, lazily loaded track maps of the mobile objects.
+
+A base can have many separate track networks, and robots only need the map of the track
+they are bound to. `TrackMapStore.get()` loads a map from the `internal_robot_tracks`
+table on first use and hands the same read-only array to every robot on that track.
+The store keeps every loaded map bit-packed (one bit per cell); the unpacked arrays stay
+in memory while a robot (or planner) still references them, plus the few most recently
+used ones, and the others are evicted and unpacked again if they are needed later.
+Every request compares the timestamp of the stored row with the one the map was loaded
+at, so a track saved again (e.g. by the workbook reload) is read again on its next use.
+"""
+
+
+class TrackMapStore:
+    """Loads track maps by track ID on first use and evicts the maps nobody uses."""
+
+    def __init__(self, loader=lambda track_id: get_internal_robot_track_map(track_id, packed=True), max_unused=2,
+                 version=get_internal_robot_track_timestamp):
+        """
+        Parameters:
+        - loader (callable): Function track_id -> map (PackedOccupancy or numpy.ndarray),
+          None if the track does not exist.
+        - max_unused (int): Number of recently used maps kept even when no robot references them.
+        - version (callable): Function track_id -> version of the stored map (its timestamp);
+          a loaded map is read again once the version changes. None never reads a map again.
+        """
+        self.loader = loader
+        self.max_unused = max_unused
+        self.version = version
+        self._packed = {}  # track_id -> (version, PackedOccupancy) of every map loaded so far
+        self._live = weakref.WeakValueDictionary()  # track_id -> unpacked map still referenced somewhere
+        self._recent = OrderedDict()  # track_id -> map, the most recently requested maps
+        self.loads = 0  # Number of maps read through the loader
+
+    def get(self, track_id):
+        """
+        Return the map of a track, indexed [y, x] and walkable where > 0.
+
+        The array is shared and read-only: copy it before modifying it.
+        """
+        packed_map = self.packed(track_id)  # Drops the unpacked map too if the stored one changed
+        track_map = self._live.get(track_id)
+        if track_map is None:
+            track_map = packed_map.unpack()
+            track_map.setflags(write=False)
+            self._live[track_id] = track_map
+        self._recent[track_id] = track_map
+        self._recent.move_to_end(track_id)
+        while len(self._recent) > self.max_unused:
+            self._recent.popitem(last=False)  # Freed once no robot references it any more
+        return track_map
+
+    def packed(self, track_id):
+        """Return the bit-packed map of a track, e.g. to send it to planning workers."""
+        version = self.version(track_id) if self.version is not None else None
+        entry = self._packed.get(track_id)
+        if entry is not None and entry[0] != version:
+            self.invalidate(track_id)  # Saved again since it was loaded
+            entry = None
+        if entry is None:
+            packed_map = self.loader(track_id)
+            if packed_map is None:
+                raise KeyError(f"No map stored for track {track_id}.")
+            if not isinstance(packed_map, PackedOccupancy):
+                packed_map = PackedOccupancy.from_array(packed_map)
+            entry = self._packed[track_id] = (version, packed_map)
+            self.loads += 1
+        return entry[1]
+
+    def loaded(self):
+        """Return the IDs of the tracks whose unpacked map is currently in memory."""
+        return list(self._live.keys())
+
+    def invalidate(self, track_id=None):
+        """Forget a stored map (all maps for None), e.g. after its track was edited; robots keep their arrays."""
+        track_ids = list(self._packed) if track_id is None else [track_id]
+        for stale_id in track_ids:
+            self._packed.pop(stale_id, None)
+            self._live.pop(stale_id, None)
+            self._recent.pop(stale_id, None)
+
+
+# Store shared by the robots of the simulation
+TRACK_MAPS = TrackMapStore()
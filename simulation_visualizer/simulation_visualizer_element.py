@@ -41,6 +41,26 @@ class SimulationVisualizer:
         
         print("Static environment rendered and cached.")
 
+    def rerender_static_regions(self, world_boxes, elements: List[EnvironmentElement]):
+        """
+        Redraw only some regions of the cached env_surface (e.g. after a workbook reload).
+
+        Parameters:
+        - world_boxes (array-like): (min_x, min_y, max_x, max_y) boxes in mm to redraw.
+        - elements (List[EnvironmentElement]): Static elements that may be drawn in these
+          regions, in drawing order; pygame clips everything outside the region.
+        """
+        margin = 4  # Outlines are drawn up to 3 px wide
+        for min_x, min_y, max_x, max_y in world_boxes:
+            left, bottom = self.transform_coords(min_x, min_y)
+            right, top = self.transform_coords(max_x, max_y)
+            region = pygame.Rect(left - margin, top - margin, right - left + 2 * margin, bottom - top + 2 * margin)
+            self.env_surface.set_clip(region)
+            self.env_surface.fill((0, 0, 0))  # fill() only clears the clip region
+            for element in elements:
+                element.render(self.env_surface, self.transform_coords, self.scale)
+        self.env_surface.set_clip(None)
+
     def render_frame(self, dynamic_elements: List['EnvironmentElement']):
         """Draw dynamic elements like robots onto the main screen"""
         self.clock.tick(30)
@@ -0,0 +1,99 @@
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+"""
+Long-lived SQLite connections for the Lunar Base simulation database.
+
+Every thread gets one connection to the database, opened on first use and kept open, so
+the readers and writers no longer pay for a connect on each call. Keeping the connection
+also keeps its prepared statements: sqlite3 caches the compiled statements of each
+connection in an LRU of `cached_statements` entries (passed to `sqlite3.connect`), keyed
+by the exact SQL text, so the module's fixed queries are compiled once per thread instead
+of on every call. The database runs in WAL mode so readers never block the writer. All
+connections are closed by `close()`, which also runs at interpreter exit.
+"""
+
+DEFAULT_DB_PATH = 'data/lunar_base_sim.db'
+
+
+class ConnectionManager:
+    """Per-thread connections to one SQLite database file."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, cached_statements=256, timeout=30.0):
+        """
+        Parameters:
+        - db_path (str): Path to the SQLite database file.
+        - cached_statements (int): Number of prepared statements cached per connection.
+        - timeout (float): Seconds to wait for a lock held by another connection.
+        """
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []  # Every open connection, so close() can reach other threads' connections
+        self._generation = 0  # Bumped by close() so threads reopen with the current path
+
+    def _open(self):
+        # check_same_thread=False only so that close() may run on another thread; each
+        # connection is otherwise used by the thread that opened it
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, cached_statements=self.cached_statements,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, and avoids an fsync per commit
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self):
+        """Return the connection of the calling thread, opening it on first use."""
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            local.connection = self._open()
+            local.generation = self._generation
+        return local.connection
+
+    def execute(self, sql, parameters=()):
+        """Execute one statement on the calling thread's connection and return the cursor."""
+        return self.connection().execute(sql, parameters)
+
+    @contextmanager
+    def transaction(self):
+        """Context manager yielding the connection; commits on success, rolls back on error."""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def configure(self, db_path):
+        """Use another database file; open connections are closed first."""
+        self.close()
+        self.db_path = db_path
+
+    def close(self):
+        """Commit and close every connection opened by the manager."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.commit()
+                conn.close()
+            except sqlite3.Error as error:
+                print(f"Could not close a database connection: {error}")
+
+
+# Connections shared by the readers, writers and schema of the simulation
+DATABASE = ConnectionManager()
+atexit.register(DATABASE.close)
+
+
+def get_connection():
+    """Return the calling thread's connection to the simulation database."""
+    return DATABASE.connection()
+
+
+def configure_database(db_path):
+    """Point the simulation at another database file (e.g. one per experiment)."""
+    DATABASE.configure(db_path)
@@ -0,0 +1,100 @@
+import numpy as np
+
+from .connection import get_connection
+
+"""
+Column queries on the simulation database that return NumPy arrays.
+
+Analytics over a base layout usually need a few columns of many rows ("all superadobe
+centers", "all target points"). These functions read them straight from the numeric
+columns of the schema, without decoding JSON or building DataFrames, and return one
+NumPy array per column.
+"""
+
+ELEMENT_COLUMNS = ('id', 'tag', 'class_name', 'x', 'y', 'length', 'width', 'radius', 'center_x', 'center_y')
+_TEXT_COLUMNS = ('id', 'tag', 'class_name')
+# IDs are '<prefix>_<number>': order by prefix, then numerically (Superadobe_2 before Superadobe_10)
+_ID_ORDER = " ORDER BY substr(id, 1, instr(id, '_')), CAST(substr(id, instr(id, '_') + 1) AS INTEGER), id"
+
+
+def fetch_columns(sql, parameters=(), columns=None, database=None):
+    """
+    Run a query and return its result column by column.
+
+    Parameters:
+    - sql (str): SELECT statement.
+    - parameters (tuple): Statement parameters.
+    - columns (List[str]): Names of the selected columns, defaults to the names SQLite reports.
+    - database (ConnectionManager): Database to query, the simulation database by default.
+
+    Returns:
+    - dict: Column name -> NumPy array. Text columns are object arrays, integer columns
+      without NULL int64, the others float64 with NaN for NULL.
+    """
+    cursor = (get_connection() if database is None else database.connection()).execute(sql, parameters)
+    names = columns or [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    result = {}
+    for index, name in enumerate(names):
+        values = [row[index] for row in rows]
+        if name in _TEXT_COLUMNS or any(isinstance(value, (str, bytes)) for value in values):
+            result[name] = np.array(values, dtype=object)
+        elif values and all(isinstance(value, int) for value in values):
+            result[name] = np.array(values, dtype=np.int64)
+        else:
+            result[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    return result
+
+
+def get_element_columns(class_name=None, columns=ELEMENT_COLUMNS):
+    """
+    Return columns of the environment elements, optionally of one class only.
+
+    Parameters:
+    - class_name (str): Class of the elements (e.g. 'Superadobe'), None for all elements.
+    - columns (tuple): Columns of environment_objects to return.
+
+    Returns:
+    - dict: Column name -> NumPy array, rows ordered by element ID (numbers in numeric order).
+    """
+    unknown = [name for name in columns if name not in ELEMENT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown environment_objects columns: {unknown}")
+    sql = f"SELECT {', '.join(columns)} FROM environment_objects"
+    parameters = ()
+    if class_name is not None:
+        sql += " WHERE class_name = ?"  # Uses idx_environment_objects_class_name
+        parameters = (class_name,)
+    return fetch_columns(sql + _ID_ORDER, parameters, list(columns))
+
+
+def get_element_centers(class_name=None):
+    """
+    Return the centers of the environment elements, optionally of one class only.
+
+    Returns:
+    - tuple: (IDs as an object array, (n, 2) float array of (x, y) centers in mm).
+    """
+    table = get_element_columns(class_name, ('id', 'center_x', 'center_y'))
+    return table['id'], np.column_stack((table['center_x'], table['center_y']))
+
+
+def get_target_points(id_prefix=None):
+    """
+    Return the designation target points, optionally only those whose ID starts with a prefix.
+    Points without a stored cell (NULL x or y, e.g. rows whose JSON point could not be
+    migrated) are left out.
+
+    Parameters:
+    - id_prefix (str): Prefix of the IDs, e.g. 'superadobe_'.
+
+    Returns:
+    - tuple: (IDs as an object array, (n, 2) int array of (x, y) track cells), ordered by ID.
+    """
+    sql = "SELECT id, x, y FROM internal_robot_target_points WHERE x IS NOT NULL AND y IS NOT NULL"
+    parameters = ()
+    if id_prefix is not None:
+        sql += " AND substr(id, 1, ?) = ?"
+        parameters = (len(id_prefix), id_prefix)
+    table = fetch_columns(sql + _ID_ORDER, parameters, ['id', 'x', 'y'])
+    return table['id'], np.column_stack((table['x'], table['y'])).astype(np.int64)
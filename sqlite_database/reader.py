@@ -3,52 +3,61 @@ import json
 import numpy as np
 import io
 import pandas as pd
+from environment.packed_occupancy import PackedOccupancy
+from .connection import get_connection
 
 """
 This module provides functions to interact with the lunar base simulation database.
 """
 
 def get_all_environment_elements():
-    db_path='data/lunar_base_sim.db'
     """
     Fetches all environment elements from the database and returns them as a pandas DataFrame.
 
-    Args:
-        db_path (str): Path to the SQLite database file.
-
     Returns:
         pandas.DataFrame: A DataFrame representation of all rows in the environment_objects table.
     """
 
-    conn = sqlite3.connect(db_path)
     query = "SELECT * FROM environment_objects"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = pd.read_sql_query(query, get_connection())
 
     return df
 
-def get_internal_robot_track_map(track_id):
-
-    db_path='data/lunar_base_sim.db'
-    
+def get_internal_robot_track_map(track_id, packed=False):
     """
     Fetches a specific internal rover track by its ID from the database.
 
+    The map is decoded on every call; robots share the decoded maps through
+    mobileobjects.track_maps.TRACK_MAPS, which reads a map again only when its
+    timestamp (see get_internal_robot_track_timestamp) changed.
+
     Args:
-        track_id (int): The ID of the rover track to fetch.
-        db_path (str): Path to the SQLite database file.
+        track_id (str): The ID of the rover track to fetch.
+        packed (bool): Return the bit-packed map instead of unpacking it.
 
     Returns:
-        list: A list of tuples representing the rows in the internal_rover_tracks table with the specified ID.
+        numpy.ndarray or PackedOccupancy: The track map indexed [y, x], 1 on the track, or
+        None if the track is not stored. Maps stored as .npy by older versions are read too.
     """
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT final_map FROM internal_robot_tracks WHERE id = ?", (track_id,))
+    cursor = get_connection().execute("SELECT final_map FROM internal_robot_tracks WHERE id = ?", (track_id,))
     row = cursor.fetchone()
     if row and row[0]:
-        buffer = io.BytesIO(row[0])
-        return np.load(buffer)
+        track_map = PackedOccupancy.from_bytes(row[0])
+        return track_map if packed else track_map.unpack()
+
+def get_internal_robot_track_timestamp(track_id):
+    """
+    Fetches the time a rover track was last saved, without reading its map.
+
+    Args:
+        track_id (str): The ID of the rover track.
+
+    Returns:
+        str or None: Millisecond timestamp of the stored row, None if the track is not stored.
+    """
+    row = get_connection().execute("SELECT timestamp FROM internal_robot_tracks WHERE id = ?", (track_id,)).fetchone()
+    return row[0] if row else None
 
 # Define a function to get the designation targets points for the robots
 def get_designation_targets_points(superadobe_id):
@@ -59,14 +68,10 @@ def get_designation_targets_points(superadobe_id):
         superadobe_id (str): The ID of the superadobe element.
 
     Returns:
-        dict or None: A dictionary of the target point if found, otherwise None.
+        list or None: The [x, y] target cell if found, otherwise None.
     """
-    db_path = 'data/lunar_base_sim.db'
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT point FROM internal_robot_target_points WHERE id = ? LIMIT 1", (superadobe_id,))
+    cursor = get_connection().execute("SELECT x, y FROM internal_robot_target_points WHERE id = ? LIMIT 1", (superadobe_id,))
     row = cursor.fetchone()
-    conn.close()
     if row:
-        return json.loads(row[0])
+        return list(row)
     return None
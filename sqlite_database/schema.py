@@ -1,15 +1,19 @@
 import sqlite3
+from .connection import get_connection, configure_database
 """This module initializes the SQLite database schema for the Lunar Base simulation."""
 
-def initialize_schema():
+def initialize_schema(db_path=None):
     """
     Initialize the SQLite database schema for the Lunar Base simulation.
     This function creates the necessary tables for storing environment objects and internal rover tracks.
     Args:
-        db_path (str): Path to the SQLite database file. Defaults to 'lunar_base_sim.db'.
+        db_path (str): Path to the SQLite database file, to switch the shared connections to it.
+            Defaults to the current database ('data/lunar_base_sim.db' unless configured).
     """
+    if db_path is not None:
+        configure_database(db_path)
     # Connect to the SQLite database (or create it if it doesn't exist)
-    conn = sqlite3.connect('data/lunar_base_sim.db')
+    conn = get_connection()
     # Create a cursor object to interact with the database
     c = conn.cursor()
 
@@ -25,10 +29,21 @@ def initialize_schema():
             width REAL,
             radius REAL,
             center TEXT,
+            center_x REAL,
+            center_y REAL,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
 
+    # Create a table to store each class's attributes and methods with their definitions
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS class_definitions (
+            class_name TEXT PRIMARY KEY,
+            attributes TEXT,
+            methods TEXT
+        )
+    ''')
+
     # Create a table for storing internal robots tracks including the final map value
     c.execute('''
         CREATE TABLE IF NOT EXISTS internal_robot_tracks (
@@ -41,6 +56,83 @@ def initialize_schema():
 
     # Execute an SQL query to insert or replace the element into the environment_objects table
    
-    c.execute("CREATE TABLE IF NOT EXISTS  internal_robot_target_points (id TEXT PRIMARY KEY, point TEXT)")
+    c.execute("CREATE TABLE IF NOT EXISTS  internal_robot_target_points (id TEXT PRIMARY KEY, point TEXT, x INTEGER, y INTEGER)")
+
+    # Databases created before the numeric center and point columns get them, filled from the JSON text
+    if _add_missing_columns(c, 'environment_objects', {'center_x': 'REAL', 'center_y': 'REAL'}):
+        c.execute("""
+            UPDATE environment_objects
+            SET center_x = json_extract(center, '$[0]'), center_y = json_extract(center, '$[1]')
+            WHERE json_valid(center) AND json_type(center) = 'array'
+        """)
+    if _add_missing_columns(c, 'internal_robot_target_points', {'x': 'INTEGER', 'y': 'INTEGER'}):
+        c.execute("""
+            UPDATE internal_robot_target_points
+            SET x = json_extract(point, '$[0]'), y = json_extract(point, '$[1]')
+            WHERE json_valid(point) AND json_type(point) = 'array'
+        """)
+    # Elements are queried by class (e.g. all superadobes)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_environment_objects_class_name ON environment_objects (class_name)")
+    initialize_telemetry_schema(conn)
+    conn.commit()
+
+
+def initialize_telemetry_schema(conn):
+    """
+    Create the tables of the run telemetry (see sqlite_database.telemetry).
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS telemetry_runs (
+            run_id TEXT PRIMARY KEY,
+            description TEXT,
+            started_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # One row per robot per tick
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS robot_telemetry (
+            run_id TEXT,
+            tick INTEGER,
+            robot_id TEXT,
+            x REAL,
+            y REAL,
+            status TEXT,
+            wall_time REAL
+        )
+    ''')
+    # One row per tick of the fire field
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS field_telemetry (
+            run_id TEXT,
+            tick INTEGER,
+            fire_count INTEGER,
+            max_temperature REAL,
+            mean_temperature REAL,
+            wall_time REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_robot_telemetry_run_tick ON robot_telemetry (run_id, tick)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_field_telemetry_run_tick ON field_telemetry (run_id, tick)")
     conn.commit()
-    conn.close()
\ No newline at end of file
+
+
+def _add_missing_columns(cursor, table, columns):
+    """
+    Add the columns missing from an existing table.
+
+    Parameters:
+    - cursor (sqlite3.Cursor): Cursor of the database.
+    - table (str): Table name.
+    - columns (dict): Column name -> SQL type.
+
+    Returns:
+    - bool: True if any column was added.
+    """
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    missing = [name for name in columns if name not in existing]
+    for name in missing:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}")
+    return bool(missing)
\ No newline at end of file
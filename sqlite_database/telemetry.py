@@ -0,0 +1,243 @@
+import atexit
+import queue
+import threading
+import time
+import uuid
+
+from .connection import DATABASE, ConnectionManager
+from .schema import initialize_telemetry_schema
+from .queries import fetch_columns
+
+"""
+Telemetry of simulation runs.
+
+The simulation loop pushes per-tick records (robot positions and statuses, fire counts and
+temperatures) into an in-memory queue with `TelemetryRecorder.record_*`; these calls never
+touch the disk and never block. A background thread takes the records off the queue and
+writes them to the telemetry tables in batched transactions. Every run has its own run ID,
+and `load_robot_telemetry` / `load_field_telemetry` read a run back (optionally a tick
+range) as NumPy columns, from the simulation database or from the `db_path` the run was
+recorded to.
+"""
+
+_STOP = object()  # Queue sentinel asking the writer thread to finish
+
+_ROBOT_INSERT = "INSERT INTO robot_telemetry (run_id, tick, robot_id, x, y, status, wall_time) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_FIELD_INSERT = ("INSERT INTO field_telemetry (run_id, tick, fire_count, max_temperature, mean_temperature, wall_time) "
+                 "VALUES (?, ?, ?, ?, ?, ?)")
+
+
+class TelemetryRecorder:
+    """Queues telemetry records and writes them from a background thread."""
+
+    def __init__(self, run_id=None, description='', db_path=None, batch_size=1000, flush_interval=0.5, max_queue=200000):
+        """
+        Parameters:
+        - run_id (str): ID of the run, a new unique ID by default.
+        - description (str): Free text stored with the run.
+        - db_path (str): Database file, defaults to the simulation database.
+        - batch_size (int): Maximum number of records written per transaction.
+        - flush_interval (float): Seconds the writer waits to fill a batch before writing it.
+        - max_queue (int): Queued record batches (one per record_* call) kept in memory at
+          most; beyond that new records are dropped (and counted in `dropped`) rather than
+          blocking the simulation.
+        """
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.description = description
+        self.database = DATABASE if db_path is None else ConnectionManager(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._count_lock = threading.Lock()  # Guards the counters, updated from the writer and recording threads
+        self.dropped = 0  # Records lost because the queue was full
+        self.written = 0  # Records written to the database
+        self.closed = False
+        self._thread = threading.Thread(target=self._write_loop, name=f"telemetry-{self.run_id}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)  # Unregistered by close(), so closed recorders can be freed
+
+    def _put(self, kind, rows):
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait((kind, rows))
+        except queue.Full:
+            with self._count_lock:
+                self.dropped += len(rows)
+
+    def record_robots(self, tick, robots):
+        """
+        Queue the position and status of mobile objects.
+
+        Parameters:
+        - tick (int): Simulation tick.
+        - robots (List[MobileObjectElement]): Robots with `element_id`, `current_position` and `current_status`.
+        """
+        now = time.time()
+        self._put(_ROBOT_INSERT, [(self.run_id, int(tick), robot.element_id, float(robot.current_position[0]),
+                                   float(robot.current_position[1]), robot.current_status, now) for robot in robots])
+
+    def record_positions(self, tick, positions, robot_ids=None, statuses=None):
+        """
+        Queue robot positions given as plain sequences (e.g. robots of the fire experiments).
+
+        Parameters:
+        - tick (int): Simulation tick.
+        - positions (array-like): (n, 2) positions.
+        - robot_ids (List[str]): ID of each robot, 'robot_<i>' by default.
+        - statuses (List[str]): Status of each robot, empty by default.
+        """
+        now = time.time()
+        rows = []
+        for index, (x, y) in enumerate(positions):
+            robot_id = robot_ids[index] if robot_ids is not None else f"robot_{index}"
+            status = statuses[index] if statuses is not None else ''
+            rows.append((self.run_id, int(tick), robot_id, float(x), float(y), status, now))
+        self._put(_ROBOT_INSERT, rows)
+
+    def record_field(self, tick, fire_count, max_temperature, mean_temperature=None):
+        """
+        Queue the state of the fire field.
+
+        Parameters:
+        - tick (int): Simulation tick.
+        - fire_count (int): Number of burning fires.
+        - max_temperature (float): Highest temperature of the field.
+        - mean_temperature (float): Mean temperature of the field.
+        """
+        self._put(_FIELD_INSERT, [(self.run_id, int(tick), int(fire_count), float(max_temperature),
+                                   None if mean_temperature is None else float(mean_temperature), time.time())])
+
+    def _write(self, conn, batches):
+        """Write queued records, grouped by statement, in one transaction."""
+        rows_by_statement = {}
+        for statement, rows in batches:
+            rows_by_statement.setdefault(statement, []).extend(rows)
+        with conn:
+            for statement, rows in rows_by_statement.items():
+                conn.executemany(statement, rows)
+        with self._count_lock:
+            self.written += sum(len(rows) for rows in rows_by_statement.values())
+
+    def _write_loop(self):
+        conn = self.database.connection()  # This thread's own connection
+        initialize_telemetry_schema(conn)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO telemetry_runs (run_id, description) VALUES (?, ?)",
+                         (self.run_id, self.description))
+        stopping = False
+        while not stopping:
+            batches, count = [], 0
+            deadline = time.monotonic() + self.flush_interval
+            # Collect records until the batch is full or the flush interval has passed
+            while count < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.001))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batches.append(item)
+                count += len(item[1])
+            if batches:
+                try:
+                    self._write(conn, batches)
+                except Exception as error:
+                    print(f"Telemetry write failed, {count} records lost: {error}")
+                for _ in batches:
+                    self._queue.task_done()
+        # close() only queues the sentinel once recording has stopped, so nothing is left behind it
+
+    def flush(self):
+        """Block until every record queued so far is written (for analysis scripts, never in the simulation loop)."""
+        self._queue.join()
+
+    def close(self):
+        """Write the remaining records and stop the writer thread."""
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.database is not DATABASE:
+            self.database.close()
+        if self.dropped:
+            print(f"Telemetry of run {self.run_id}: {self.dropped} records dropped (queue full).")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _fetch(sql, parameters, columns, db_path):
+    """Run a telemetry query on the simulation database, or on the database file of a recorder."""
+    if db_path is None:
+        return fetch_columns(sql, parameters, columns)
+    database = ConnectionManager(db_path)
+    try:
+        return fetch_columns(sql, parameters, columns, database=database)
+    finally:
+        database.close()
+
+
+def _run_query(table, columns, run_id, start_tick, end_tick, extra_filter=None, db_path=None):
+    sql = f"SELECT {', '.join(columns)} FROM {table} WHERE run_id = ?"
+    parameters = [run_id]
+    if start_tick is not None:
+        sql += " AND tick >= ?"
+        parameters.append(start_tick)
+    if end_tick is not None:
+        sql += " AND tick <= ?"
+        parameters.append(end_tick)
+    if extra_filter is not None:
+        sql += f" AND {extra_filter[0]}"
+        parameters.append(extra_filter[1])
+    return _fetch(sql + " ORDER BY tick, rowid", tuple(parameters), list(columns), db_path)
+
+
+def list_runs(db_path=None):
+    """
+    Return the recorded runs as NumPy columns (run_id, description, started_at).
+
+    Parameters:
+    - db_path (str): Database file the runs were recorded to (`TelemetryRecorder(db_path=...)`),
+      the simulation database by default.
+    """
+    return _fetch("SELECT run_id, description, started_at FROM telemetry_runs ORDER BY started_at", (),
+                  ['run_id', 'description', 'started_at'], db_path)
+
+
+def load_robot_telemetry(run_id, start_tick=None, end_tick=None, robot_id=None, db_path=None):
+    """
+    Read the robot records of a run.
+
+    Parameters:
+    - run_id (str): ID of the run.
+    - start_tick, end_tick (int): Inclusive tick range, the whole run by default.
+    - robot_id (str): Only this robot.
+    - db_path (str): Database file the run was recorded to, the simulation database by default.
+
+    Returns:
+    - dict: Column name (tick, robot_id, x, y, status, wall_time) -> NumPy array.
+    """
+    return _run_query('robot_telemetry', ('tick', 'robot_id', 'x', 'y', 'status', 'wall_time'), run_id,
+                      start_tick, end_tick, None if robot_id is None else ("robot_id = ?", robot_id), db_path)
+
+
+def load_field_telemetry(run_id, start_tick=None, end_tick=None, db_path=None):
+    """
+    Read the fire field records of a run.
+
+    Parameters:
+    - db_path (str): Database file the run was recorded to, the simulation database by default.
+
+    Returns:
+    - dict: Column name (tick, fire_count, max_temperature, mean_temperature, wall_time) -> NumPy array.
+    """
+    return _run_query('field_telemetry', ('tick', 'fire_count', 'max_temperature', 'mean_temperature', 'wall_time'),
+                      run_id, start_tick, end_tick, db_path=db_path)
@@ -2,20 +2,15 @@ import sqlite3
 import json
 import numpy as np
 import io
+from environment.packed_occupancy import PackedOccupancy
+from .connection import get_connection
 """This module initializes the SQLite database writer file for the Lunar Base simulation."""
 
 
-# Define a function to save an environment element into the database
-# This function takes a database connection and an element object as arguments
-def save_environment_element(conn, element):
-    # Create a cursor object to interact with the database
-    cursor = conn.cursor()
-    # Execute an SQL query to insert or replace the element into the environment_objects table
-    cursor.execute("""
-        INSERT OR REPLACE INTO environment_objects 
-        (id, tag, class_name, x, y, length, width, radius, center)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+def _element_row(element):
+    """Return the environment_objects row of an element."""
+    center = getattr(element, 'center', None)
+    return (
         element.element_id,  # Unique identifier for the element
         getattr(element, 'tag', ''),  # Optional tag attribute
         element.__class__.__name__,  # Class name of the element
@@ -24,59 +19,104 @@ def save_environment_element(conn, element):
         getattr(element, 'length', None),  # Length of the element (if applicable)
         getattr(element, 'width', None),  # Width of the element (if applicable)
         getattr(element, 'radius', None),  # Radius of the element (if applicable)
-        json.dumps(getattr(element, 'center', {'x': None, 'y': None}))  # Center of the element with x and y values
-    ))
-    # Create another table to store each class's attributes and methods with their definitions
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS class_definitions (
-            class_name TEXT PRIMARY KEY,
-            attributes TEXT,
-            methods TEXT
-        )
-    """)
-    
-    # Prepare data for the class_definitions table
-    attributes = ', '.join([attr for attr in dir(element) if not callable(getattr(element, attr)) and not attr.startswith("__")])
-    methods = ', '.join([method for method in dir(element) if callable(getattr(element, method)) and not method.startswith("__")])
-    
-    # Insert or replace the class definition into the class_definitions table
-    cursor.execute("""
-        INSERT OR REPLACE INTO class_definitions 
-        (class_name, attributes, methods)
-        VALUES (?, ?, ?)
-    """, (
-        element.__class__.__name__,  # Class name of the element
-        attributes,  # Comma-separated list of attributes
-        methods  # Comma-separated list of methods
-    ))
-    conn.commit()
+        json.dumps(center if center is not None else {'x': None, 'y': None}),  # Center of the element with x and y values
+        center[0] if center is not None else None,  # Numeric center, queried without JSON decoding
+        center[1] if center is not None else None,
+    )
+
+
+def _class_definition(element):
+    """Return the class_definitions row (class name, attributes, methods) of an element's class."""
+    # Geometry that does not apply to the element is listed by dir() but raises AttributeError, hence hasattr
+    attributes = ', '.join([attr for attr in dir(element) if hasattr(element, attr) and not callable(getattr(element, attr)) and not attr.startswith("__")])
+    methods = ', '.join([method for method in dir(element) if callable(getattr(element, method, None)) and not method.startswith("__")])
+    return element.__class__.__name__, attributes, methods
+
+
+# Define a function to save environment elements into the database
+def save_environment_elements(conn, elements):
+    """
+    Save environment elements and the definitions of their classes in one transaction.
+
+    Parameters:
+    - conn (sqlite3.Connection): Database connection.
+    - elements (List[EnvironmentElement]): Elements to insert or replace.
+    """
+    elements = list(elements)
+    # One class definition per class, taken from its last element
+    last_of_class = {element.__class__: element for element in elements}
+    with conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO environment_objects
+            (id, tag, class_name, x, y, length, width, radius, center, center_x, center_y)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [_element_row(element) for element in elements])
+        conn.executemany("""
+            INSERT OR REPLACE INTO class_definitions
+            (class_name, attributes, methods)
+            VALUES (?, ?, ?)
+        """, [_class_definition(element) for element in last_of_class.values()])
+
+
+# Define a function to save an environment element into the database
+# This function takes a database connection and an element object as arguments
+def save_environment_element(conn, element):
+    save_environment_elements(conn, [element])
+
+
+# Define a function to delete environment elements from the database
+def delete_environment_elements(conn, element_ids):
+    """
+    Delete environment elements (e.g. removed from the workbook) in one transaction.
+
+    Parameters:
+    - conn (sqlite3.Connection): Database connection.
+    - element_ids (List[str]): IDs of the elements to delete.
+    """
+    with conn:
+        conn.executemany("DELETE FROM environment_objects WHERE id = ?", [(element_id,) for element_id in element_ids])
     # defined a function to save the final map of the internal robot tracks
 def save_internal_robot_tracks(conn, internal_robot_tracks):
     # Create a cursor object to interact with the database
     cursor = conn.cursor()
     final_map = internal_robot_tracks.final_map  # Get the final map from the internal robot tracks
     robot_id = internal_robot_tracks.element_id  # Get the robot ID from the internal robot tracks
-    buffer = io.BytesIO()
-    np.save(buffer, final_map)  # save as binary .npy format
-    buffer.seek(0)
-    blob = buffer.read()
+    blob = PackedOccupancy.from_array(final_map).to_bytes()  # one bit per cell, with a shape header
+    # Millisecond timestamp: TrackMapStore uses it to tell whether its decoded copy is still current
     cursor.execute("""
-        INSERT OR REPLACE INTO internal_robot_tracks (id, final_map)
-        VALUES (?, ?)
+        INSERT OR REPLACE INTO internal_robot_tracks (id, final_map, timestamp)
+        VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
     """, (robot_id, blob))
     print("Element saved successfully.")
     # Commit the transaction to save changes to the database
     conn.commit()
 
+# Define a function to delete the designation target points of removed structures
+def delete_designation_target_points(conn, target_ids):
+    """
+    Delete designation target points (e.g. of superadobes removed from the workbook) in one transaction.
+
+    Parameters:
+    - conn (sqlite3.Connection): Database connection.
+    - target_ids (List[str]): IDs of the target points, e.g. 'superadobe_3'.
+    """
+    with conn:
+        conn.executemany("DELETE FROM internal_robot_target_points WHERE id = ?", [(target_id,) for target_id in target_ids])
+
 # Define a function to save the designation target points for the robots
 def save_designation_target_points(closest_points):
-    
-    # Execute an SQL query to insert or replace the element into the environment_objects table
-    conn = sqlite3.connect('data/lunar_base_sim.db')
-    cursor = conn.cursor()
-    # Insert or replace the closest points into the internal_robot_target_points table
-    for i, point in enumerate(closest_points):
-        cursor.execute("INSERT OR REPLACE INTO internal_robot_target_points (id, point) VALUES (?, ?)", (f"superadobe_{i+1}", json.dumps(point)))
-    conn.commit()
-    conn.close()
+    """
+    Save the designation target points of the structures in one transaction.
+
+    Parameters:
+    - closest_points (dict or List[tuple]): Structure ID -> (x, y) track cell, or a list of
+      cells for superadobe_1, superadobe_2, ...
+    """
+    if not isinstance(closest_points, dict):
+        closest_points = {f"superadobe_{i+1}": point for i, point in enumerate(closest_points)}
+    rows = [(target_id, json.dumps([int(x), int(y)]), int(x), int(y)) for target_id, (x, y) in closest_points.items()]
+    conn = get_connection()
+    # Insert or replace all the points into the internal_robot_target_points table at once
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO internal_robot_target_points (id, point, x, y) VALUES (?, ?, ?, ?)", rows)
     print("Closest points saved to the database successfully.")
\ No newline at end of file
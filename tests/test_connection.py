@@ -0,0 +1,62 @@
+import threading
+
+from sqlite_database.connection import ConnectionManager
+
+
+def connections_of_threads(database, count):
+    """Connection of the calling thread, then the connection each of `count` threads gets twice."""
+    results = [None] * count
+    barrier = threading.Barrier(count)  # Keep every thread alive until all have connected
+
+    def connect(index):
+        first = database.connection()
+        barrier.wait()
+        results[index] = (first, database.connection())
+
+    threads = [threading.Thread(target=connect, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_each_thread_keeps_its_own_connection(tmp_path):
+    database = ConnectionManager(str(tmp_path / 'test.db'))
+    try:
+        main_connection = database.connection()
+        assert database.connection() is main_connection
+        results = connections_of_threads(database, 4)
+        for first, second in results:
+            assert first is second  # Kept open between calls of the same thread
+        connections = [main_connection] + [first for first, _ in results]
+        assert len({id(conn) for conn in connections}) == len(connections)
+    finally:
+        database.close()
+
+
+def test_rows_written_on_one_thread_are_read_on_another(tmp_path):
+    database = ConnectionManager(str(tmp_path / 'test.db'))
+    try:
+        with database.transaction() as conn:
+            conn.execute("CREATE TABLE items (value INTEGER)")
+            conn.executemany("INSERT INTO items VALUES (?)", [(value,) for value in range(10)])
+        counts = []
+        thread = threading.Thread(target=lambda: counts.append(database.execute("SELECT COUNT(*) FROM items").fetchone()[0]))
+        thread.start()
+        thread.join()
+        assert counts == [10]
+    finally:
+        database.close()
+
+
+def test_close_reopens_connections_on_the_configured_path(tmp_path):
+    database = ConnectionManager(str(tmp_path / 'first.db'))
+    try:
+        old_connection = database.connection()
+        database.configure(str(tmp_path / 'second.db'))
+        new_connection = database.connection()
+        assert new_connection is not old_connection
+        assert database.execute("PRAGMA database_list").fetchone()[2].endswith('second.db')
+    finally:
+        database.close()
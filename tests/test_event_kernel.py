@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from mobileobjects.event_kernel import EventKernel, MobileObjectAgent
+from mobileobjects.mobileobject_base import MobileObjectElement
+
+
+def make_agent(incremental_replanning):
+    grid_map = np.ones((30, 40), dtype=np.int64)
+    grid_map[5:25, 20] = 0  # Wall with gaps at the top and bottom
+    robot = MobileObjectElement('robot_1', 'robot', 2, 15, 1, 'internal',
+                                incremental_replanning=incremental_replanning)
+    robot.mobile_object_map = grid_map
+    robot.tasks = ['task']
+    robot.target_list = [(37, 15)]
+    kernel = EventKernel()
+    return robot, kernel, MobileObjectAgent(kernel, robot)
+
+
+def drive(robot, kernel):
+    """Process the remaining events and return the cells the robot stopped at."""
+    cells = [tuple(robot.current_position)]
+    while kernel.pending():
+        kernel.run(max_events=1)
+        if tuple(robot.current_position) != cells[-1]:
+            cells.append(tuple(robot.current_position))
+    return cells
+
+
+@pytest.mark.parametrize('incremental_replanning', [False, True])
+@pytest.mark.parametrize('through_agent', [False, True])
+@pytest.mark.parametrize('block_time', [3.5, 12.2, 20.7])
+def test_repaired_path_is_followed_from_the_cell_reached(incremental_replanning, through_agent, block_time):
+    robot, kernel, agent = make_agent(incremental_replanning)
+    agent.start()
+    kernel.run(until=block_time)
+    agent.sync_position()
+    ahead = [cell for cell in robot.path[2:] if cell not in ((37, 15), tuple(robot.current_position))][:1]
+    (agent.block_cells if through_agent else robot.block_cells)(ahead)
+
+    cells = drive(robot, kernel)
+    assert (37, 15) in cells
+    assert cells[-1] == (2, 15) and robot.current_status == "idle"
+    for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+        assert x0 == x1 or y0 == y1  # Waypoints are joined by straight segments
+        segment = robot.mobile_object_map[min(y0, y1):max(y0, y1) + 1, min(x0, x1):max(x0, x1) + 1]
+        assert (segment > 0).all()  # ...that never cross a blocked cell
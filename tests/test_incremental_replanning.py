@@ -0,0 +1,60 @@
+import numpy as np
+import pathfinding.core.grid
+import pathfinding.finder.a_star
+import pytest
+
+from mobileobjects.mobileobject_base import MobileObjectElement
+
+
+def a_star_length(grid_map, start, goal):
+    """Length (in cells) of a fresh A* path on the map, 0 if there is none."""
+    grid = pathfinding.core.grid.Grid(matrix=grid_map)
+    path, _ = pathfinding.finder.a_star.AStarFinder().find_path(grid.node(*start), grid.node(*goal), grid)
+    return len(path)
+
+
+def assert_valid_path(path, grid_map, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        assert abs(x0 - x1) + abs(y0 - y1) == 1
+        assert grid_map[y1, x1] > 0
+
+
+def make_robot(grid_map, start, goal):
+    robot = MobileObjectElement('robot_1', 'robot', start[0], start[1], 1, 'internal',
+                                incremental_replanning=True)
+    robot.mobile_object_map = grid_map.copy()
+    robot.current_task = 'task'
+    robot.tasks = ['task']
+    robot.target_position = goal
+    robot.path_planning()
+    return robot
+
+
+@pytest.mark.parametrize('steps', [3, 8, 15])
+def test_repaired_path_matches_fresh_a_star_after_moving(steps):
+    grid_map = np.ones((30, 40), dtype=np.int64)
+    grid_map[5:25, 20] = 0  # Wall with gaps at the top and bottom
+    start, goal = (2, 15), (37, 15)
+    robot = make_robot(grid_map, start, goal)
+    for _ in range(steps):
+        robot.update()
+    position = robot.current_position
+    assert position != start
+
+    # Block the gap the robot is heading for, then free it again
+    gap = [(20, y) for y in range(0, 5)] if robot.path and any(y < 15 for _, y in robot.path) else \
+        [(20, y) for y in range(25, 30)]
+    robot.block_cells(gap)
+    blocked_map = grid_map.copy()
+    for x, y in gap:
+        blocked_map[y, x] = 0
+    assert_valid_path(robot.path, blocked_map, position, goal)
+    assert len(robot.path) == a_star_length(blocked_map, position, goal)
+
+    for _ in range(2):
+        robot.update()
+    position = robot.current_position
+    robot.unblock_cells(gap)
+    assert_valid_path(robot.path, grid_map, position, goal)
+    assert len(robot.path) == a_star_length(grid_map, position, goal)
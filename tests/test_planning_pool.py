@@ -0,0 +1,68 @@
+import numpy as np
+import pathfinding.core.grid
+import pathfinding.finder.a_star
+import pytest
+
+from mobileobjects.planning_pool import PlanningPool
+
+
+def serial_a_star(grid_map, start, goal, blocked):
+    """Path of A* on a fresh grid of the map with the blocked cells removed."""
+    grid_map = grid_map.copy()
+    for x, y in blocked:
+        grid_map[y, x] = 0
+    grid = pathfinding.core.grid.Grid(matrix=grid_map)
+    path, _ = pathfinding.finder.a_star.AStarFinder().find_path(grid.node(*start), grid.node(*goal), grid)
+    return [(node.x, node.y) for node in path]
+
+
+def make_map(size, seed):
+    rng = np.random.default_rng(seed)
+    grid_map = (rng.random((size, size)) > 0.25).astype(np.int64)
+    grid_map[0, :] = grid_map[:, 0] = 1  # Keep the borders open so most requests have a path
+    return grid_map
+
+
+def make_requests(grid_map, count, seed):
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(grid_map > 0)  # (y, x)
+    requests = []
+    for _ in range(count):
+        (sy, sx), (gy, gx) = free[rng.choice(len(free), 2, replace=False)]
+        blocked = [(int(x), int(y)) for y, x in free[rng.choice(len(free), 5, replace=False)]
+                   if (x, y) not in ((sx, sy), (gx, gy))]
+        requests.append(((int(sx), int(sy)), (int(gx), int(gy)), blocked))
+    return requests
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_concurrent_paths_match_serial_a_star(use_processes):
+    grid_map = make_map(40, seed=1)
+    requests = make_requests(grid_map, 60, seed=2)
+    pool = PlanningPool({'track': grid_map}, max_workers=4, use_processes=use_processes)
+    try:
+        futures = [pool.submit('track', start, goal, blocked) for start, goal, blocked in requests]
+        paths = [future.result(timeout=120) for future in futures]
+    finally:
+        pool.shutdown()
+    for (start, goal, blocked), path in zip(requests, paths):
+        assert path == serial_a_star(grid_map, start, goal, blocked)
+
+
+def test_update_maps_while_planning_keeps_both_maps_consistent():
+    old_map, new_map = make_map(40, seed=3), make_map(40, seed=4)
+    old_requests = make_requests(old_map & new_map, 40, seed=5)
+    new_requests = make_requests(old_map & new_map, 40, seed=6)
+    pool = PlanningPool({'track': old_map}, max_workers=4, use_processes=False)
+    try:
+        old_futures = [pool.submit('track', start, goal, blocked) for start, goal, blocked in old_requests]
+        pool.update_maps({'track': new_map})  # Old threads are still planning on the old map
+        new_futures = [pool.submit('track', start, goal, blocked) for start, goal, blocked in new_requests]
+        old_paths = [future.result(timeout=120) for future in old_futures]
+        new_paths = [future.result(timeout=120) for future in new_futures]
+    finally:
+        pool.shutdown()
+    for (start, goal, blocked), path in zip(old_requests, old_paths):
+        assert path == serial_a_star(old_map, start, goal, blocked)
+    for (start, goal, blocked), path in zip(new_requests, new_paths):
+        assert path == serial_a_star(new_map, start, goal, blocked)
@@ -0,0 +1,51 @@
+import threading
+
+import numpy as np
+
+from sqlite_database.telemetry import TelemetryRecorder, list_runs, load_field_telemetry, load_robot_telemetry
+
+
+class Robot:
+    def __init__(self, element_id, position, status):
+        self.element_id = element_id
+        self.current_position = position
+        self.current_status = status
+
+
+def test_every_record_is_written_after_close(tmp_path):
+    db_path = str(tmp_path / 'telemetry.db')
+    recorder = TelemetryRecorder(description='test run', db_path=db_path, batch_size=64, flush_interval=0.01)
+    robots = [Robot(f"robot_{index}", (index, 2 * index), 'moving') for index in range(3)]
+
+    def record(first_tick):
+        for tick in range(first_tick, first_tick + 250):
+            recorder.record_robots(tick, robots)
+            recorder.record_field(tick, tick % 7, 300.0 + tick)
+
+    # Record from several threads while the writer is running
+    threads = [threading.Thread(target=record, args=(first_tick,)) for first_tick in (0, 250, 500, 750)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    recorder.close()
+
+    assert recorder.dropped == 0
+    assert recorder.written == 1000 * len(robots) + 1000
+    robot_rows = load_robot_telemetry(recorder.run_id, db_path=db_path)
+    field_rows = load_field_telemetry(recorder.run_id, db_path=db_path)
+    assert len(robot_rows['tick']) == 1000 * len(robots)
+    assert np.array_equal(np.sort(field_rows['tick']), np.arange(1000))
+    assert np.array_equal(field_rows['max_temperature'], 300.0 + field_rows['tick'])
+    assert list(list_runs(db_path=db_path)['run_id']) == [recorder.run_id]
+
+
+def test_records_after_close_are_ignored(tmp_path):
+    db_path = str(tmp_path / 'telemetry.db')
+    recorder = TelemetryRecorder(db_path=db_path)
+    recorder.record_field(0, 1, 310.0)
+    recorder.close()
+    recorder.record_field(1, 1, 320.0)
+    recorder.close()  # Closing twice is harmless
+    assert recorder.written == 1
+    assert list(load_field_telemetry(recorder.run_id, db_path=db_path)['tick']) == [0]